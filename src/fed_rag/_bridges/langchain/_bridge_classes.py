@@ -1,12 +1,12 @@
 import uuid
 from contextlib import contextmanager
-from typing import TYPE_CHECKING, Any, Callable, Generator, Iterable
+from typing import TYPE_CHECKING, Any, Callable, Generator, Iterable, Iterator
 
 from langchain_core.callbacks import CallbackManagerForLLMRun
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.language_models import BaseLLM
-from langchain_core.outputs import Generation, LLMResult
+from langchain_core.outputs import Generation, GenerationChunk, LLMResult
 from langchain_core.vectorstores import VectorStore
 
 from fed_rag.base.generator import BaseGenerator
@@ -297,12 +297,25 @@ class FedRAGLLM(BaseLLM):
         stop: list[str] | None = None,
         run_manager: CallbackManagerForLLMRun | None = None,
         **kwargs: Any,
-    ) -> Iterable[Generation]:
-        """Stream text generation.
+    ) -> Iterator[GenerationChunk]:
+        """Stream text generation using the FedRAG system.
 
-        NOTE: This method is not supported in FedRAGLLM.
+        Args:
+            prompt (str): The prompt to generate text for.
+            stop (list[str], optional): List of stop sequences. Not supported in this implementation.
+            **kwargs (Any): Additional keyword arguments (not used).
+
+        Yields:
+            GenerationChunk: The chunks of generated text.
         """
-        raise BridgeError(
-            "FedRAGLLM does not support streaming. "
-            "Please use the generator directly if you need this feature."
-        )
+        if stop is not None:
+            raise BridgeError(
+                "FedRAGLLM does not support stop sequences. "
+                "Please use the generator directly if you need this feature."
+            )
+        with self._generator() as generator:
+            for text in generator.stream_generate(query=prompt, context=""):
+                chunk = GenerationChunk(text=text)
+                if run_manager is not None:
+                    run_manager.on_llm_new_token(text, chunk=chunk)
+                yield chunk
@@ -82,9 +82,9 @@ class FedRAGManagedIndex(BaseManagedIndex):
             Currently only supports text-based queries.
             """
 
-            query_emb: list[float] = self._rag_system.retriever.encode_query(
+            query_emb = self._rag_system.retriever.encode_query(
                 query_bundle.query_str
-            ).tolist()
+            )
             raw_retrieval_result = self._rag_system.knowledge_store.retrieve(
                 query_emb=query_emb, top_k=self.similiarity_top_k
             )
@@ -140,9 +140,16 @@ class FedRAGManagedIndex(BaseManagedIndex):
         def stream_complete(
             self, prompt: str, **kwargs: Any
         ) -> CompletionResponseGen:
-            raise NotImplementedError(
-                "stream_complete is not implemented for FedRAGLLM."
-            )
+            def gen() -> CompletionResponseGen:
+                with self.generator_for_llama() as generator:
+                    text = ""
+                    for delta in generator.stream_generate(
+                        query=prompt, context=""
+                    ):
+                        text += delta
+                        yield CompletionResponse(text=text, delta=delta)
+
+            return gen()
 
     class FedRAGIndexStruct(IndexStruct):
         @classmethod
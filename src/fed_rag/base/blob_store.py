@@ -0,0 +1,113 @@
+"""Base Blob Store."""
+
+import io
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+from PIL import Image
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+DEFAULT_IMAGE_CACHE_SIZE = 128
+
+
+class BaseBlobStore(BaseModel, ABC):
+    """Base Blob Store Class.
+
+    A blob store keeps binary content such as images out-of-line, so that
+    `KnowledgeNode`s (and the knowledge stores and payloads they end up in)
+    only need to carry a reference to it.
+
+    Attributes:
+        image_cache_size: Maximum number of decoded images kept in the LRU
+            cache used by `get_image`. Set to 0 to disable caching.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    image_cache_size: int = Field(
+        description="Maximum number of decoded images to cache.",
+        default=DEFAULT_IMAGE_CACHE_SIZE,
+        ge=0,
+    )
+    _image_cache: OrderedDict[str, Image.Image] = PrivateAttr(
+        default_factory=OrderedDict
+    )
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """Store a blob.
+
+        Args:
+            data (bytes): The content to store.
+
+        Returns:
+            str: The reference with which to retrieve the blob.
+        """
+
+    @abstractmethod
+    def get(self, ref: str) -> bytes:
+        """Get the content of a blob.
+
+        Args:
+            ref (str): The reference of the blob.
+
+        Returns:
+            bytes: The content of the blob.
+        """
+
+    @abstractmethod
+    def exists(self, ref: str) -> bool:
+        """Check whether a blob exists in the store."""
+
+    @abstractmethod
+    def delete(self, ref: str) -> bool:
+        """Delete a blob.
+
+        Args:
+            ref (str): The reference of the blob.
+
+        Returns:
+            bool: Whether a blob was deleted.
+        """
+
+    def get_image(self, ref: str) -> Image.Image:
+        """Get a blob decoded as an image, using an LRU cache.
+
+        Args:
+            ref (str): The reference of the blob.
+
+        Returns:
+            Image.Image: The decoded image.
+        """
+        try:
+            image = self._image_cache[ref]
+            self._image_cache.move_to_end(ref)
+            return image
+        except KeyError:
+            pass
+
+        image = Image.open(io.BytesIO(self.get(ref)))
+        image.load()
+        if self.image_cache_size > 0:
+            self._image_cache[ref] = image
+            while len(self._image_cache) > self.image_cache_size:
+                try:
+                    self._image_cache.popitem(last=False)
+                except KeyError:  # pragma: no cover
+                    break
+        return image
+
+    def clear_image_cache(self) -> None:
+        """Clear the cache of decoded images."""
+        self._image_cache.clear()
+
+    def __getstate__(self) -> dict[Any, Any]:
+        # don't ship decoded images when pickling, e.g. to dataloader workers
+        state = super().__getstate__()
+        private = state.get("__pydantic_private__")
+        if private:
+            state["__pydantic_private__"] = {
+                **private,
+                "_image_cache": OrderedDict(),
+            }
+        return state
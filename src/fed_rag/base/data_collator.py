@@ -6,14 +6,68 @@ from typing import Any
 from pydantic import BaseModel, ConfigDict
 
 from fed_rag import RAGSystem
+from fed_rag.core.retrieval_service import RetrievalClient, RetrievalResult
+from fed_rag.utils.data import get_retrieved_contexts
+from fed_rag.utils.data._functions import (
+    RETRIEVED_CONTEXTS_KEY,
+    RETRIEVED_SCORES_KEY,
+)
 
 
 class BaseDataCollator(BaseModel, ABC):
-    """Base Data Collator."""
+    """Base Data Collator.
+
+    If a `retrieval_client` is given, retrieval goes through its
+    `RetrievalService` and the `rag_system` is left out when the collator is
+    pickled, e.g., into DataLoader worker processes.
+    """
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
     rag_system: RAGSystem
+    retrieval_client: RetrievalClient | None = None
 
     @abstractmethod
     def __call__(self, features: list[dict[str, Any]], **kwargs: Any) -> Any:
         """Collate examples into a batch."""
+
+    def get_retrieved_contexts(
+        self, features: list[dict[str, Any]], query_key: str = "query"
+    ) -> list[RetrievalResult]:
+        """Get the retrieved contexts and scores of a batch of examples.
+
+        Uses the columns added by `precompute_retrievals` when present. The
+        remaining examples are retrieved with the `retrieval_client` in a
+        single request if given, and with the RAG system otherwise.
+        """
+        if self.retrieval_client is None:
+            return [
+                get_retrieved_contexts(self.rag_system, example, query_key)
+                for example in features
+            ]
+
+        results: list[RetrievalResult | None] = [None] * len(features)
+        to_retrieve = []
+        for ix, example in enumerate(features):
+            if (
+                RETRIEVED_CONTEXTS_KEY in example
+                and RETRIEVED_SCORES_KEY in example
+            ):
+                results[ix] = get_retrieved_contexts(
+                    self.rag_system, example, query_key
+                )
+            else:
+                to_retrieve.append(ix)
+        if to_retrieve:
+            retrieved = self.retrieval_client.retrieve(
+                [str(features[ix][query_key]) for ix in to_retrieve]
+            )
+            for ix, result in zip(to_retrieve, retrieved):
+                results[ix] = result
+        return results  # type: ignore[return-value]
+
+    def __getstate__(self) -> dict[Any, Any]:
+        state = super().__getstate__()
+        if self.retrieval_client is not None:
+            # the RAG system stays with the retrieval service
+            state["__dict__"] = {**state["__dict__"], "rag_system": None}
+        return state
@@ -1,12 +1,14 @@
 """Base Generator"""
 
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 import torch
 from pydantic import BaseModel, ConfigDict
 
 from fed_rag.base.tokenizer import BaseTokenizer
 from fed_rag.data_structures import Context, Prompt, Query
+from fed_rag.exceptions.generator import GeneratorError
 
 DEFAULT_PROMPT_TEMPLATE = """
 You are a helpful assistant. Given the user's query, provide a succinct
@@ -46,6 +48,29 @@ class BaseGenerator(BaseModel, ABC):
     ) -> str | list[str]:
         """Completion interface for generator LLMs."""
 
+    def stream_generate(
+        self,
+        query: str | Query,
+        context: str | Context,
+        **kwargs: dict,
+    ) -> Iterator[str]:
+        """Stream the output generated from a given query and context.
+
+        NOTE: generators that support token streaming override this method.
+        By default, the full output of `generate` is yielded as a single chunk.
+        """
+        yield self.generate(query=query, context=context, **kwargs)  # type: ignore[misc]
+
+    def stream_complete(
+        self, prompt: str | Prompt, **kwargs: dict
+    ) -> Iterator[str]:
+        """Streaming completion interface for generator LLMs.
+
+        NOTE: generators that support token streaming override this method.
+        By default, the full output of `complete` is yielded as a single chunk.
+        """
+        yield self.complete(prompt=prompt, **kwargs)  # type: ignore[misc]
+
     @property
     @abstractmethod
     def model(self) -> torch.nn.Module:
@@ -65,6 +90,44 @@ class BaseGenerator(BaseModel, ABC):
         NOTE: this is used in LM Supervised Retriever fine-tuning.
         """
 
+    def compute_target_sequence_log_proba(
+        self, prompt: str | Prompt, target: str
+    ) -> torch.Tensor:
+        """Compute log P(target | prompt).
+
+        NOTE: generators that can compute log-probabilities directly override
+        this method, as P(target | prompt) underflows for long targets. By
+        default, the log of `compute_target_sequence_proba` is returned.
+        """
+        return torch.log(
+            torch.as_tensor(
+                self.compute_target_sequence_proba(prompt, target),
+                dtype=torch.float,
+            )
+        )
+
+    def batch_compute_target_sequence_log_proba(
+        self, prompts: list[str] | list[Prompt], targets: list[str]
+    ) -> torch.Tensor:
+        """Compute log P(target | prompt) for a batch of (prompt, target) pairs.
+
+        NOTE: generators that support batched scoring override this method.
+        By default, `compute_target_sequence_log_proba` is called for each pair.
+        """
+        if len(prompts) != len(targets):
+            raise GeneratorError(
+                "There should be one target for every prompt."
+            )
+        if not prompts:
+            return torch.empty(0)
+        prompt_list: list[str | Prompt] = list(prompts)
+        return torch.stack(
+            [
+                self.compute_target_sequence_log_proba(prompt, target)
+                for prompt, target in zip(prompt_list, targets)
+            ]
+        )
+
     @property
     @abstractmethod
     def prompt_template(self) -> str:
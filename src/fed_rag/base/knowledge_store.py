@@ -1,20 +1,93 @@
 """Base Knowledge Store."""
 
 import asyncio
+import functools
+import inspect
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, Iterator
 
 from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 
 from fed_rag.utils.asyncio import asyncio_run
+from fed_rag.utils.embeddings import EmbeddingBatchLike, EmbeddingLike
 
 if TYPE_CHECKING:  # pragma: no cover
     from fed_rag.data_structures.knowledge_node import KnowledgeNode
 
 DEFAULT_KNOWLEDGE_STORE_NAME = "default"
+# methods that modify the contents of a knowledge store
+VERSIONED_METHODS = (
+    "load_node",
+    "load_nodes",
+    "delete_node",
+    "clear",
+    "load",
+    "update_embeddings",
+)
+
+
+def _bump_version_around(method: Callable) -> Callable:
+    """Wrap a method so that it increments the store's `version`.
+
+    The version is incremented both before and after the call, so that
+    results computed while a modification is in progress are never
+    associated with the version that follows it.
+    """
+    if getattr(method, "__versioned__", False):
+        return method
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            self._version += 1
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                self._version += 1
+
+        async_wrapper.__versioned__ = True  # type: ignore[attr-defined]
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        self._version += 1
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._version += 1
+
+    wrapper.__versioned__ = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+class _VersionedMixin(BaseModel):
+    """Mixin that tracks modifications of a knowledge store.
+
+    Methods listed in `VERSIONED_METHODS` are wrapped on subclass creation so
+    that every modification increments `version`, which lets callers (e.g.,
+    the retrieval cache of a RAG system) detect stale results.
+    """
+
+    _version: int = PrivateAttr(default=0)
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        for name in VERSIONED_METHODS:
+            method = cls.__dict__.get(name)
+            if method is not None and not getattr(
+                method, "__isabstractmethod__", False
+            ):
+                setattr(cls, name, _bump_version_around(method))
+
+    @property
+    def version(self) -> int:
+        """Counter incremented on every modification of the store."""
+        return self._version
 
 
-class BaseKnowledgeStore(BaseModel, ABC):
+class BaseKnowledgeStore(_VersionedMixin, ABC):
     """Base Knowledge Store Class.
 
     This class represent the base knowledge store component of a RAG system.
@@ -47,12 +120,12 @@ class BaseKnowledgeStore(BaseModel, ABC):
 
     @abstractmethod
     def retrieve(
-        self, query_emb: list[float], top_k: int
+        self, query_emb: EmbeddingLike, top_k: int
     ) -> list[tuple[float, "KnowledgeNode"]]:
         """Retrieve top-k nodes from KnowledgeStore against a provided user query.
 
         Args:
-            query_emb (list[float]): the query represented as an encoded vector.
+            query_emb (EmbeddingLike): the query represented as an encoded vector.
             top_k (int): the number of knowledge nodes to retrieve.
 
         Returns:
@@ -62,12 +135,12 @@ class BaseKnowledgeStore(BaseModel, ABC):
 
     @abstractmethod
     def batch_retrieve(
-        self, query_embs: list[list[float]], top_k: int
+        self, query_embs: EmbeddingBatchLike, top_k: int
     ) -> list[list[tuple[float, "KnowledgeNode"]]]:
         """Batch retrieve top-k nodes from KnowledgeStore against provided user queries.
 
         Args:
-            query_embs (list[list[float]]): the list of encoded queries.
+            query_embs (EmbeddingBatchLike): the list of encoded queries.
             top_k (int): the number of knowledge nodes to retrieve.
 
         Returns:
@@ -103,8 +176,43 @@ class BaseKnowledgeStore(BaseModel, ABC):
     def load(self) -> None:
         """Load the KnowledgeStore nodes from a permanent storage using `name`."""
 
+    def iter_node_batches(
+        self, batch_size: int
+    ) -> Iterator[list["KnowledgeNode"]]:
+        """Iterate over all nodes of the KnowledgeStore, in batches.
 
-class BaseAsyncKnowledgeStore(BaseModel, ABC):
+        NOTE: this is used to re-encode the nodes of the store, e.g., with
+        `KnowledgeStoreReindexer`. Node embeddings may be omitted.
+
+        Args:
+            batch_size (int): The maximum number of nodes per batch.
+
+        Yields:
+            list[KnowledgeNode]: The batches of nodes.
+        """
+        raise NotImplementedError(
+            f"`iter_node_batches()` is not available in {self.__class__.__name__}."
+        )
+
+    def update_embeddings(
+        self, node_ids: list[str], embeddings: EmbeddingBatchLike
+    ) -> None:
+        """Replace the embeddings of nodes of the KnowledgeStore.
+
+        NOTE: this increments the `version` of the store, so that results
+        retrieved with the previous embeddings are no longer served from
+        caches.
+
+        Args:
+            node_ids (list[str]): The ids of the nodes to update.
+            embeddings (EmbeddingBatchLike): The new embeddings, one per node.
+        """
+        raise NotImplementedError(
+            f"`update_embeddings()` is not available in {self.__class__.__name__}."
+        )
+
+
+class BaseAsyncKnowledgeStore(_VersionedMixin, ABC):
     """Base Asynchronous Knowledge Store Class."""
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -131,12 +239,12 @@ class BaseAsyncKnowledgeStore(BaseModel, ABC):
 
     @abstractmethod
     async def retrieve(
-        self, query_emb: list[float], top_k: int
+        self, query_emb: EmbeddingLike, top_k: int
     ) -> list[tuple[float, "KnowledgeNode"]]:
         """Asynchronously retrieve top-k nodes from KnowledgeStore against a provided user query.
 
         Args:
-            query_emb (list[float]): the query represented as an encoded vector.
+            query_emb (EmbeddingLike): the query represented as an encoded vector.
             top_k (int): the number of knowledge nodes to retrieve.
 
         Returns:
@@ -146,12 +254,12 @@ class BaseAsyncKnowledgeStore(BaseModel, ABC):
 
     @abstractmethod
     async def batch_retrieve(
-        self, query_embs: list[list[float]], top_k: int
+        self, query_embs: EmbeddingBatchLike, top_k: int
     ) -> list[list[tuple[float, "KnowledgeNode"]]]:
         """Asynchronously batch retrieve top-k nodes from KnowledgeStore against provided user queries.
 
         Args:
-            query_embs (list[list[float]]): the list of encoded queries.
+            query_embs (EmbeddingBatchLike): the list of encoded queries.
             top_k (int): the number of knowledge nodes to retrieve.
 
         Returns:
@@ -220,13 +328,13 @@ class BaseAsyncKnowledgeStore(BaseModel, ABC):
             asyncio_run(self._async_ks.load_nodes(nodes))
 
         def retrieve(
-            self, query_emb: list[float], top_k: int
+            self, query_emb: EmbeddingLike, top_k: int
         ) -> list[tuple[float, "KnowledgeNode"]]:
             """Implements retrieve."""
             return asyncio_run(self._async_ks.retrieve(query_emb=query_emb, top_k=top_k))  # type: ignore [no-any-return]
 
         def batch_retrieve(
-            self, query_embs: list[list[float]], top_k: int
+            self, query_embs: EmbeddingBatchLike, top_k: int
         ) -> list[list[tuple[float, "KnowledgeNode"]]]:
             """Implements batch_retrieve."""
             return asyncio_run(self._async_ks.batch_retrieve(query_embs=query_embs, top_k=top_k))  # type: ignore [no-any-return]
@@ -244,6 +352,11 @@ class BaseAsyncKnowledgeStore(BaseModel, ABC):
             """Returns the number of nodes in the knowledge store."""
             return self._async_ks.count
 
+        @property
+        def version(self) -> int:
+            """Returns the version of the wrapped async knowledge store."""
+            return self._async_ks.version
+
         def persist(self) -> None:
             """Implements persist."""
             self._async_ks.persist()
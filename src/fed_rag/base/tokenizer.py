@@ -33,6 +33,22 @@ class BaseTokenizer(BaseModel, ABC):
             EncodeResult: The result of encoding.
         """
 
+    def batch_encode(
+        self, inputs: list[str], **kwargs: Any
+    ) -> list[EncodeResult]:
+        """Encode a batch of input strings.
+
+        NOTE: tokenizers that support batched encoding override this method.
+        By default, `encode` is called for each input string.
+
+        Args:
+            inputs (list[str]): The input strings to be encoded.
+
+        Returns:
+            list[EncodeResult]: The result of encoding, for every input.
+        """
+        return [self.encode(input, **kwargs) for input in inputs]
+
     @abstractmethod
     def decode(self, input_ids: list[int], **kwargs: Any) -> str:
         """Decode the input token ids into a string.
@@ -0,0 +1,5 @@
+"""Public BlobStores API"""
+
+from .local import LocalBlobStore
+
+__all__ = ["LocalBlobStore"]
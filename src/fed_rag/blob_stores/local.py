@@ -0,0 +1,80 @@
+"""Local Blob Store"""
+
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from pydantic import Field
+
+from fed_rag.base.blob_store import BaseBlobStore
+from fed_rag.exceptions.blob_store import (
+    BlobNotFoundError,
+    InvalidBlobReferenceError,
+)
+
+DEFAULT_BLOB_STORE_DIR = ".fed_rag/blob_store/"
+_REF_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class LocalBlobStore(BaseBlobStore):
+    """Content-addressed blob store backed by a local directory.
+
+    Blobs are referenced by the SHA-256 hex digest of their content, so
+    identical content is stored only once. Files are fanned out into two
+    levels of sub-directories (e.g. `ab/cd/abcd...`) and written atomically.
+
+    Attributes:
+        root_dir: The directory in which blobs are stored.
+    """
+
+    root_dir: str = Field(
+        description="Directory in which blobs are stored.",
+        default=DEFAULT_BLOB_STORE_DIR,
+    )
+
+    def _get_path(self, ref: str) -> Path:
+        if not _REF_PATTERN.match(ref):
+            raise InvalidBlobReferenceError(
+                f"Invalid blob reference '{ref}': expected a SHA-256 hex digest."
+            )
+        return Path(self.root_dir) / ref[:2] / ref[2:4] / ref
+
+    def put(self, data: bytes) -> str:
+        ref = hashlib.sha256(data).hexdigest()
+        path = self._get_path(ref)
+        if path.exists():
+            return ref
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return ref
+
+    def get(self, ref: str) -> bytes:
+        path = self._get_path(ref)
+        try:
+            return path.read_bytes()
+        except FileNotFoundError as e:
+            raise BlobNotFoundError(
+                f"Blob '{ref}' not found at expected location: {path}"
+            ) from e
+
+    def exists(self, ref: str) -> bool:
+        return self._get_path(ref).exists()
+
+    def delete(self, ref: str) -> bool:
+        path = self._get_path(ref)
+        self._image_cache.pop(ref, None)
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
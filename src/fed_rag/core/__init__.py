@@ -1,11 +1,18 @@
 """Public Core API"""
 
+from .batch_scheduler import RAGBatchScheduler
 from .no_encode_rag_system import AsyncNoEncodeRAGSystem, NoEncodeRAGSystem
 from .rag_system import AsyncRAGSystem, RAGSystem
+from .reindexer import KnowledgeStoreReindexer
+from .retrieval_service import RetrievalClient, RetrievalService
 
 __all__ = [
     "AsyncNoEncodeRAGSystem",
     "AsyncRAGSystem",
+    "KnowledgeStoreReindexer",
     "NoEncodeRAGSystem",
+    "RAGBatchScheduler",
     "RAGSystem",
+    "RetrievalClient",
+    "RetrievalService",
 ]
@@ -0,0 +1,124 @@
+"""Executors for blocking model calls in async RAG systems."""
+
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator
+
+from pydantic import BaseModel, PrivateAttr
+
+ENCODER_EXECUTOR = "encoder"
+GENERATOR_EXECUTOR = "generator"
+
+_EXHAUSTED = object()
+
+
+class _ModelExecutorMixin(BaseModel):
+    """Mixin running blocking model calls off the event loop.
+
+    Every kind of model call (e.g., query encoding, generation) gets its own
+    single-threaded executor. Calls of the same kind are thus serialized, as
+    concurrent forward passes on the same model are not generally safe, while
+    different kinds, and knowledge store I/O, overlap on the event loop.
+
+    Executors are shut down with `shutdown_executors`, or once the system is
+    garbage collected.
+    """
+
+    _executors: dict[str, ThreadPoolExecutor] = PrivateAttr(
+        default_factory=dict
+    )
+    _finalizers: dict[str, weakref.finalize] = PrivateAttr(
+        default_factory=dict
+    )
+
+    def _get_executor(self, name: str) -> ThreadPoolExecutor:
+        if name not in self._executors:
+            executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"fed-rag-{name}"
+            )
+            self._executors[name] = executor
+            # release the worker thread if the system is dropped
+            self._finalizers[name] = weakref.finalize(
+                self, executor.shutdown, wait=False
+            )
+        return self._executors[name]
+
+    async def _run_in_executor(
+        self, name: str, fn: Callable, /, *args: Any, **kwargs: Any
+    ) -> Any:
+        """Await `fn(*args, **kwargs)` run on the executor named `name`."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(name), functools.partial(fn, *args, **kwargs)
+        )
+
+    async def _iterate_in_executor(
+        self, name: str, iterator: Iterator[Any]
+    ) -> AsyncIterator[Any]:
+        """Asynchronously iterate over a blocking iterator.
+
+        The iterator is consumed by a single job on the executor named
+        `name`, which feeds its items to an `asyncio.Queue`. The executor is
+        thus held for the whole iteration, so other calls of the same kind
+        (including other streams) wait for it even if the iterator computes
+        on threads of its own. If iteration stops early, the job closes the
+        iterator after its next item.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[
+            tuple[Any, BaseException | None]
+        ] = asyncio.Queue()
+        stopped = threading.Event()
+
+        def _put(item: Any, error: BaseException | None = None) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+            except RuntimeError:
+                # event loop closed
+                stopped.set()
+
+        def _consume() -> None:
+            try:
+                for item in iterator:
+                    if stopped.is_set():
+                        break
+                    _put(item)
+            except BaseException as e:
+                _put(_EXHAUSTED, e)
+                return
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+            _put(_EXHAUSTED)
+
+        job = loop.run_in_executor(self._get_executor(name), _consume)
+        try:
+            while True:
+                item, error = await queue.get()
+                if error is not None:
+                    raise error
+                if item is _EXHAUSTED:
+                    break
+                yield item
+        finally:
+            stopped.set()
+            await job
+
+    def shutdown_executors(self, wait: bool = True) -> None:
+        """Shut down the executors used for model calls.
+
+        Executors are re-created on demand if the system is used again.
+
+        Args:
+            wait (bool): Whether to wait for pending calls to complete.
+        """
+        executors, self._executors = self._executors, {}
+        finalizers, self._finalizers = self._finalizers, {}
+        for finalizer in finalizers.values():
+            finalizer.detach()
+        for executor in executors.values():
+            executor.shutdown(wait=wait)
@@ -0,0 +1,173 @@
+"""Micro-batching Request Scheduler"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+from typing_extensions import Self
+
+from fed_rag.data_structures import RAGResponse
+from fed_rag.exceptions import SchedulerClosedError
+
+from .no_encode_rag_system import AsyncNoEncodeRAGSystem, NoEncodeRAGSystem
+from .rag_system import AsyncRAGSystem, RAGSystem
+
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_MAX_QUEUE_SIZE = 256
+
+_STOP = object()
+
+
+class RAGBatchScheduler(BaseModel):
+    """Scheduler batching concurrent queries to a RAG system.
+
+    Concurrent `query` calls are queued and collected into micro-batches of
+    at most `max_batch_size` queries, waiting at most `max_wait_ms` after the
+    first query of a batch for more to arrive. Each micro-batch is served
+    with a single `batch_query` call to the RAG system (i.e., one
+    `batch_retrieve` and one `batch_generate`), and every caller gets its
+    own response back.
+
+    At most `max_queue_size` queries can wait to be batched; further `query`
+    calls wait for room in the queue, which applies backpressure to callers.
+
+    Sync RAG systems are run on a dedicated worker thread, so that the event
+    loop keeps accepting queries while a batch is being served.
+
+    Attributes:
+        rag_system: The RAG system to serve queries with.
+        max_batch_size: Maximum number of queries per batch.
+        max_wait_ms: Maximum time to wait for a batch to fill, in ms.
+        max_queue_size: Maximum number of queries waiting to be batched.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    rag_system: (
+        RAGSystem | AsyncRAGSystem | NoEncodeRAGSystem | AsyncNoEncodeRAGSystem
+    )
+    max_batch_size: int = Field(default=DEFAULT_MAX_BATCH_SIZE, gt=0)
+    max_wait_ms: float = Field(default=DEFAULT_MAX_WAIT_MS, ge=0)
+    max_queue_size: int = Field(default=DEFAULT_MAX_QUEUE_SIZE, gt=0)
+    _queue: asyncio.Queue | None = PrivateAttr(default=None)
+    _worker: asyncio.Task | None = PrivateAttr(default=None)
+    _executor: ThreadPoolExecutor | None = PrivateAttr(default=None)
+    _closed: bool = PrivateAttr(default=False)
+
+    async def start(self) -> None:
+        """Start the batching worker on the running event loop.
+
+        Called automatically by the first `query`.
+        """
+        if self._closed:
+            raise SchedulerClosedError("Scheduler has been closed.")
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = asyncio.create_task(self._run())
+
+    async def query(self, query: str) -> RAGResponse:
+        """Query the RAG system as part of a micro-batch.
+
+        Args:
+            query (str): The query.
+
+        Returns:
+            RAGResponse: The response to the query.
+        """
+        await self.start()
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, future))  # type: ignore[union-attr]
+        return await future  # type: ignore[no-any-return]
+
+    async def close(self) -> None:
+        """Serve the queries already queued, then stop the worker."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._worker is not None:
+            await self._queue.put(_STOP)  # type: ignore[union-attr]
+            await self._worker
+            self._worker = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def _run(self) -> None:
+        queue: asyncio.Queue = self._queue  # type: ignore[assignment]
+        loop = asyncio.get_running_loop()
+        stop = False
+        while not stop:
+            item = await queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            await self._serve_batch(batch)
+
+        # fail queries that were queued after the scheduler was closed
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item is not _STOP and not item[1].done():
+                item[1].set_exception(
+                    SchedulerClosedError("Scheduler has been closed.")
+                )
+
+    async def _serve_batch(
+        self, batch: list[tuple[str, asyncio.Future]]
+    ) -> None:
+        # skip queries whose callers are no longer waiting
+        batch = [
+            (query, future) for query, future in batch if not future.done()
+        ]
+        if not batch:
+            return
+
+        queries = [query for query, _ in batch]
+        try:
+            responses = await self._batch_query(queries)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def _batch_query(self, queries: list[str]) -> list[RAGResponse]:
+        if isinstance(
+            self.rag_system, (AsyncRAGSystem, AsyncNoEncodeRAGSystem)
+        ):
+            return await self.rag_system.batch_query(queries)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="fed-rag-scheduler"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.rag_system.batch_query, queries
+        )
@@ -1,12 +1,20 @@
 """Internal Async RAG System Module"""
 
 import asyncio
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, AsyncIterator, Sequence
 
 from pydantic import BaseModel, ConfigDict
 
 from fed_rag.base.bridge import BridgeRegistryMixin
-from fed_rag.data_structures import RAGConfig, RAGResponse, SourceNode
+from fed_rag.base.generator_mixins import GeneratorHasImageModality
+from fed_rag.core._executor import GENERATOR_EXECUTOR, _ModelExecutorMixin
+from fed_rag.data_structures import (
+    AsyncStreamingRAGResponse,
+    Context,
+    RAGConfig,
+    RAGResponse,
+    SourceNode,
+)
 from fed_rag.exceptions import RAGSystemError
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -17,7 +25,9 @@ if TYPE_CHECKING:  # pragma: no cover
     )
 
 
-class _AsyncNoEncodeRAGSystem(BridgeRegistryMixin, BaseModel):
+class _AsyncNoEncodeRAGSystem(
+    _ModelExecutorMixin, BridgeRegistryMixin, BaseModel
+):
     """Unbridged implementation of NoEncodeRAGSystem.
 
     IMPORTANT: This is an internal implementation class.
@@ -26,6 +36,9 @@ class _AsyncNoEncodeRAGSystem(BridgeRegistryMixin, BaseModel):
 
     All interaction with RAG systems should be through the public AsyncNoEncodeRAGSystem
     class.
+
+    Generation runs on a dedicated executor, so that concurrent queries
+    overlap knowledge store I/O with model compute.
     """
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -40,6 +53,19 @@ class _AsyncNoEncodeRAGSystem(BridgeRegistryMixin, BaseModel):
         response = await self.generate(query=query, context=context)
         return RAGResponse(source_nodes=source_nodes, response=response)
 
+    async def stream_query(self, query: str) -> AsyncStreamingRAGResponse:
+        """Query the RAG system, streaming the generated response.
+
+        Retrieval is done eagerly, so the source nodes are available right
+        away, while the response is generated as `response_gen` is consumed.
+        """
+        source_nodes = await self.retrieve(query)
+        context = self._format_context(source_nodes)
+        return AsyncStreamingRAGResponse(
+            source_nodes=source_nodes,
+            response_gen=self.stream_generate(query=query, context=context),
+        )
+
     async def batch_query(self, queries: list[str]) -> list[RAGResponse]:
         """Batch query the RAG system."""
         source_nodes_list = await self.batch_retrieve(queries)
@@ -83,28 +109,62 @@ class _AsyncNoEncodeRAGSystem(BridgeRegistryMixin, BaseModel):
             for raw_result in raw_retrieval_results
         ]
 
-    async def generate(self, query: str, context: str) -> str:
+    async def generate(self, query: str, context: str | Context) -> str:
         """Asynchronously generate response to query with context."""
-        return self.generator.generate(query=query, context=context)  # type: ignore
+        return await self._run_in_executor(  # type: ignore[no-any-return]
+            GENERATOR_EXECUTOR,
+            self.generator.generate,
+            query=query,
+            context=context,
+        )
+
+    def stream_generate(
+        self, query: str, context: str | Context
+    ) -> AsyncIterator[str]:
+        """Stream the response to query with context.
+
+        The whole stream runs as one job on the generator executor.
+        """
+        return self._iterate_in_executor(
+            GENERATOR_EXECUTOR,
+            self.generator.stream_generate(query=query, context=context),
+        )
 
     async def batch_generate(
-        self, queries: list[str], contexts: list[str]
+        self, queries: list[str], contexts: Sequence[str | Context]
     ) -> list[str]:
         """Batch generate responses to queries with contexts."""
         if len(queries) != len(contexts):
             raise RAGSystemError(
                 "Queries and contexts must have the same length for batch generation."
             )
-        return self.generator.generate(query=queries, context=contexts)  # type: ignore
+        return await self._run_in_executor(  # type: ignore[no-any-return]
+            GENERATOR_EXECUTOR,
+            self.generator.generate,
+            query=queries,
+            context=contexts,
+        )
+
+    def _format_context(self, source_nodes: list[SourceNode]) -> str | Context:
+        """Format the context from the source nodes.
 
-    def _format_context(self, source_nodes: list[SourceNode]) -> str:
-        """Format the context from the source nodes."""
-        # TODO: how to format image context
-        return str(
+        For generators accepting images, the images of the source nodes are
+        passed along in a `Context`. Images held in a blob store are decoded
+        through its LRU cache.
+        """
+        text = str(
             self.rag_config.context_separator.join(
-                [node.get_content()["text_content"] for node in source_nodes]
+                [node.text_content for node in source_nodes]
             )
         )
+        if not isinstance(self.generator, GeneratorHasImageModality):
+            return text
+        images = [
+            image
+            for node in source_nodes
+            if (image := node.get_image()) is not None
+        ]
+        return Context(text=text, images=images) if images else text
 
 
 def _resolve_forward_refs() -> None:
@@ -1,11 +1,18 @@
 """Internal RAG System Module"""
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator, Sequence
 
 from pydantic import BaseModel, ConfigDict
 
 from fed_rag.base.bridge import BridgeRegistryMixin
-from fed_rag.data_structures import RAGConfig, RAGResponse, SourceNode
+from fed_rag.base.generator_mixins import GeneratorHasImageModality
+from fed_rag.data_structures import (
+    Context,
+    RAGConfig,
+    RAGResponse,
+    SourceNode,
+    StreamingRAGResponse,
+)
 from fed_rag.exceptions import RAGSystemError
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -39,6 +46,19 @@ class _NoEncodeRAGSystem(BridgeRegistryMixin, BaseModel):
         response = self.generate(query=query, context=context)
         return RAGResponse(source_nodes=source_nodes, response=response)
 
+    def stream_query(self, query: str) -> StreamingRAGResponse:
+        """Query the RAG system, streaming the generated response.
+
+        Retrieval is done eagerly, so the source nodes are available right
+        away, while the response is generated as `response_gen` is consumed.
+        """
+        source_nodes = self.retrieve(query)
+        context = self._format_context(source_nodes)
+        return StreamingRAGResponse(
+            source_nodes=source_nodes,
+            response_gen=self.stream_generate(query=query, context=context),
+        )
+
     def batch_query(self, queries: list[str]) -> list[RAGResponse]:
         """Batch query the RAG system."""
         source_nodes_list = self.batch_retrieve(queries)
@@ -79,12 +99,18 @@ class _NoEncodeRAGSystem(BridgeRegistryMixin, BaseModel):
             for raw_result in raw_retrieval_results
         ]
 
-    def generate(self, query: str, context: str) -> str:
+    def generate(self, query: str, context: str | Context) -> str:
         """Generate response to query with context."""
         return self.generator.generate(query=query, context=context)  # type: ignore
 
+    def stream_generate(
+        self, query: str, context: str | Context
+    ) -> Iterator[str]:
+        """Stream the response to query with context."""
+        return self.generator.stream_generate(query=query, context=context)
+
     def batch_generate(
-        self, queries: list[str], contexts: list[str]
+        self, queries: list[str], contexts: Sequence[str | Context]
     ) -> list[str]:
         """Batch generate responses to queries with contexts."""
         if len(queries) != len(contexts):
@@ -93,14 +119,26 @@ class _NoEncodeRAGSystem(BridgeRegistryMixin, BaseModel):
             )
         return self.generator.generate(query=queries, context=contexts)  # type: ignore
 
-    def _format_context(self, source_nodes: list[SourceNode]) -> str:
-        """Format the context from the source nodes."""
-        # TODO: how to format image context
-        return str(
+    def _format_context(self, source_nodes: list[SourceNode]) -> str | Context:
+        """Format the context from the source nodes.
+
+        For generators accepting images, the images of the source nodes are
+        passed along in a `Context`. Images held in a blob store are decoded
+        through its LRU cache.
+        """
+        text = str(
             self.rag_config.context_separator.join(
-                [node.get_content()["text_content"] for node in source_nodes]
+                [node.text_content for node in source_nodes]
             )
         )
+        if not isinstance(self.generator, GeneratorHasImageModality):
+            return text
+        images = [
+            image
+            for node in source_nodes
+            if (image := node.get_image()) is not None
+        ]
+        return Context(text=text, images=images) if images else text
 
 
 def _resolve_forward_refs() -> None:
@@ -1,13 +1,26 @@
 """Internal Async RAG System Module"""
 
 import asyncio
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, AsyncIterator, Sequence
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 from fed_rag.base.bridge import BridgeRegistryMixin
-from fed_rag.data_structures import RAGConfig, RAGResponse, SourceNode
+from fed_rag.base.generator_mixins import GeneratorHasImageModality
+from fed_rag.core._executor import (
+    ENCODER_EXECUTOR,
+    GENERATOR_EXECUTOR,
+    _ModelExecutorMixin,
+)
+from fed_rag.data_structures import (
+    AsyncStreamingRAGResponse,
+    Context,
+    RAGConfig,
+    RAGResponse,
+    SourceNode,
+)
 from fed_rag.exceptions import RAGSystemError
+from fed_rag.utils.cache import QueryEmbeddingCache, RetrievalCache
 
 if TYPE_CHECKING:  # pragma: no cover
     # to avoid circular imports, using forward refs
@@ -16,7 +29,7 @@ if TYPE_CHECKING:  # pragma: no cover
     from fed_rag.base.retriever import BaseRetriever
 
 
-class _AsyncRAGSystem(BridgeRegistryMixin, BaseModel):
+class _AsyncRAGSystem(_ModelExecutorMixin, BridgeRegistryMixin, BaseModel):
     """Unbridged implementation of AsyncRAGSystem.
 
     IMPORTANT: This is an internal implementation class.
@@ -24,6 +37,9 @@ class _AsyncRAGSystem(BridgeRegistryMixin, BaseModel):
     by user code or other parts of the library.
 
     All interaction with RAG systems should be through the public AsyncRAGSystem class.
+
+    Query encoding and generation run on dedicated executors, so that
+    concurrent queries overlap knowledge store I/O with model compute.
     """
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -31,6 +47,46 @@ class _AsyncRAGSystem(BridgeRegistryMixin, BaseModel):
     retriever: "BaseRetriever"
     knowledge_store: "BaseAsyncKnowledgeStore"
     rag_config: RAGConfig
+    _query_embedding_cache: QueryEmbeddingCache | None = PrivateAttr(
+        default=None
+    )
+    _retrieval_cache: RetrievalCache | None = PrivateAttr(default=None)
+
+    @property
+    def query_embedding_cache(self) -> QueryEmbeddingCache | None:
+        """The query-embedding cache, if enabled in the `RAGConfig`."""
+        if self.rag_config.query_cache_size == 0:
+            return None
+        if self._query_embedding_cache is None:
+            self._query_embedding_cache = QueryEmbeddingCache(
+                maxsize=self.rag_config.query_cache_size,
+                ttl=self.rag_config.query_cache_ttl,
+            )
+        return self._query_embedding_cache
+
+    @property
+    def retrieval_cache(self) -> RetrievalCache | None:
+        """The retrieval result cache, if enabled in the `RAGConfig`."""
+        if self.rag_config.retrieval_cache_size == 0:
+            return None
+        if self._retrieval_cache is None:
+            self._retrieval_cache = RetrievalCache(
+                maxsize=self.rag_config.retrieval_cache_size,
+                ttl=self.rag_config.retrieval_cache_ttl,
+            )
+        return self._retrieval_cache
+
+    def _encode_query(self, query: str) -> Any:
+        cache = self.query_embedding_cache
+        if cache is None:
+            return self.retriever.encode_query(query)
+        return cache.encode_query(self.retriever, query)
+
+    def _batch_encode_query(self, queries: list[str]) -> Any:
+        cache = self.query_embedding_cache
+        if cache is None:
+            return self.retriever.encode_query(queries)
+        return cache.batch_encode_query(self.retriever, queries)
 
     async def query(self, query: str) -> RAGResponse:
         """Query the RAG system."""
@@ -39,6 +95,19 @@ class _AsyncRAGSystem(BridgeRegistryMixin, BaseModel):
         response = await self.generate(query=query, context=context)
         return RAGResponse(source_nodes=source_nodes, response=response)
 
+    async def stream_query(self, query: str) -> AsyncStreamingRAGResponse:
+        """Query the RAG system, streaming the generated response.
+
+        Retrieval is done eagerly, so the source nodes are available right
+        away, while the response is generated as `response_gen` is consumed.
+        """
+        source_nodes = await self.retrieve(query)
+        context = self._format_context(source_nodes)
+        return AsyncStreamingRAGResponse(
+            source_nodes=source_nodes,
+            response_gen=self.stream_generate(query=query, context=context),
+        )
+
     async def batch_query(self, queries: list[str]) -> list[RAGResponse]:
         """Batch query the RAG system."""
         source_nodes_list = await self.batch_retrieve(queries)
@@ -54,7 +123,44 @@ class _AsyncRAGSystem(BridgeRegistryMixin, BaseModel):
 
     async def retrieve(self, query: str) -> list[SourceNode]:
         """Retrieve from KnowledgeStore."""
-        query_emb: list[float] = self.retriever.encode_query(query).tolist()
+        cache = self.retrieval_cache
+        if cache is None or not isinstance(query, str):
+            return await self._retrieve(query)
+
+        state = cache.check_state(self.retriever, self.knowledge_store)
+        top_k = self.rag_config.top_k
+        source_nodes = cache.get(query, top_k)
+        if source_nodes is None:
+            source_nodes = await self._retrieve(query)
+            cache.put(query, top_k, source_nodes, state=state)
+        return source_nodes
+
+    async def batch_retrieve(
+        self, queries: list[str]
+    ) -> list[list[SourceNode]]:
+        """Batch retrieve from KnowledgeStore."""
+        cache = self.retrieval_cache
+        if cache is None or not all(isinstance(q, str) for q in queries):
+            return await self._batch_retrieve(queries)
+
+        state = cache.check_state(self.retriever, self.knowledge_store)
+        top_k = self.rag_config.top_k
+        results = {q: cache.get(q, top_k) for q in queries}
+        misses = [
+            q for q, source_nodes in results.items() if source_nodes is None
+        ]
+        if misses:
+            for query, source_nodes in zip(
+                misses, await self._batch_retrieve(misses)
+            ):
+                results[query] = source_nodes
+                cache.put(query, top_k, source_nodes, state=state)
+        return [list(results[q]) for q in queries]  # type: ignore[arg-type]
+
+    async def _retrieve(self, query: str) -> list[SourceNode]:
+        query_emb = await self._run_in_executor(
+            ENCODER_EXECUTOR, self._encode_query, query
+        )
         raw_retrieval_result = await self.knowledge_store.retrieve(
             query_emb=query_emb, top_k=self.rag_config.top_k
         )
@@ -62,13 +168,12 @@ class _AsyncRAGSystem(BridgeRegistryMixin, BaseModel):
             SourceNode(score=el[0], node=el[1]) for el in raw_retrieval_result
         ]
 
-    async def batch_retrieve(
+    async def _batch_retrieve(
         self, queries: list[str]
     ) -> list[list[SourceNode]]:
-        """Batch retrieve from KnowledgeStore."""
-        query_embs: list[list[float]] = self.retriever.encode_query(
-            queries
-        ).tolist()
+        query_embs = await self._run_in_executor(
+            ENCODER_EXECUTOR, self._batch_encode_query, queries
+        )
         try:
             raw_retrieval_results = await self.knowledge_store.batch_retrieve(
                 query_embs=query_embs, top_k=self.rag_config.top_k
@@ -87,28 +192,62 @@ class _AsyncRAGSystem(BridgeRegistryMixin, BaseModel):
             for raw_result in raw_retrieval_results
         ]
 
-    async def generate(self, query: str, context: str) -> str:
+    async def generate(self, query: str, context: str | Context) -> str:
         """Generate response to query with context."""
-        return self.generator.generate(query=query, context=context)  # type: ignore
+        return await self._run_in_executor(  # type: ignore[no-any-return]
+            GENERATOR_EXECUTOR,
+            self.generator.generate,
+            query=query,
+            context=context,
+        )
+
+    def stream_generate(
+        self, query: str, context: str | Context
+    ) -> AsyncIterator[str]:
+        """Stream the response to query with context.
+
+        The whole stream runs as one job on the generator executor.
+        """
+        return self._iterate_in_executor(
+            GENERATOR_EXECUTOR,
+            self.generator.stream_generate(query=query, context=context),
+        )
 
     async def batch_generate(
-        self, queries: list[str], contexts: list[str]
+        self, queries: list[str], contexts: Sequence[str | Context]
     ) -> list[str]:
         """Batch generate responses to queries with contexts."""
         if len(queries) != len(contexts):
             raise RAGSystemError(
                 "Queries and contexts must have the same length for batch generation."
             )
-        return self.generator.generate(query=queries, context=contexts)  # type: ignore
+        return await self._run_in_executor(  # type: ignore[no-any-return]
+            GENERATOR_EXECUTOR,
+            self.generator.generate,
+            query=queries,
+            context=contexts,
+        )
 
-    def _format_context(self, source_nodes: list[SourceNode]) -> str:
-        """Format the context from the source nodes."""
-        # TODO: how to format image context
-        return str(
+    def _format_context(self, source_nodes: list[SourceNode]) -> str | Context:
+        """Format the context from the source nodes.
+
+        For generators accepting images, the images of the source nodes are
+        passed along in a `Context`. Images held in a blob store are decoded
+        through its LRU cache.
+        """
+        text = str(
             self.rag_config.context_separator.join(
-                [node.get_content()["text_content"] for node in source_nodes]
+                [node.text_content for node in source_nodes]
             )
         )
+        if not isinstance(self.generator, GeneratorHasImageModality):
+            return text
+        images = [
+            image
+            for node in source_nodes
+            if (image := node.get_image()) is not None
+        ]
+        return Context(text=text, images=images) if images else text
 
 
 def _resolve_forward_refs() -> None:
@@ -1,12 +1,22 @@
 """Internal RAG System Module"""
 
-from typing import TYPE_CHECKING
+import itertools
+from typing import TYPE_CHECKING, Any, Generator, Iterable, Iterator, Sequence
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 from fed_rag.base.bridge import BridgeRegistryMixin
-from fed_rag.data_structures import RAGConfig, RAGResponse, SourceNode
+from fed_rag.base.generator_mixins import GeneratorHasImageModality
+from fed_rag.data_structures import (
+    Context,
+    RAGConfig,
+    RAGResponse,
+    SourceNode,
+    StreamingRAGResponse,
+)
 from fed_rag.exceptions import RAGSystemError
+from fed_rag.utils.cache import QueryEmbeddingCache, RetrievalCache
+from fed_rag.utils.concurrency import threaded_map
 
 if TYPE_CHECKING:  # pragma: no cover
     # to avoid circular imports, using forward refs
@@ -14,6 +24,16 @@ if TYPE_CHECKING:  # pragma: no cover
     from fed_rag.base.knowledge_store import BaseKnowledgeStore
     from fed_rag.base.retriever import BaseRetriever
 
+DEFAULT_STREAM_BATCH_SIZE = 8
+
+
+def _iter_batches(
+    queries: Iterable[str], batch_size: int
+) -> Iterator[list[str]]:
+    iterator = iter(queries)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
+
 
 class _RAGSystem(BridgeRegistryMixin, BaseModel):
     """Unbridged implementation of RAGSystem.
@@ -30,6 +50,46 @@ class _RAGSystem(BridgeRegistryMixin, BaseModel):
     retriever: "BaseRetriever"
     knowledge_store: "BaseKnowledgeStore"
     rag_config: RAGConfig
+    _query_embedding_cache: QueryEmbeddingCache | None = PrivateAttr(
+        default=None
+    )
+    _retrieval_cache: RetrievalCache | None = PrivateAttr(default=None)
+
+    @property
+    def query_embedding_cache(self) -> QueryEmbeddingCache | None:
+        """The query-embedding cache, if enabled in the `RAGConfig`."""
+        if self.rag_config.query_cache_size == 0:
+            return None
+        if self._query_embedding_cache is None:
+            self._query_embedding_cache = QueryEmbeddingCache(
+                maxsize=self.rag_config.query_cache_size,
+                ttl=self.rag_config.query_cache_ttl,
+            )
+        return self._query_embedding_cache
+
+    @property
+    def retrieval_cache(self) -> RetrievalCache | None:
+        """The retrieval result cache, if enabled in the `RAGConfig`."""
+        if self.rag_config.retrieval_cache_size == 0:
+            return None
+        if self._retrieval_cache is None:
+            self._retrieval_cache = RetrievalCache(
+                maxsize=self.rag_config.retrieval_cache_size,
+                ttl=self.rag_config.retrieval_cache_ttl,
+            )
+        return self._retrieval_cache
+
+    def _encode_query(self, query: str) -> Any:
+        cache = self.query_embedding_cache
+        if cache is None:
+            return self.retriever.encode_query(query)
+        return cache.encode_query(self.retriever, query)
+
+    def _batch_encode_query(self, queries: list[str]) -> Any:
+        cache = self.query_embedding_cache
+        if cache is None:
+            return self.retriever.encode_query(queries)
+        return cache.batch_encode_query(self.retriever, queries)
 
     def query(self, query: str) -> RAGResponse:
         """Query the RAG system."""
@@ -38,6 +98,19 @@ class _RAGSystem(BridgeRegistryMixin, BaseModel):
         response = self.generate(query=query, context=context)
         return RAGResponse(source_nodes=source_nodes, response=response)
 
+    def stream_query(self, query: str) -> StreamingRAGResponse:
+        """Query the RAG system, streaming the generated response.
+
+        Retrieval is done eagerly, so the source nodes are available right
+        away, while the response is generated as `response_gen` is consumed.
+        """
+        source_nodes = self.retrieve(query)
+        context = self._format_context(source_nodes)
+        return StreamingRAGResponse(
+            source_nodes=source_nodes,
+            response_gen=self.stream_generate(query=query, context=context),
+        )
+
     def batch_query(self, queries: list[str]) -> list[RAGResponse]:
         """Batch query the RAG system."""
         source_nodes_list = self.batch_retrieve(queries)
@@ -51,9 +124,94 @@ class _RAGSystem(BridgeRegistryMixin, BaseModel):
             for source_nodes, response in zip(source_nodes_list, responses)
         ]
 
+    def query_stream(
+        self,
+        queries: Iterable[str],
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        max_queue_size: int = 1,
+    ) -> Generator[RAGResponse, None, None]:
+        """Lazily query the RAG system over a stream of queries.
+
+        Queries are processed in micro-batches of `batch_size`. Retrieval
+        (query encoding and knowledge store search) runs on a background
+        thread that works ahead on the next micro-batches while the current
+        one is being generated, so the two stages overlap. At most
+        `max_queue_size` retrieved micro-batches are buffered.
+
+        Args:
+            queries (Iterable[str]): The queries. Can be a lazy iterator.
+            batch_size (int): Number of queries per micro-batch.
+            max_queue_size (int): Maximum number of retrieved micro-batches
+                waiting to be generated.
+
+        Yields:
+            RAGResponse: The responses, in the order of `queries`.
+        """
+        if batch_size < 1:
+            raise RAGSystemError("`batch_size` must be a positive integer.")
+
+        def _retrieve_batch(
+            batch: list[str],
+        ) -> tuple[list[str], list[list[SourceNode]]]:
+            return batch, self.batch_retrieve(batch)
+
+        retrieved = threaded_map(
+            _retrieve_batch,
+            _iter_batches(queries, batch_size),
+            max_queue_size=max_queue_size,
+        )
+        try:
+            for batch, source_nodes_list in retrieved:
+                contexts = [
+                    self._format_context(source_nodes)
+                    for source_nodes in source_nodes_list
+                ]
+                responses = self.batch_generate(batch, contexts)
+                for source_nodes, response in zip(
+                    source_nodes_list, responses
+                ):
+                    yield RAGResponse(
+                        source_nodes=source_nodes, response=response
+                    )
+        finally:
+            retrieved.close()
+
     def retrieve(self, query: str) -> list[SourceNode]:
         """Retrieve from KnowledgeStore."""
-        query_emb: list[float] = self.retriever.encode_query(query).tolist()
+        cache = self.retrieval_cache
+        if cache is None or not isinstance(query, str):
+            return self._retrieve(query)
+
+        state = cache.check_state(self.retriever, self.knowledge_store)
+        top_k = self.rag_config.top_k
+        source_nodes = cache.get(query, top_k)
+        if source_nodes is None:
+            source_nodes = self._retrieve(query)
+            cache.put(query, top_k, source_nodes, state=state)
+        return source_nodes
+
+    def batch_retrieve(self, queries: list[str]) -> list[list[SourceNode]]:
+        """Batch retrieve from KnowledgeStore."""
+        cache = self.retrieval_cache
+        if cache is None or not all(isinstance(q, str) for q in queries):
+            return self._batch_retrieve(queries)
+
+        state = cache.check_state(self.retriever, self.knowledge_store)
+        top_k = self.rag_config.top_k
+        results = {q: cache.get(q, top_k) for q in queries}
+        misses = [
+            q for q, source_nodes in results.items() if source_nodes is None
+        ]
+        if misses:
+            for query, source_nodes in zip(
+                misses, self._batch_retrieve(misses)
+            ):
+                results[query] = source_nodes
+                cache.put(query, top_k, source_nodes, state=state)
+        return [list(results[q]) for q in queries]  # type: ignore[arg-type]
+
+    def _retrieve(self, query: str) -> list[SourceNode]:
+        query_emb = self._encode_query(query)
         raw_retrieval_result = self.knowledge_store.retrieve(
             query_emb=query_emb, top_k=self.rag_config.top_k
         )
@@ -61,11 +219,8 @@ class _RAGSystem(BridgeRegistryMixin, BaseModel):
             SourceNode(score=el[0], node=el[1]) for el in raw_retrieval_result
         ]
 
-    def batch_retrieve(self, queries: list[str]) -> list[list[SourceNode]]:
-        """Batch retrieve from KnowledgeStore."""
-        query_embs: list[list[float]] = self.retriever.encode_query(
-            queries
-        ).tolist()
+    def _batch_retrieve(self, queries: list[str]) -> list[list[SourceNode]]:
+        query_embs = self._batch_encode_query(queries)
         try:
             raw_retrieval_results = self.knowledge_store.batch_retrieve(
                 query_embs=query_embs, top_k=self.rag_config.top_k
@@ -83,12 +238,18 @@ class _RAGSystem(BridgeRegistryMixin, BaseModel):
             for raw_result in raw_retrieval_results
         ]
 
-    def generate(self, query: str, context: str) -> str:
+    def generate(self, query: str, context: str | Context) -> str:
         """Generate response to query with context."""
         return self.generator.generate(query=query, context=context)  # type: ignore
 
+    def stream_generate(
+        self, query: str, context: str | Context
+    ) -> Iterator[str]:
+        """Stream the response to query with context."""
+        return self.generator.stream_generate(query=query, context=context)
+
     def batch_generate(
-        self, queries: list[str], contexts: list[str]
+        self, queries: list[str], contexts: Sequence[str | Context]
     ) -> list[str]:
         """Batch generate responses to queries with contexts."""
         if len(queries) != len(contexts):
@@ -97,14 +258,26 @@ class _RAGSystem(BridgeRegistryMixin, BaseModel):
             )
         return self.generator.generate(query=queries, context=contexts)  # type: ignore
 
-    def _format_context(self, source_nodes: list[SourceNode]) -> str:
-        """Format the context from the source nodes."""
-        # TODO: how to format image context
-        return str(
+    def _format_context(self, source_nodes: list[SourceNode]) -> str | Context:
+        """Format the context from the source nodes.
+
+        For generators accepting images, the images of the source nodes are
+        passed along in a `Context`. Images held in a blob store are decoded
+        through its LRU cache.
+        """
+        text = str(
             self.rag_config.context_separator.join(
-                [node.get_content()["text_content"] for node in source_nodes]
+                [node.text_content for node in source_nodes]
             )
         )
+        if not isinstance(self.generator, GeneratorHasImageModality):
+            return text
+        images = [
+            image
+            for node in source_nodes
+            if (image := node.get_image()) is not None
+        ]
+        return Context(text=text, images=images) if images else text
 
 
 def _resolve_forward_refs() -> None:
@@ -0,0 +1,181 @@
+"""Knowledge Store Re-indexer"""
+
+import copy
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import torch
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+from typing_extensions import Self
+
+from fed_rag.base.knowledge_store import BaseKnowledgeStore
+from fed_rag.base.retriever import BaseRetriever
+from fed_rag.exceptions import ReindexError
+
+DEFAULT_REINDEX_BATCH_SIZE = 256
+
+
+class KnowledgeStoreReindexer(BaseModel):
+    """Re-encodes the nodes of a knowledge store with a retriever.
+
+    Once the context encoder of a retriever has been updated (e.g., by
+    retriever fine-tuning), the embeddings held by the knowledge store are
+    stale. The re-indexer re-encodes the text of every node in batches of
+    `batch_size` and replaces all embeddings at once with
+    `update_embeddings`, which increments the `version` of the store.
+
+    `start` runs a re-index on a background thread, so that training is not
+    blocked. By default, it encodes with a snapshot of the retriever weights
+    taken when the re-index starts, so that all embeddings come from the same
+    weights even as training keeps updating them. The snapshot is held by a
+    shadow retriever, deep copied from the retriever on the first `start` and
+    reused by later ones, which only copy the current weights into it. This
+    keeps one extra copy of the encoder(s) in memory (on the same device)
+    for the lifetime of the re-indexer; set `snapshot_retriever=False` to
+    encode with the live retriever instead.
+
+    Attributes:
+        retriever: The retriever encoding the nodes.
+        knowledge_store: The knowledge store to re-index.
+        batch_size: Number of nodes encoded per `encode_context` call.
+        snapshot_retriever: Whether background re-indexes encode with a
+            snapshot of the retriever weights taken when they start.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    retriever: BaseRetriever
+    knowledge_store: BaseKnowledgeStore
+    batch_size: int = Field(default=DEFAULT_REINDEX_BATCH_SIZE, gt=0)
+    snapshot_retriever: bool = Field(default=True)
+    _executor: ThreadPoolExecutor | None = PrivateAttr(default=None)
+    _future: Future | None = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _shadow_retriever: BaseRetriever | None = PrivateAttr(default=None)
+    _num_reindexes: int = PrivateAttr(default=0)
+
+    @property
+    def num_reindexes(self) -> int:
+        """Number of completed re-indexes."""
+        return self._num_reindexes
+
+    @property
+    def running(self) -> bool:
+        """Whether a background re-index is in progress."""
+        return self._future is not None and not self._future.done()
+
+    def reindex(self, retriever: BaseRetriever | None = None) -> int:
+        """Re-encode the nodes of the knowledge store, in the calling thread.
+
+        Nodes without text content are left untouched.
+
+        Args:
+            retriever (BaseRetriever | None): The retriever to encode with.
+                Defaults to `self.retriever`.
+
+        Returns:
+            int: The number of re-encoded nodes.
+        """
+        retriever = retriever or self.retriever
+        node_ids: list[str] = []
+        embeddings: list[torch.Tensor] = []
+        with torch.no_grad():
+            for nodes in self.knowledge_store.iter_node_batches(
+                self.batch_size
+            ):
+                nodes = [n for n in nodes if n.text_content is not None]
+                if not nodes:
+                    continue
+                texts = [str(n.text_content) for n in nodes]
+                batch_embeddings = retriever.encode_context(texts)
+                if not isinstance(batch_embeddings, torch.Tensor):
+                    raise ReindexError(
+                        "KnowledgeStoreReindexer requires `encode_context` to "
+                        "return a torch.Tensor."
+                    )
+                if batch_embeddings.dim() == 1:
+                    batch_embeddings = batch_embeddings.unsqueeze(0)
+                if batch_embeddings.shape[0] != len(texts):
+                    raise ReindexError(
+                        f"Retriever returned {batch_embeddings.shape[0]} "
+                        f"embeddings for a batch of {len(texts)} texts."
+                    )
+                node_ids.extend(n.node_id for n in nodes)
+                embeddings.append(batch_embeddings.detach().float().cpu())
+
+        if node_ids:
+            self.knowledge_store.update_embeddings(
+                node_ids, torch.cat(embeddings, dim=0)
+            )
+        self._num_reindexes += 1
+        return len(node_ids)
+
+    def start(self) -> bool:
+        """Start a re-index on a background thread.
+
+        Returns:
+            bool: Whether a re-index was started, i.e., `False` if one is
+                still in progress.
+        """
+        with self._lock:
+            if self.running:
+                return False
+            if self._future is not None:
+                # surface errors of the previous re-index
+                future, self._future = self._future, None
+                future.result()
+            retriever = (
+                self._snapshot_retriever()
+                if self.snapshot_retriever
+                else self.retriever
+            )
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="fed-rag-reindex"
+                )
+            self._future = self._executor.submit(self.reindex, retriever)
+            return True
+
+    def _snapshot_retriever(self) -> BaseRetriever:
+        """Copy the current weights of the retriever into its shadow."""
+        if self._shadow_retriever is None:
+            self._shadow_retriever = copy.deepcopy(self.retriever)
+            return self._shadow_retriever
+
+        # copy into the existing parameters, without allocating new ones
+        shadow = self._shadow_retriever
+        for name in ("encoder", "query_encoder", "context_encoder"):
+            live_module = getattr(self.retriever, name)
+            shadow_module = getattr(shadow, name)
+            if live_module is not None and shadow_module is not None:
+                shadow_module.load_state_dict(live_module.state_dict())
+        return shadow
+
+    def wait(self, timeout: float | None = None) -> int | None:
+        """Wait for the background re-index, if any, to complete.
+
+        Errors raised while re-indexing are re-raised here.
+
+        Returns:
+            int | None: The number of re-encoded nodes, or `None` if no
+                re-index was started.
+        """
+        future = self._future
+        if future is None:
+            return None
+        return future.result(timeout=timeout)  # type: ignore[no-any-return]
+
+    def close(self) -> None:
+        """Wait for the background re-index and stop the worker thread."""
+        try:
+            self.wait()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
@@ -0,0 +1,247 @@
+"""Retrieval Service for Multi-worker Data Loading"""
+
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any
+
+import torch
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+from typing_extensions import Self
+
+from fed_rag.data_structures import Prompt
+from fed_rag.exceptions import RetrievalServiceError
+
+from .no_encode_rag_system import NoEncodeRAGSystem
+from .rag_system import RAGSystem
+
+RetrievalResult = tuple[list[str | None], list[float]]
+
+_RETRIEVE = "retrieve"
+_SCORE = "score"
+
+
+class RetrievalClient:
+    """Client of a `RetrievalService`.
+
+    Clients only hold the address and key of the service, so they are cheap
+    to pickle into DataLoader worker processes. Every process opens its own
+    connection to the service on first use.
+
+    Args:
+        address (tuple[str, int]): The address of the service.
+        authkey (bytes): The key authenticating connections to the service.
+    """
+
+    def __init__(self, address: tuple[str, int], authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+        self._conn: Connection | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def retrieve(self, queries: list[str]) -> list[RetrievalResult]:
+        """Retrieve for a batch of queries with the RAG system of the service.
+
+        Returns:
+            list[RetrievalResult]: The text contents and scores of the
+                retrieved nodes, for every query.
+        """
+        return self._request(_RETRIEVE, list(queries))  # type: ignore[no-any-return]
+
+    def batch_compute_target_sequence_log_proba(
+        self, prompts: list[str] | list[Prompt], targets: list[str]
+    ) -> torch.Tensor:
+        """Compute log P(target | prompt) with the generator of the service."""
+        return self._request(  # type: ignore[no-any-return]
+            _SCORE, ([str(p) for p in prompts], list(targets))
+        )
+
+    def close(self) -> None:
+        """Close the connection of this process to the service."""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._pid = None
+
+    def _request(self, op: str, payload: Any) -> Any:
+        with self._lock:
+            if self._conn is None or self._pid != os.getpid():
+                # connections are not shared with forked worker processes
+                try:
+                    self._conn = Client(self.address, authkey=self.authkey)
+                except OSError as e:
+                    raise RetrievalServiceError(
+                        f"Failed to connect to retrieval service at "
+                        f"{self.address}: {e}"
+                    ) from e
+                self._pid = os.getpid()
+            try:
+                self._conn.send((op, payload))
+                ok, result = self._conn.recv()
+            except (EOFError, OSError) as e:
+                self._conn = None
+                raise RetrievalServiceError(
+                    "Lost connection to retrieval service."
+                ) from e
+        if not ok:
+            raise RetrievalServiceError(result)
+        return result
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"address": self.address, "authkey": self.authkey}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)  # type: ignore[misc]
+
+
+class RetrievalService(BaseModel):
+    """Service running retrieval for data collators of multi-worker loaders.
+
+    Data collators that retrieve with a RAG system cannot run in DataLoader
+    worker processes, as every worker would hold a copy of the retriever,
+    generator and knowledge store. Instead, the service keeps the RAG system
+    in the training process and answers requests of `RetrievalClient`s on
+    background threads, over an authenticated local socket. Collators given
+    a client only tokenize and pad in the workers, while the DataLoader
+    prefetches upcoming batches (see `prefetch_factor`), so that retrieval
+    does not hold up training steps.
+
+    LSR data collators also score (prompt, target) pairs with the generator
+    through the service.
+
+    Requests are served one at a time by a single worker thread, so the
+    models of the RAG system are never called concurrently.
+
+    Attributes:
+        rag_system: The RAG system to retrieve with.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    rag_system: RAGSystem | NoEncodeRAGSystem
+    _listener: Listener | None = PrivateAttr(default=None)
+    _authkey: bytes = PrivateAttr(
+        default_factory=lambda: secrets.token_bytes(32)
+    )
+    _executor: ThreadPoolExecutor | None = PrivateAttr(default=None)
+    _closed: threading.Event = PrivateAttr(default_factory=threading.Event)
+
+    @property
+    def running(self) -> bool:
+        """Whether the service accepts connections."""
+        return self._listener is not None and not self._closed.is_set()
+
+    def start(self) -> RetrievalClient:
+        """Start accepting connections, if not already started.
+
+        Returns:
+            RetrievalClient: A client of the service.
+        """
+        if self._closed.is_set():
+            raise RetrievalServiceError("Retrieval service has been closed.")
+        if self._listener is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="fed-rag-retrieval"
+            )
+            self._listener = Listener(("127.0.0.1", 0), authkey=self._authkey)
+            threading.Thread(
+                target=self._accept,
+                name="fed-rag-retrieval-listener",
+                daemon=True,
+            ).start()
+        return self.client()
+
+    def client(self) -> RetrievalClient:
+        """Get a client of the running service."""
+        if not self.running:
+            raise RetrievalServiceError("Retrieval service is not running.")
+        return RetrievalClient(
+            address=self._listener.address,  # type: ignore[union-attr,arg-type]
+            authkey=self._authkey,
+        )
+
+    def retrieve(self, queries: list[str]) -> list[RetrievalResult]:
+        """Retrieve for a batch of queries, in the calling thread."""
+        source_nodes_list = self.rag_system.batch_retrieve(queries)
+        return [
+            (
+                [s.node.text_content for s in source_nodes],
+                [s.score for s in source_nodes],
+            )
+            for source_nodes in source_nodes_list
+        ]
+
+    def close(self) -> None:
+        """Stop accepting connections and serving requests."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._listener is not None:
+            # wake up the listener thread blocked on `accept`
+            try:
+                Client(self._listener.address, authkey=self._authkey).close()
+            except Exception:
+                pass
+            self._listener.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _accept(self) -> None:
+        listener: Listener = self._listener  # type: ignore[assignment]
+        while not self._closed.is_set():
+            try:
+                conn = listener.accept()
+            except Exception:
+                # listener closed, or a client failed to authenticate
+                continue
+            if self._closed.is_set():
+                conn.close()
+                return
+            threading.Thread(
+                target=self._serve,
+                args=(conn,),
+                name="fed-rag-retrieval-connection",
+                daemon=True,
+            ).start()
+
+    def _serve(self, conn: Connection) -> None:
+        with conn:
+            while not self._closed.is_set():
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    future = self._executor.submit(  # type: ignore[union-attr]
+                        self._handle, op, payload
+                    )
+                    response = (True, future.result())
+                except Exception as e:
+                    response = (False, f"{e.__class__.__name__}: {e}")
+                try:
+                    conn.send(response)
+                except (EOFError, OSError):
+                    return
+
+    def _handle(self, op: str, payload: Any) -> Any:
+        if op == _RETRIEVE:
+            return self.retrieve(payload)
+        if op == _SCORE:
+            prompts, targets = payload
+            with torch.no_grad():
+                log_probas = self.rag_system.generator.batch_compute_target_sequence_log_proba(
+                    prompts=prompts, targets=targets
+                )
+            return log_probas.detach().cpu()
+        raise RetrievalServiceError(f"Unknown request '{op}'.")
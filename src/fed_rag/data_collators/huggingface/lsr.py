@@ -4,11 +4,12 @@ from typing import Any, Callable
 
 import torch
 from pydantic import Field, PrivateAttr
+from torch.nn.utils.rnn import pad_sequence
 from typing_extensions import override
 
 from fed_rag import RAGSystem
 from fed_rag.base.data_collator import BaseDataCollator
-from fed_rag.exceptions import MissingExtraError
+from fed_rag.exceptions import DataCollatorError, MissingExtraError
 from fed_rag.exceptions.core import FedRAGError
 from fed_rag.utils.huggingface import _validate_rag_system
 
@@ -104,7 +105,12 @@ class DataCollatorForLSR(
     SentenceTransformerDataCollator,
     _DataCollatorForLSRAttributes,
 ):
-    """A HuggingFace DataCollator for LM-Supervised Retrieval."""
+    """A HuggingFace DataCollator for LM-Supervised Retrieval.
+
+    With a `retrieval_client`, both retrieval and the scoring of responses
+    by the generator run in the `RetrievalService` of the training process,
+    so that the collator can run in DataLoader worker processes.
+    """
 
     def __init__(
         self,
@@ -146,12 +152,19 @@ class DataCollatorForLSR(
 
         Args:
             features (list[Any]): Should contain a 'query' and 'reponse' field.
+                If the features also contain the columns added by
+                `precompute_retrievals`, these are used instead of retrieving.
             return_tensors (_type_, optional): supports right now only 'pt'
 
         Returns:
             dict[str, Any]: a dictionary of ~torch.Tensors with keys 'retrieval_scores'
-                and 'lm_scores'
+                and 'lm_scores', the latter being log-likelihoods of the responses,
+                as well as the 'query_texts' and retrieved 'context_texts' used
+                to recompute differentiable retrieval scores.
             Note that each ('query', 'response') pair generates one fine-tuning instance for LSR.
+            If queries retrieved different numbers of contexts, scores are
+            right-padded with zeros and 'num_contexts' holds the number of
+            contexts of every query.
         """
         return_tensors = (
             return_tensors if return_tensors else self.default_return_tensors
@@ -161,38 +174,61 @@ class DataCollatorForLSR(
 
         # use rag system to get scores
         batch_retriever_scores = []
-        batch_lm_scores = []
-        for example in features:
+        query_texts = []
+        context_texts = []
+        prompts = []
+        targets = []
+        num_contexts = []
+        retrieved = self.get_retrieved_contexts(features)
+        for example, (contexts, scores) in zip(features, retrieved):
             query = example.get("query")
             response = example.get("response")
-
-            # retriever scores - this should participate in gradient computation
-            source_nodes = self.rag_system.retrieve(query)
-            retriever_scores = torch.tensor(
-                [n.score for n in source_nodes], requires_grad=True
-            )
-
-            # lm supervised scores - we don't want these to participate in gradient computation
-            lm_scores = []
-            with torch.no_grad():
-                for chunk in source_nodes:
-                    prompt = self.prompt_template.format(
-                        query=query,
-                        context=chunk.node.get_content()["text_content"],
-                    )
-                    target = self.target_template.format(response=response)
-                    lm_score = self.rag_system.generator.compute_target_sequence_proba(
-                        prompt=prompt, target=target
-                    )
-                    lm_scores.append(lm_score)
-                lm_scores = torch.stack(lm_scores, dim=0)
-
-            # append to batch
+            if not contexts:
+                raise DataCollatorError(
+                    f"No contexts were retrieved for query '{query}'."
+                )
+
+            # retriever scores of the knowledge store - these are detached, so
+            # `LSRSentenceTransformerTrainer` recomputes them with the live
+            # encoder from the query and context texts
+            retriever_scores = torch.tensor(scores, requires_grad=True)
             batch_retriever_scores.append(retriever_scores)
-            batch_lm_scores.append(lm_scores)
-
-        # create torch.Tensors
-        retrieval_scores = torch.stack(batch_retriever_scores, dim=0)
-        lm_scores = torch.stack(batch_lm_scores, dim=0)
+            query_texts.append(str(query))
+            context_texts.append([context or "" for context in contexts])
+
+            target = self.target_template.format(response=response)
+            for context in contexts:
+                prompts.append(
+                    self.prompt_template.format(query=query, context=context)
+                )
+                targets.append(target)
+            num_contexts.append(len(contexts))
+
+        # lm supervised scores - we don't want these to participate in gradient computation
+        # all (prompt, target) pairs of the batch are scored together, so that
+        # the generator can batch their forward passes
+        scorer = (
+            self.retrieval_client
+            if self.retrieval_client is not None
+            else self.rag_system.generator
+        )
+        with torch.no_grad():
+            log_probas = scorer.batch_compute_target_sequence_log_proba(
+                prompts=prompts, targets=targets
+            )
+            # keep log-probabilities, as likelihoods of long targets underflow
+            batch_lm_scores = log_probas.split(num_contexts)
 
-        return {"retrieval_scores": retrieval_scores, "lm_scores": lm_scores}
+        # create torch.Tensors, padding queries with fewer contexts
+        retrieval_scores = pad_sequence(
+            batch_retriever_scores, batch_first=True
+        )
+        lm_scores = pad_sequence(list(batch_lm_scores), batch_first=True)
+
+        return {
+            "retrieval_scores": retrieval_scores,
+            "lm_scores": lm_scores,
+            "query_texts": query_texts,
+            "context_texts": context_texts,
+            "num_contexts": num_contexts,
+        }
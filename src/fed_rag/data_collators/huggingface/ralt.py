@@ -1,12 +1,14 @@
 """HuggingFace Data Collator For Retrieval-Augmented Generator Training"""
 
-from typing import TYPE_CHECKING, Any
+import itertools
+from typing import TYPE_CHECKING, Any, cast
 
 import torch
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 
 from fed_rag import NoEncodeRAGSystem, RAGSystem
 from fed_rag.base.data_collator import BaseDataCollator
+from fed_rag.base.tokenizer import BaseTokenizer
 from fed_rag.exceptions import DataCollatorError, MissingExtraError
 from fed_rag.utils.huggingface import _validate_rag_system
 
@@ -54,12 +56,24 @@ ignore it and use your parametric knowledge to answer the question.
 
 
 class DataCollatorForRALT(DataCollatorMixin, BaseDataCollator):
-    """A HuggingFace DataCollator for LM-Supervised Retrieval."""
+    """A HuggingFace DataCollator for LM-Supervised Retrieval.
+
+    With a `retrieval_client`, the collator can run in DataLoader worker
+    processes, where it only tokenizes and pads, while retrieval runs in the
+    `RetrievalService` of the training process.
+
+    Setting `pad_to_multiple_of` (e.g., to 8) pads batches to lengths that
+    suit tensor cores, and `max_seq_length` truncates the tokenized
+    fine-tuning texts.
+    """
 
     example_template: str = Field(default=DEFAULT_EXAMPLE_TEMPLATE)
     default_return_tensors: str = Field(default="pt")
     model_dtype: torch.dtype | None = None
+    pad_to_multiple_of: int | None = Field(default=None, gt=0)
+    max_seq_length: int | None = Field(default=None, gt=0)
     rag_system: RAGSystem | NoEncodeRAGSystem
+    _tokenizer: BaseTokenizer | None = PrivateAttr(default=None)
 
     def __init__(
         self,
@@ -91,6 +105,8 @@ class DataCollatorForRALT(DataCollatorMixin, BaseDataCollator):
             model_dtype=model_dtype,
             **kwargs,
         )
+        # kept apart from the rag system, which isn't pickled to workers
+        self._tokenizer = rag_system.generator.tokenizer
 
     def _apply_padding(
         self,
@@ -99,16 +115,12 @@ class DataCollatorForRALT(DataCollatorMixin, BaseDataCollator):
         attention_mask_list: list[list[int]],
         tokenizer: "PreTrainedTokenizer",
     ) -> dict[str, torch.Tensor]:
-        """Applys left padding for causal lm modelling."""
+        """Applys left padding for causal lm modelling.
 
-        # First convert lists to tensors if not already
-        input_ids_tensors = [torch.tensor(ids) for ids in inputs_list]
-        attention_mask_tensors = [
-            torch.tensor(mask) for mask in attention_mask_list
-        ]
-        labels_tensors = [
-            torch.tensor(ids) for ids in inputs_list
-        ]  # Labels are the same as input_ids for causal LM
+        The batch is written into pre-allocated `(batch_size, max_length)`
+        tensors, with `max_length` rounded up to a multiple of
+        `pad_to_multiple_of` if set.
+        """
 
         # Get pad token ID
         if tokenizer.pad_token is not None:
@@ -126,48 +138,47 @@ class DataCollatorForRALT(DataCollatorMixin, BaseDataCollator):
                     "nor an eos token that can potentially be used in its place."
                 )
 
-        # Create padded tensors
-        padded_input_ids = []
-        padded_attention_mask = []
-        padded_labels = []
-
-        for input_ids, attention_mask, labels in zip(
-            input_ids_tensors, attention_mask_tensors, labels_tensors
-        ):
-            # Calculate padding needed
-            pad_len = max_length - len(input_ids)
-
-            if pad_len > 0:
-                # Create padding tensors
-                padding = torch.full(
-                    (pad_len,), pad_token_id, dtype=input_ids.dtype
-                )
-                mask_padding = torch.zeros(pad_len, dtype=attention_mask.dtype)
-                label_padding = torch.full(
-                    (pad_len,), -100, dtype=labels.dtype
-                )  # -100 to ignore in loss calculation
-
-                # Apply left padding
-                padded_input = torch.cat([padding, input_ids])
-                padded_mask = torch.cat([mask_padding, attention_mask])
-                padded_label = torch.cat([label_padding, labels])
-            else:
-                # No padding needed
-                padded_input = input_ids
-                padded_mask = attention_mask
-                padded_label = labels
+        seq_lengths = [len(ids) for ids in inputs_list]
+        max_length = max([max_length, *seq_lengths])
+        if self.pad_to_multiple_of:
+            max_length = -(-max_length // self.pad_to_multiple_of) * (
+                self.pad_to_multiple_of
+            )
 
-            padded_input_ids.append(padded_input)
-            padded_attention_mask.append(padded_mask)
-            padded_labels.append(padded_label)
+        batch_size = len(inputs_list)
+        input_ids = torch.full(
+            (batch_size, max_length), pad_token_id, dtype=torch.long
+        )
+        attention_mask = torch.zeros(
+            (batch_size, max_length), dtype=self.model_dtype
+        )
+        # -100 to ignore in loss calculation
+        labels = torch.full((batch_size, max_length), -100, dtype=torch.long)
+
+        # left padding: the tokens of every row fill its last positions
+        lengths = torch.tensor(seq_lengths, dtype=torch.long)
+        rows = torch.repeat_interleave(torch.arange(batch_size), lengths)
+        offsets = torch.cumsum(lengths, dim=0) - lengths
+        cols = (
+            torch.arange(rows.numel())
+            - offsets[rows]
+            + (max_length - lengths)[rows]
+        )
+        flat_input_ids = torch.tensor(
+            list(itertools.chain.from_iterable(inputs_list)), dtype=torch.long
+        )
+        input_ids[rows, cols] = flat_input_ids
+        # Labels are the same as input_ids for causal LM
+        labels[rows, cols] = flat_input_ids
+        attention_mask[rows, cols] = torch.tensor(
+            list(itertools.chain.from_iterable(attention_mask_list)),
+            dtype=attention_mask.dtype,
+        )
 
-        # Stack into batch tensors
         return {
-            "input_ids": torch.stack(padded_input_ids).long(),
-            "attention_mask": torch.stack(padded_attention_mask).to(
-                self.model_dtype
-            ),
-            "labels": torch.stack(padded_labels).long(),
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "labels": labels,
         }
 
     def __call__(
@@ -178,11 +189,14 @@ class DataCollatorForRALT(DataCollatorMixin, BaseDataCollator):
         Steps:
             1. process the features using the RAG system and example template to create
                the retrieval-augmented lm fine-tuning text
-            2. apply padding and get required ~torch.Tensors
+            2. tokenize all texts with a single `batch_encode` call
+            3. apply padding and get required ~torch.Tensors
 
 
         Args:
             features (list[Any]): Should contain a 'query' and 'response' field.
+                If the features also contain the columns added by
+                `precompute_retrievals`, these are used instead of retrieving.
             return_tensors (_type_, optional): supports right now only 'pt'
 
         Returns:
@@ -202,38 +216,43 @@ class DataCollatorForRALT(DataCollatorMixin, BaseDataCollator):
 
         # STEP 1 — use rag system to build the RALT fine-tuning texts
         finetuning_instances = []
-        inputs_list = []
-        attention_mask_list = []
-        max_length = 0
-        for example in features:
-            # retrieve
-            source_nodes = self.rag_system.retrieve(query=example["query"])
-            total_sum_scores = sum(s.score for s in source_nodes)
+        tokenizer = cast(BaseTokenizer, self._tokenizer)
+        # retrieve, unless retrievals were precomputed
+        retrieved = self.get_retrieved_contexts(features)
+        for example, (contexts, scores) in zip(features, retrieved):
+            total_sum_scores = sum(scores)
 
             # parallel in-context retrieval-augmentation creates
             # top_k separated finetuning instances
-            for source in source_nodes:
+            for context, score in zip(contexts, scores):
                 finetune_instance_text = self.example_template.format(
                     query=example["query"],
                     response=example["response"],
-                    context=source.node.get_content()["text_content"],
+                    context=context,
                 )
                 finetuning_instances.append(finetune_instance_text)
-                _weight = source.score / total_sum_scores
-
-                # tokenize to get input_ids and target_ids
-                tokenizer = self.rag_system.generator.tokenizer
-
-                encode_result = tokenizer.encode(finetune_instance_text)
-                input_ids = encode_result["input_ids"]
-                attention_mask = encode_result["attention_mask"]
-
-                current_input_len = len(input_ids)
-                if current_input_len > max_length:
-                    max_length = current_input_len
+                _weight = score / total_sum_scores
 
-                inputs_list.append(input_ids)
-                attention_mask_list.append(attention_mask)
+        # STEP 2 — tokenize all fine-tuning texts in one batched call
+        encode_kwargs = (
+            {"truncation": True, "max_length": self.max_seq_length}
+            if self.max_seq_length is not None
+            else {}
+        )
+        encode_results = tokenizer.batch_encode(
+            finetuning_instances, **encode_kwargs
+        )
+        inputs_list = [r["input_ids"] for r in encode_results]
+        # tokenizers may not return a mask, in which case all tokens attend
+        attention_mask_list = [
+            (
+                r["attention_mask"]
+                if r["attention_mask"] is not None
+                else [1] * len(r["input_ids"])
+            )
+            for r in encode_results
+        ]
+        max_length = max((len(ids) for ids in inputs_list), default=0)
 
         # padding — apply left padding
         padded_features = self._apply_padding(
@@ -12,7 +12,16 @@ from .evals import (
     BenchmarkResult,
 )
 from .knowledge_node import KnowledgeNode, NodeContent, NodeType
-from .rag import Context, Prompt, Query, RAGConfig, RAGResponse, SourceNode
+from .rag import (
+    AsyncStreamingRAGResponse,
+    Context,
+    Prompt,
+    Query,
+    RAGConfig,
+    RAGResponse,
+    SourceNode,
+    StreamingRAGResponse,
+)
 from .results import TestResult, TrainResult
 
 __all__ = [
@@ -34,6 +43,8 @@ __all__ = [
     # rag
     "RAGConfig",
     "RAGResponse",
+    "StreamingRAGResponse",
+    "AsyncStreamingRAGResponse",
     "SourceNode",
     "Query",
     "Context",
@@ -1,19 +1,36 @@
 """Knowledge Node"""
 
+import base64
+import io
 import json
 import uuid
 from enum import Enum
-from typing import Any, TypedDict, cast
+from typing import TYPE_CHECKING, Any, Generator, TypedDict, cast
 
+import numpy as np
+import torch
+from PIL import Image
 from pydantic import (
     BaseModel,
     ConfigDict,
     Field,
+    PrivateAttr,
+    SerializationInfo,
+    SerializerFunctionWrapHandler,
     ValidationInfo,
     field_serializer,
     field_validator,
+    model_serializer,
 )
 
+from fed_rag.exceptions.blob_store import MissingBlobStoreError
+
+if TYPE_CHECKING:  # pragma: no cover
+    from fed_rag.base.blob_store import BaseBlobStore
+
+# dtype of array embeddings serialized without a dtype tag
+EMBEDDING_SERIALIZATION_DTYPE = np.dtype("<f4")
+
 
 class NodeContent(TypedDict):
     text_content: str | None
@@ -29,11 +46,12 @@ class NodeType(str, Enum):
 class KnowledgeNode(BaseModel):
     model_config = ConfigDict(
         # ensures that validation is performed for defaulted None values
-        validate_default=True
+        validate_default=True,
+        arbitrary_types_allowed=True,
     )
     node_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    embedding: list[float] | None = Field(
-        description="Encoded representation of node. If multimodal type, then this is shared embedding between image and text.",
+    embedding: list[float] | np.ndarray | None = Field(
+        description="Encoded representation of node. If multimodal type, then this is shared embedding between image and text. Torch tensors are stored as numpy arrays.",
         default=None,
     )
     node_type: NodeType = Field(description="Type of node.")
@@ -41,6 +59,10 @@ class KnowledgeNode(BaseModel):
         description="Text content. Used for TEXT and potentially MULTIMODAL node types.",
         default=None,
     )
+    image_ref: str | None = Field(
+        description="Reference to image content stored out-of-line in a blob store.",
+        default=None,
+    )
     image_content: bytes | None = Field(
         description="Image content as binary data (decoded from base64)",
         default=None,
@@ -48,8 +70,38 @@ class KnowledgeNode(BaseModel):
     metadata: dict = Field(
         description="Metadata for node.", default_factory=dict
     )
+    # raw JSON metadata of nodes built with `from_serialized`, decoded on first access
+    _metadata_json: str | None = PrivateAttr(default=None)
+    _blob_store: "BaseBlobStore | None" = PrivateAttr(default=None)
 
     # validators
+    @field_validator("embedding", mode="before")
+    @classmethod
+    def validate_embedding(cls, value: Any) -> Any:
+        """Keep array embeddings as numpy arrays.
+
+        Torch tensors are converted to numpy arrays (without copying for CPU
+        tensors) and "<dtype>:<base64>" strings produced by JSON serialization
+        are decoded into writable arrays of the recorded dtype. Lists are kept
+        as is.
+        """
+        if isinstance(value, torch.Tensor):
+            return value.detach().cpu().numpy()
+        if isinstance(value, str):
+            dtype_str, _, payload = value.rpartition(":")
+            dtype = (
+                np.dtype(dtype_str)
+                if dtype_str
+                else EMBEDDING_SERIALIZATION_DTYPE
+            )
+            if dtype.kind != "f":
+                raise ValueError(
+                    f"Serialized embedding has non-float dtype '{dtype_str}'."
+                )
+            # arrays backed by the decoded bytes are read-only
+            return np.frombuffer(base64.b64decode(payload), dtype=dtype).copy()
+        return value
+
     @field_validator("text_content", mode="before")
     @classmethod
     def validate_text_content(
@@ -87,14 +139,16 @@ class KnowledgeNode(BaseModel):
         """
         node_type = info.data.get("node_type")
         node_type = cast(NodeType, node_type)
+        # image content may instead be held out-of-line in a blob store
+        has_image = value is not None or info.data.get("image_ref") is not None
         if node_type == NodeType.IMAGE:
-            if value is None:
+            if not has_image:
                 raise ValueError(
                     "NodeType == 'image', but image_content is None."
                 )
 
         if node_type == NodeType.MULTIMODAL:
-            if value is None:
+            if not has_image:
                 raise ValueError(
                     "NodeType == 'multimodal', but image_content is None."
                 )
@@ -102,13 +156,92 @@ class KnowledgeNode(BaseModel):
         return value
 
     def get_content(self) -> NodeContent:
-        """Return dict of node content."""
+        """Return dict of node content.
+
+        Image content held in a blob store is loaded from it.
+        """
         content: NodeContent = {
-            "image_content": self.image_content,
+            "image_content": self.get_image_content(),
             "text_content": self.text_content,
         }
         return content
 
+    def get_image_content(self) -> bytes | None:
+        """Return the image content, loading it from the blob store if needed.
+
+        Raises:
+            MissingBlobStoreError: If the image is held out-of-line but no
+                blob store is attached to the node.
+        """
+        if self.image_content is not None or self.image_ref is None:
+            return self.image_content
+        return self._get_blob_store().get(self.image_ref)
+
+    def get_image(self) -> Image.Image | None:
+        """Return the image content decoded as a PIL image.
+
+        Images held in a blob store are decoded through its LRU cache.
+        """
+        if self.image_content is None and self.image_ref is not None:
+            return self._get_blob_store().get_image(self.image_ref)
+        if self.image_content is None:
+            return None
+        image = Image.open(io.BytesIO(self.image_content))
+        image.load()
+        return image
+
+    def attach_blob_store(self, blob_store: "BaseBlobStore") -> None:
+        """Attach the blob store from which to load out-of-line content."""
+        self._blob_store = blob_store
+
+    def offload_image(self, blob_store: "BaseBlobStore") -> None:
+        """Move inline image content to a blob store, keeping a reference.
+
+        Args:
+            blob_store (BaseBlobStore): The blob store to move the image to.
+        """
+        if self.image_content is not None:
+            self.image_ref = blob_store.put(self.image_content)
+            self.image_content = None
+        self.attach_blob_store(blob_store)
+
+    def _get_blob_store(self) -> "BaseBlobStore":
+        if self._blob_store is None:
+            raise MissingBlobStoreError(
+                f"Node '{self.node_id}' references image '{self.image_ref}' "
+                "but has no blob store attached."
+            )
+        return self._blob_store
+
+    @field_serializer("embedding", when_used="json")
+    def serialize_embedding(
+        self, embedding: list[float] | np.ndarray | None
+    ) -> list[float] | str | None:
+        """
+        Custom JSON serializer for the embedding field.
+
+        Array embeddings are serialized as the base64 encoding of their raw
+        little-endian bytes, prefixed with their dtype (e.g., "<f8:..."),
+        rather than as a list of numbers. Float arrays keep their precision,
+        other arrays are serialized as float32.
+
+        Args:
+            embedding: Embedding to serialize.
+
+        Returns:
+            The embedding as a tagged base64 string if it is an array, as is
+            otherwise.
+        """
+        if isinstance(embedding, np.ndarray):
+            dtype = (
+                embedding.dtype.newbyteorder("<")
+                if embedding.dtype.kind == "f"
+                else EMBEDDING_SERIALIZATION_DTYPE
+            )
+            raw = np.ascontiguousarray(embedding, dtype=dtype).tobytes()
+            return f"{dtype.str}:{base64.b64encode(raw).decode('ascii')}"
+        return embedding
+
     @field_serializer("metadata")
     def serialize_metadata(
         self, metadata: dict[Any, Any] | None
@@ -151,6 +284,113 @@ class KnowledgeNode(BaseModel):
             return {}
         return metadata
 
+    @classmethod
+    def from_serialized(cls, data: dict[str, Any]) -> "KnowledgeNode":
+        """Fast path for constructing a node from trusted serialized data.
+
+        Intended for bulk paths such as loading a persisted knowledge store or
+        decoding knowledge store query results, where `data` was produced by
+        `model_dump()` of a valid node. Field validators are skipped and only
+        the conversions that `model_dump()` applies are reverted.
+
+        Metadata given as a JSON string is kept as is and only decoded on
+        first access of `metadata`. Serializing a node whose metadata was
+        never accessed re-emits the original string without decoding it.
+
+        Args:
+            data: The serialized node, e.g. a row of a persisted knowledge
+                store or a Qdrant payload.
+
+        Returns:
+            KnowledgeNode: The (unvalidated) node.
+        """
+        fields = dict(data)
+        embedding = fields.get("embedding")
+        if isinstance(embedding, (str, torch.Tensor)):
+            fields["embedding"] = cls.validate_embedding(embedding)
+        metadata_json = fields.pop("metadata", None)
+        if not isinstance(metadata_json, str):
+            fields["metadata"] = metadata_json or {}
+        image_content = fields.get("image_content")
+        if isinstance(image_content, str):
+            fields["image_content"] = image_content.encode()
+        fields["node_type"] = NodeType(fields["node_type"])
+
+        node = cls.model_construct(**fields)
+        if isinstance(metadata_json, str):
+            # defer decoding to `__getattr__`
+            del node.__dict__["metadata"]
+            node._metadata_json = metadata_json
+        return node
+
+    if not TYPE_CHECKING:
+
+        def __getattr__(self, item: str) -> Any:
+            if item == "metadata":
+                private = self.__pydantic_private__ or {}
+                metadata_json = private.get("_metadata_json")
+                if metadata_json is not None:
+                    metadata = json.loads(metadata_json)
+                    self.__dict__["metadata"] = metadata
+                    private["_metadata_json"] = None
+                    return metadata
+            return super().__getattr__(item)
+
+    def _materialize_metadata(self) -> None:
+        if "metadata" not in self.__dict__:
+            getattr(self, "metadata")
+
+    def __repr_args__(self) -> Any:
+        self._materialize_metadata()
+        return super().__repr_args__()
+
+    def __iter__(self) -> Generator[tuple[str, Any], None, None]:
+        # `BaseModel.__iter__` yields from `__dict__`
+        self._materialize_metadata()
+        yield from super().__iter__()
+
+    @model_serializer(mode="wrap")
+    def _serialize_lazy_metadata(
+        self, handler: SerializerFunctionWrapHandler, info: SerializationInfo
+    ) -> dict[str, Any]:
+        """Emit still-encoded metadata without decoding it."""
+        data = handler(self)
+        if "metadata" not in self.__dict__:
+            included = info.include is None or "metadata" in info.include
+            excluded = info.exclude is not None and "metadata" in info.exclude
+            if included and not excluded:
+                private = self.__pydantic_private__ or {}
+                data["metadata"] = private.get("_metadata_json")
+        return data  # type: ignore[no-any-return]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, KnowledgeNode):
+            return NotImplemented
+        # materialize lazily decoded metadata before comparing
+        self._materialize_metadata()
+        other._materialize_metadata()
+        # compare array embeddings by value
+        if isinstance(self.embedding, np.ndarray) or isinstance(
+            other.embedding, np.ndarray
+        ):
+            if self.embedding is None or other.embedding is None:
+                if self.embedding is not other.embedding:
+                    return False
+            elif not np.array_equal(
+                np.asarray(self.embedding), np.asarray(other.embedding)
+            ):
+                return False
+        elif self.embedding != other.embedding:
+            return False
+        # private attributes (e.g., an attached blob store) are not compared
+        self_fields = {
+            k: v for k, v in self.__dict__.items() if k != "embedding"
+        }
+        other_fields = {
+            k: v for k, v in other.__dict__.items() if k != "embedding"
+        }
+        return self_fields == other_fields
+
     def model_dump_without_embeddings(self) -> dict[str, Any]:
         """Serialize the node without the embedding."""
         return self.model_dump(exclude={"embedding"})
@@ -1,9 +1,9 @@
 """Auxiliary types for RAG System"""
 
-from typing import Any
+from typing import Any, AsyncIterator, Iterator
 
 from PIL import Image
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 from .knowledge_node import KnowledgeNode
 
@@ -28,9 +28,67 @@ class RAGResponse(BaseModel):
         return self.response
 
 
+class StreamingRAGResponse(BaseModel):
+    """Response class returned by streaming queries to RAG systems.
+
+    The source nodes are available as soon as retrieval is done, while the
+    response is generated lazily, chunk by chunk, as `response_gen` is
+    consumed.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    response_gen: Iterator[str]
+    source_nodes: list[SourceNode]
+
+    def get_response(self) -> RAGResponse:
+        """Consume the remaining chunks into a `RAGResponse`."""
+        return RAGResponse(
+            response="".join(self.response_gen),
+            source_nodes=self.source_nodes,
+        )
+
+
+class AsyncStreamingRAGResponse(BaseModel):
+    """Response class returned by streaming queries to async RAG systems.
+
+    Same as `StreamingRAGResponse`, except that `response_gen` is an async
+    iterator.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    response_gen: AsyncIterator[str]
+    source_nodes: list[SourceNode]
+
+    async def get_response(self) -> RAGResponse:
+        """Consume the remaining chunks into a `RAGResponse`."""
+        return RAGResponse(
+            response="".join([chunk async for chunk in self.response_gen]),
+            source_nodes=self.source_nodes,
+        )
+
+
 class RAGConfig(BaseModel):
+    """Configuration of a RAG system.
+
+    Attributes:
+        top_k: Number of nodes to retrieve per query.
+        context_separator: Separator used to join retrieved contexts.
+        query_cache_size: Maximum number of query embeddings to cache. Set
+            to 0 (default) to disable the query-embedding cache.
+        query_cache_ttl: Optional time-to-live of cached query embeddings,
+            in seconds.
+        retrieval_cache_size: Maximum number of retrieval results to cache.
+            Set to 0 (default) to disable the retrieval result cache.
+        retrieval_cache_ttl: Optional time-to-live of cached retrieval
+            results, in seconds.
+    """
+
     top_k: int
     context_separator: str = "\n"
+    query_cache_size: int = Field(default=0, ge=0)
+    query_cache_ttl: float | None = Field(default=None, gt=0)
+    retrieval_cache_size: int = Field(default=0, ge=0)
+    retrieval_cache_ttl: float | None = Field(default=None, gt=0)
 
 
 class _MultiModalDataContainer(BaseModel):
@@ -1,3 +1,9 @@
+from .blob_store import (
+    BlobNotFoundError,
+    BlobStoreError,
+    InvalidBlobReferenceError,
+    MissingBlobStoreError,
+)
 from .bridge import (
     BridgeError,
     IncompatibleVersionError,
@@ -20,6 +26,12 @@ from .fl_tasks import (
     NetTypeMismatch,
 )
 from .generator import GeneratorError, GeneratorWarning
+from .ingestion import (
+    IngestionError,
+    IngestionWarning,
+    InvalidCheckpointError,
+    UnsupportedFileFormatError,
+)
 from .inspectors import (
     InspectorError,
     InspectorWarning,
@@ -39,8 +51,14 @@ from .knowledge_stores import (
     KnowledgeStoreWarning,
     LoadNodeError,
     MCPKnowledgeStoreError,
+    ReindexError,
+)
+from .rag_system import (
+    RAGSystemError,
+    RAGSystemWarning,
+    RetrievalServiceError,
+    SchedulerClosedError,
 )
-from .rag_system import RAGSystemError, RAGSystemWarning
 from .retriever import RetrieverError, RetrieverWarning
 from .tokenizer import TokenizerError, TokenizerWarning
 from .trainer import (
@@ -64,6 +82,11 @@ __all__ = [
     # common
     "MissingExtraError",
     "DataCollatorError",
+    # blob stores
+    "BlobStoreError",
+    "BlobNotFoundError",
+    "InvalidBlobReferenceError",
+    "MissingBlobStoreError",
     # bridges
     "BridgeError",
     "IncompatibleVersionError",
@@ -82,6 +105,11 @@ __all__ = [
     # generators
     "GeneratorError",
     "GeneratorWarning",
+    # ingestion
+    "IngestionError",
+    "IngestionWarning",
+    "InvalidCheckpointError",
+    "UnsupportedFileFormatError",
     # inspectors
     "InspectorError",
     "InspectorWarning",
@@ -99,10 +127,13 @@ __all__ = [
     "InvalidDistanceError",
     "LoadNodeError",
     "MCPKnowledgeStoreError",
+    "ReindexError",
     "CallToolResultConversionError",
     # rag system
     "RAGSystemError",
     "RAGSystemWarning",
+    "RetrievalServiceError",
+    "SchedulerClosedError",
     # rag trainer manager
     "RAGTrainerManagerError",
     "UnspecifiedGeneratorTrainer",
@@ -0,0 +1,27 @@
+"""Exceptions for Blob Stores."""
+
+from .core import FedRAGError
+
+
+class BlobStoreError(FedRAGError):
+    """Base blob store error for all blob-store-related exceptions."""
+
+    pass
+
+
+class BlobNotFoundError(BlobStoreError, FileNotFoundError):
+    """Raised if a blob can not be found in the blob store."""
+
+    pass
+
+
+class InvalidBlobReferenceError(BlobStoreError):
+    """Raised if a blob reference is malformed."""
+
+    pass
+
+
+class MissingBlobStoreError(BlobStoreError):
+    """Raised if out-of-line content is accessed without an attached blob store."""
+
+    pass
@@ -0,0 +1,27 @@
+"""Exceptions for Ingestion."""
+
+from .core import FedRAGError, FedRAGWarning
+
+
+class IngestionError(FedRAGError):
+    """Base ingestion error for all ingestion-related exceptions."""
+
+    pass
+
+
+class IngestionWarning(FedRAGWarning):
+    """Base ingestion warning for all ingestion-related warnings."""
+
+    pass
+
+
+class UnsupportedFileFormatError(IngestionError):
+    """Raised if an ingestion source file has an unsupported format."""
+
+    pass
+
+
+class InvalidCheckpointError(IngestionError):
+    """Raised if an ingestion checkpoint is incompatible with the pipeline."""
+
+    pass
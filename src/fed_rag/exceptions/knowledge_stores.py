@@ -33,6 +33,12 @@ class LoadNodeError(KnowledgeStoreError):
     pass
 
 
+class ReindexError(KnowledgeStoreError):
+    """Raised if an error occurs when re-indexing a knowledge store."""
+
+    pass
+
+
 class MCPKnowledgeStoreError(KnowledgeStoreError):
     """Base knowledge store error for all knowledge-store-related exceptions."""
 
@@ -13,3 +13,9 @@ class InvalidReductionParam(LossError):
     """Raised if an invalid aggregation mode is provided."""
 
     pass
+
+
+class InvalidTemperatureParam(LossError):
+    """Raised if a non-positive temperature is provided."""
+
+    pass
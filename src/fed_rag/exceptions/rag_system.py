@@ -13,3 +13,15 @@ class RAGSystemWarning(FedRAGWarning):
     """Base inspector warning for all generator-related warnings."""
 
     pass
+
+
+class SchedulerClosedError(RAGSystemError):
+    """Raised when querying a batch scheduler that has been closed."""
+
+    pass
+
+
+class RetrievalServiceError(RAGSystemError):
+    """Raised when a retrieval service request fails."""
+
+    pass
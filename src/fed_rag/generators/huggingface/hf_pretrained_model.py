@@ -1,6 +1,6 @@
 """HuggingFace PretrainedModel Generator"""
 
-from typing import TYPE_CHECKING, Any, Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 from pydantic import ConfigDict, Field, PrivateAttr, model_validator
 
@@ -10,8 +10,10 @@ if TYPE_CHECKING:  # pragma: no cover
 
 from fed_rag.base.generator import DEFAULT_PROMPT_TEMPLATE, BaseGenerator
 from fed_rag.tokenizers.hf_pretrained_tokenizer import HFPretrainedTokenizer
+from fed_rag.utils.batching import PaddingStats
 
 from .mixin import HuggingFaceGeneratorMixin
+from .prefix_cache import PromptPrefixCache
 from .utils import check_huggingface_installed
 
 
@@ -27,6 +29,28 @@ class HFPretrainedModelGenerator(HuggingFaceGeneratorMixin, BaseGenerator):
         description="Optional kwargs dict for loading models from HF. Defaults to None.",
         default_factory=dict,
     )
+    max_batch_size: int | None = Field(
+        description="Maximum number of prompts generated together. Larger batches are split into sub-batches of prompts of similar length. Defaults to None (no limit).",
+        default=None,
+        gt=0,
+    )
+    max_padding_ratio: float | None = Field(
+        description="Maximum fraction of padding tokens in a sub-batch of prompts. Defaults to None (no limit).",
+        default=None,
+        ge=0,
+        le=1,
+    )
+    padding_stats_callback: Callable[[PaddingStats], None] | None = Field(
+        description="Optional callback receiving the `PaddingStats` of every generated sub-batch. Defaults to None.",
+        default=None,
+    )
+    use_prefix_cache: bool = Field(
+        description="Whether to cache the past key values of the prompt template's static prefix and reuse them for single-prompt generation. Defaults to False.",
+        default=False,
+    )
+    _prefix_cache: PromptPrefixCache = PrivateAttr(
+        default_factory=PromptPrefixCache
+    )
     _prompt_template: str = PrivateAttr(default=DEFAULT_PROMPT_TEMPLATE)
     _model: Optional["PreTrainedModel"] = PrivateAttr(default=None)
     _tokenizer: HFPretrainedTokenizer | None = PrivateAttr(default=None)
@@ -38,6 +62,10 @@ class HFPretrainedModelGenerator(HuggingFaceGeneratorMixin, BaseGenerator):
         prompt_template: str | None = None,
         load_model_kwargs: dict | None = None,
         load_model_at_init: bool = True,
+        max_batch_size: int | None = None,
+        max_padding_ratio: float | None = None,
+        padding_stats_callback: Callable[[PaddingStats], None] | None = None,
+        use_prefix_cache: bool = False,
     ):
         # if reaches here, then passed checks for extra
         from transformers.generation.utils import GenerationConfig
@@ -47,6 +75,10 @@ class HFPretrainedModelGenerator(HuggingFaceGeneratorMixin, BaseGenerator):
             model_name=model_name,
             generation_config=generation_config,
             load_model_kwargs=load_model_kwargs or {},
+            max_batch_size=max_batch_size,
+            max_padding_ratio=max_padding_ratio,
+            padding_stats_callback=padding_stats_callback,
+            use_prefix_cache=use_prefix_cache,
         )
         self._tokenizer = HFPretrainedTokenizer(
             model_name=model_name, load_model_at_init=load_model_at_init
@@ -1,9 +1,19 @@
 """HuggingFace Generator Mixin."""
 
-from typing import TYPE_CHECKING, Any, Protocol, Union, runtime_checkable
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterator,
+    Protocol,
+    Union,
+    runtime_checkable,
+)
 
 import torch
 import torch.nn.functional as F
+from typing_extensions import Self
 
 if TYPE_CHECKING:  # pragma: no cover
     from peft import PeftModel
@@ -13,6 +23,9 @@ if TYPE_CHECKING:  # pragma: no cover
 from fed_rag.data_structures import Context, Prompt, Query
 from fed_rag.exceptions.generator import GeneratorError
 from fed_rag.tokenizers.hf_pretrained_tokenizer import HFPretrainedTokenizer
+from fed_rag.utils.batching import PaddingStats, length_buckets
+
+from .prefix_cache import PromptPrefixCache, template_prefix
 
 
 @runtime_checkable
@@ -21,39 +34,185 @@ class HFGeneratorProtocol(Protocol):
     tokenizer: HFPretrainedTokenizer
     model: Union["PreTrainedModel", "PeftModel"]
     generation_config: "GenerationConfig"
+    max_batch_size: int | None
+    max_padding_ratio: float | None
+    padding_stats_callback: Callable[[PaddingStats], None] | None
+    use_prefix_cache: bool
+    _prefix_cache: PromptPrefixCache
 
     def complete(
         self, prompt: str | list[str] | Prompt | list[Prompt], **kwargs: Any
     ) -> str | list[str]:
         pass  # pragma: no cover
 
+    def stream_complete(
+        self, prompt: str | Prompt, **kwargs: Any
+    ) -> Iterator[str]:
+        pass  # pragma: no cover
+
+    def _generate_batch(
+        self, input_ids: list[list[int]], **kwargs: Any
+    ) -> list[str]:
+        pass  # pragma: no cover
+
+    def _prefix_cache_kwargs(
+        self, input_ids: list[list[int]]
+    ) -> dict[str, Any]:
+        pass  # pragma: no cover
+
+    def compute_target_sequence_log_proba(
+        self, prompt: str | Prompt, target: str
+    ) -> torch.Tensor:
+        pass  # pragma: no cover
+
+    def batch_compute_target_sequence_log_proba(
+        self, prompts: list[str] | list[Prompt], targets: list[str]
+    ) -> torch.Tensor:
+        pass  # pragma: no cover
+
+    def _score_batch(
+        self, sequences: list[list[int]], target_starts: list[int]
+    ) -> torch.Tensor:
+        pass  # pragma: no cover
+
+
+def _get_pad_token_id(tokenizer: Any) -> int:
+    """Pad token id of `tokenizer`, falling back to its eos token id."""
+    if tokenizer.pad_token_id is not None:
+        return int(tokenizer.pad_token_id)
+    if tokenizer.eos_token_id is not None:
+        return int(tokenizer.eos_token_id)
+    return 0
+
+
+def _left_pad(
+    input_ids: list[list[int]], pad_token_id: int
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """Left-pad encoded sequences into `input_ids` and `attention_mask`.
+
+    Decoder-only models continue generating from the last position of every
+    row, so padding must go on the left.
+    """
+    max_length = max(len(ids) for ids in input_ids)
+    padded = torch.full(
+        (len(input_ids), max_length), pad_token_id, dtype=torch.long
+    )
+    attention_mask = torch.zeros(
+        (len(input_ids), max_length), dtype=torch.long
+    )
+    for row, ids in enumerate(input_ids):
+        if ids:
+            padded[row, -len(ids) :] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, -len(ids) :] = 1
+    return padded, attention_mask
+
+
+def _common_prefix_length(sequences: list[list[int]]) -> int:
+    """Number of leading tokens shared by all `sequences`."""
+    length = 0
+    for tokens in zip(*sequences):
+        if any(token != tokens[0] for token in tokens[1:]):
+            break
+        length += 1
+    return length
+
+
+def _stop_event_criteria(stop_event: threading.Event) -> Any:
+    """Build a stopping criteria that ends generation once the event is set."""
+    # if reaches here, then the huggingface extra is installed
+    from transformers import StoppingCriteria
+
+    class _StopEventCriteria(StoppingCriteria):
+        def __call__(
+            self,
+            input_ids: torch.LongTensor,
+            scores: torch.FloatTensor,
+            **kwargs: Any,
+        ) -> torch.BoolTensor:
+            return torch.full(  # type: ignore[return-value]
+                (input_ids.shape[0],),
+                stop_event.is_set(),
+                dtype=torch.bool,
+                device=input_ids.device,
+            )
+
+    return _StopEventCriteria()
+
 
 class HuggingFaceGeneratorMixin:
+    def with_padding_stats_callback(
+        self, callback: Callable[[PaddingStats], None] | None
+    ) -> Self:
+        """Setter for padding_stats_callback.
+
+        For convenience and users who prefer the fluent style.
+        """
+        self.padding_stats_callback = callback
+        return self
+
     # complete
     def complete(
         self: HFGeneratorProtocol,
         prompt: str | list[str] | Prompt | list[Prompt],
         **kwargs: Any,
     ) -> str | list[str]:
-        # convert to str | list[str]
-        prompt = (
+        """Implements complete method.
+
+        Prompts are sorted by tokenized length and generated in left-padded
+        buckets of at most `max_batch_size` prompts and at most
+        `max_padding_ratio` padding, so that each bucket pads as little as
+        possible. Outputs are returned in the order of the prompts. The
+        `PaddingStats` of every bucket are passed to `padding_stats_callback`.
+        """
+        # convert to list[str]
+        prompts = (
             [str(p) for p in prompt]
             if isinstance(prompt, list)
-            else str(prompt)
+            else [str(prompt)]
         )
 
-        # encode query
-        tokenizer_result = self.tokenizer.unwrapped(
-            prompt, return_tensors="pt"
+        # encode prompts, without padding
+        input_ids: list[list[int]] = self.tokenizer.unwrapped(
+            prompts
+        ).input_ids
+
+        # generate by buckets of prompts with similar lengths
+        buckets = length_buckets(
+            [len(ids) for ids in input_ids],
+            max_batch_size=self.max_batch_size,
+            max_padding_ratio=self.max_padding_ratio,
         )
-        inputs: torch.Tensor = tokenizer_result.input_ids
-        inputs = inputs.to(self.model.device)
+        outputs: list[str] = [""] * len(prompts)
+        for bucket in buckets:
+            bucket_outputs = self._generate_batch(
+                [input_ids[ix] for ix in bucket], **kwargs
+            )
+            for ix, output in zip(bucket, bucket_outputs):
+                outputs[ix] = output
+
+        return outputs if len(outputs) > 1 else outputs[0]
+
+    def _generate_batch(
+        self: HFGeneratorProtocol, input_ids: list[list[int]], **kwargs: Any
+    ) -> list[str]:
+        """Generate from a batch of (unpadded) encoded prompts."""
+        tokenizer = self.tokenizer.unwrapped
+        pad_token_id = _get_pad_token_id(tokenizer)
+        inputs, attention_mask = _left_pad(input_ids, pad_token_id)
+        if self.generation_config.pad_token_id is None:
+            kwargs.setdefault("pad_token_id", pad_token_id)
+        if self.padding_stats_callback is not None:
+            self.padding_stats_callback(
+                PaddingStats.from_lengths([len(ids) for ids in input_ids])
+            )
+        kwargs = {**self._prefix_cache_kwargs(input_ids), **kwargs}
 
         # generate
         generated_ids = self.model.generate(
-            inputs=inputs,
+            inputs=inputs.to(self.model.device),
+            attention_mask=attention_mask.to(self.model.device),
             generation_config=self.generation_config,
-            tokenizer=self.tokenizer.unwrapped,
+            tokenizer=tokenizer,
             **kwargs,
         )
 
@@ -61,10 +220,94 @@ class HuggingFaceGeneratorMixin:
         generated_ids = generated_ids[:, inputs.shape[-1] :]
 
         # decode tokens
-        outputs: list[str] = self.tokenizer.unwrapped.batch_decode(
+        outputs: list[str] = tokenizer.batch_decode(
             generated_ids, skip_special_tokens=True
         )
-        return outputs if len(outputs) > 1 else outputs[0]
+        return outputs
+
+    def _prefix_cache_kwargs(
+        self: HFGeneratorProtocol, input_ids: list[list[int]]
+    ) -> dict[str, Any]:
+        """Generation kwargs reusing the prompt template's prefix cache.
+
+        NOTE: only used for single-prompt generation, as the prompts of a
+        left-padded batch don't share the positions of their prefix.
+        """
+        if not self.use_prefix_cache or len(input_ids) != 1:
+            return {}
+        past_key_values = self._prefix_cache.get(
+            self.model,
+            self.tokenizer.unwrapped,
+            template_prefix(self.prompt_template),
+            input_ids[0],
+        )
+        if past_key_values is None:
+            return {}
+        return {"past_key_values": past_key_values}
+
+    def stream_complete(
+        self: HFGeneratorProtocol,
+        prompt: str | Prompt,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """Stream the completion of a prompt as text chunks.
+
+        Generation runs on a background thread and decoded text is yielded
+        through a `TextIteratorStreamer` as soon as it is available. Closing
+        the iterator early stops generation.
+        """
+        # if reaches here, then the huggingface extra is installed
+        from transformers import StoppingCriteriaList, TextIteratorStreamer
+
+        tokenizer = self.tokenizer.unwrapped
+        pad_token_id = _get_pad_token_id(tokenizer)
+        input_ids: list[int] = tokenizer(str(prompt)).input_ids
+        inputs, attention_mask = _left_pad([input_ids], pad_token_id)
+        if self.generation_config.pad_token_id is None:
+            kwargs.setdefault("pad_token_id", pad_token_id)
+        kwargs = {**self._prefix_cache_kwargs([input_ids]), **kwargs}
+
+        streamer = TextIteratorStreamer(
+            tokenizer,  # type: ignore[arg-type]
+            skip_prompt=True,
+            skip_special_tokens=True,
+        )
+        stop_event = threading.Event()
+        stopping_criteria = StoppingCriteriaList(
+            kwargs.pop("stopping_criteria", None) or []
+        )
+        stopping_criteria.append(_stop_event_criteria(stop_event))
+        errors: list[BaseException] = []
+
+        def _generate() -> None:
+            try:
+                self.model.generate(  # type: ignore[operator]
+                    inputs=inputs.to(self.model.device),
+                    attention_mask=attention_mask.to(self.model.device),
+                    generation_config=self.generation_config,
+                    tokenizer=tokenizer,
+                    streamer=streamer,
+                    stopping_criteria=stopping_criteria,
+                    **kwargs,
+                )
+            except BaseException as e:
+                errors.append(e)
+                streamer.end()
+
+        thread = threading.Thread(
+            target=_generate, name="fed-rag-stream", daemon=True
+        )
+        thread.start()
+        try:
+            for text in streamer:
+                if text:
+                    yield text
+        finally:
+            stop_event.set()
+            thread.join()
+
+        if errors:
+            raise errors[0]
 
     # generate
     def generate(
@@ -97,6 +340,18 @@ class HuggingFaceGeneratorMixin:
         ]
         return self.complete(prompt=formatted_queries, **kwargs)
 
+    def stream_generate(
+        self: HFGeneratorProtocol,
+        query: str | Query,
+        context: str | Context,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """Stream the output generated from a query and context."""
+        prompt = self.prompt_template.format(
+            query=str(query), context=str(context)
+        )
+        return self.stream_complete(prompt=prompt, **kwargs)
+
     def compute_target_sequence_proba(
         self: HFGeneratorProtocol, prompt: str | Prompt, target: str
     ) -> torch.Tensor:
@@ -111,40 +366,147 @@ class HuggingFaceGeneratorMixin:
             proba (torch.Tensor): The probability of target sequence given a prompt.
                 i.e., P_{LLM}(target | prompt)
         """
-        if isinstance(prompt, Prompt):
+        return torch.exp(
+            self.compute_target_sequence_log_proba(prompt, target)
+        )
+
+    def compute_target_sequence_log_proba(
+        self: HFGeneratorProtocol, prompt: str | Prompt, target: str
+    ) -> torch.Tensor:
+        """Computes the target sequence log-probability given the prompt.
+
+        Args:
+            prompt (str | Prompt): The input i.e. conditional prompt sequence
+            target (str): The target sequence
+
+        Returns:
+            log_proba (torch.Tensor): The log-probability of target sequence
+                given a prompt. i.e., log P_{LLM}(target | prompt)
+        """
+        return self.batch_compute_target_sequence_log_proba(
+            prompts=[str(prompt)], targets=[target]
+        )[0]
+
+    def batch_compute_target_sequence_log_proba(
+        self: HFGeneratorProtocol,
+        prompts: list[str] | list[Prompt],
+        targets: list[str],
+    ) -> torch.Tensor:
+        """Computes the target sequence log-probabilities of a batch of pairs.
+
+        Pairs are sorted by tokenized length and scored in right-padded
+        buckets of at most `max_batch_size` pairs and at most
+        `max_padding_ratio` padding, with a single forward pass, `log_softmax`
+        and `gather` of the log-probabilities of the target tokens per bucket.
+
+        Args:
+            prompts (list[str] | list[Prompt]): The conditional prompt sequences.
+            targets (list[str]): The target sequences, one per prompt.
+
+        Returns:
+            log_probas (torch.Tensor): 1D tensor of the log-probabilities of
+                each target sequence given its prompt.
+                i.e., log P_{LLM}(target | prompt)
+        """
+        if len(prompts) != len(targets):
+            raise GeneratorError(
+                "There should be one target for every prompt."
+            )
+        if not prompts:
+            return torch.empty(0)
+
+        sequences: list[list[int]] = []
+        target_starts: list[int] = []
+        for prompt, target in zip(prompts, targets):
             prompt = str(prompt)
-        input_text = prompt + target
-        encode_result = self.tokenizer.encode(input_text)
-        input_ids = encode_result["input_ids"]
-
-        # Get the token IDs for just the target portion
-        prompt_only_encode_result = self.tokenizer.encode(prompt)
-        target_start_idx = len(prompt_only_encode_result["input_ids"])
-        target_ids = input_ids[target_start_idx:]
-
-        # Create tensor and send to the device where the model resides
-        input_ids_tensor = (
-            torch.tensor(input_ids).unsqueeze(0).to(self.model.device)
+            sequences.append(
+                self.tokenizer.encode(prompt + target)["input_ids"]
+            )
+            target_starts.append(
+                len(self.tokenizer.encode(prompt)["input_ids"])
+            )
+
+        # score by buckets of sequences with similar lengths
+        buckets = length_buckets(
+            [len(ids) for ids in sequences],
+            max_batch_size=self.max_batch_size,
+            max_padding_ratio=self.max_padding_ratio,
         )
+        log_probas = torch.zeros(len(sequences))
+        for bucket in buckets:
+            log_probas[bucket] = self._score_batch(
+                [sequences[ix] for ix in bucket],
+                [target_starts[ix] for ix in bucket],
+            ).cpu()
+        return log_probas
+
+    def _score_batch(
+        self: HFGeneratorProtocol,
+        sequences: list[list[int]],
+        target_starts: list[int],
+    ) -> torch.Tensor:
+        """Sum the log-probabilities of the target tokens of a batch.
 
-        # Get the logits from the model
+        If `use_prefix_cache` is set, the tokens shared by all sequences
+        (e.g., the instruction prefix of the prompt template) go through the
+        model once and their past key values are shared by all rows, so that
+        the padded forward pass only runs on the rest of the sequences.
+        """
+        # the first token has no preceding token to be predicted from
+        target_starts = [max(start, 1) for start in target_starts]
+
+        # logits predicting the first target token must be computed, so the
+        # shared prefix stops before it
+        prefix_length = 0
+        if self.use_prefix_cache and len(sequences) > 1:
+            prefix_length = min(
+                _common_prefix_length(sequences), min(target_starts) - 1
+            )
+        prefix_ids = sequences[0][:prefix_length]
+        sequences = [ids[prefix_length:] for ids in sequences]
+        target_starts = [start - prefix_length for start in target_starts]
+
+        # right-pad sequences, so that positions are unaffected by padding
+        max_length = max(len(ids) for ids in sequences)
+        input_ids = torch.zeros((len(sequences), max_length), dtype=torch.long)
+        attention_mask = torch.zeros_like(input_ids)
+        target_mask = torch.zeros_like(input_ids, dtype=torch.bool)
+        for row, (ids, target_start) in enumerate(
+            zip(sequences, target_starts)
+        ):
+            input_ids[row, : len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, : len(ids)] = 1
+            target_mask[row, target_start : len(ids)] = True
+
+        device = self.model.device
+        kwargs: dict[str, Any] = {}
         with torch.no_grad():
-            outputs = self.model(input_ids_tensor)
+            if prefix_ids:
+                past_key_values = PromptPrefixCache.compute(
+                    self.model, prefix_ids
+                )
+                past_key_values.batch_repeat_interleave(len(sequences))
+                attention_mask = torch.cat(
+                    [
+                        torch.ones(
+                            (len(sequences), prefix_length), dtype=torch.long
+                        ),
+                        attention_mask,
+                    ],
+                    dim=-1,
+                )
+                kwargs["past_key_values"] = past_key_values
+            outputs = self.model(
+                input_ids=input_ids.to(device),
+                attention_mask=attention_mask.to(device),
+                **kwargs,
+            )
             logits = outputs.logits
 
-        # Calculate probability of each target token given the previous tokens
-        log_probs = []
-        for i, target_id in enumerate(target_ids):
-            # get log prob of next target token in the sequence
-            next_token_pos = target_start_idx + i
-            next_token_logits = logits[0, next_token_pos, :]
-            probs = F.softmax(next_token_logits, dim=-1)
-            log_prob = torch.log(probs[target_id]).item()
-            log_probs.append(log_prob)
-
-        # Sum log probabilities to get sequence log probability
-        sequence_log_prob = sum(log_probs)
-        # Convert to probability
-        sequence_prob = torch.exp(torch.tensor(sequence_log_prob))
-
-        return sequence_prob
+        # logits at position i predict the token at position i + 1
+        log_probs = F.log_softmax(logits[:, :-1, :].float(), dim=-1)
+        token_log_probs = log_probs.gather(
+            -1, input_ids[:, 1:].unsqueeze(-1).to(device)
+        ).squeeze(-1)
+        token_log_probs = token_log_probs * target_mask[:, 1:].to(device)
+        return token_log_probs.sum(dim=-1)
@@ -0,0 +1,110 @@
+"""Prompt Prefix KV Cache"""
+
+import copy
+import string
+import threading
+from typing import TYPE_CHECKING, Any
+
+import torch
+
+from fed_rag.utils.cache import parameters_fingerprint
+
+if TYPE_CHECKING:  # pragma: no cover
+    from transformers import PreTrainedTokenizer
+
+
+def template_prefix(template: str) -> str:
+    """Return the static text of `template` before its first placeholder."""
+    for literal_text, field_name, _, _ in string.Formatter().parse(template):
+        return literal_text if field_name is not None else template
+    return ""
+
+
+class PromptPrefixCache:
+    """Cache of the past key values of a static prompt prefix.
+
+    Prompts formatted from the same template share the template's static
+    prefix (e.g., the system preamble of `DEFAULT_PROMPT_TEMPLATE`). The past
+    key values of the prefix are computed once and every generation starts
+    from a copy of them, so that prefill only runs on the rest of the prompt.
+
+    The cache is tied to the prefix, the tokenizer and the identity and
+    weights of the model (see `parameters_fingerprint`), and is recomputed
+    as soon as any of these change.
+    """
+
+    def __init__(self) -> None:
+        self._prefix_key: tuple | None = None
+        self._prefix_ids: list[int] = []
+        self._model_key: tuple | None = None
+        self._past_key_values: Any = None
+        self._lock = threading.Lock()
+
+    def prefix_ids(
+        self, tokenizer: "PreTrainedTokenizer", prefix: str
+    ) -> list[int]:
+        """Token ids of `prefix`, tokenized once per tokenizer and prefix."""
+        key = (id(tokenizer), prefix)
+        with self._lock:
+            if key != self._prefix_key:
+                self._prefix_ids = list(tokenizer(prefix).input_ids)
+                self._prefix_key = key
+                self._model_key = None
+            return self._prefix_ids
+
+    def get(
+        self,
+        model: torch.nn.Module,
+        tokenizer: "PreTrainedTokenizer",
+        prefix: str,
+        input_ids: list[int],
+    ) -> Any | None:
+        """Get a copy of the past key values of `prefix` for a prompt.
+
+        Args:
+            model (torch.nn.Module): The model to compute past key values with.
+            tokenizer (PreTrainedTokenizer): The tokenizer of the model.
+            prefix (str): The static prompt prefix.
+            input_ids (list[int]): The token ids of the prompt.
+
+        Returns:
+            Any | None: The past key values, to be passed to `generate` along
+                with the full `input_ids`, or `None` if the prompt does not
+                start with the tokens of `prefix`.
+        """
+        prefix_ids = self.prefix_ids(tokenizer, prefix)
+        if not (
+            0 < len(prefix_ids) < len(input_ids)
+            and input_ids[: len(prefix_ids)] == prefix_ids
+        ):
+            # prompt does not start with the prefix's tokens, e.g., if the
+            # tokenizer merges tokens across the end of the prefix
+            return None
+
+        model_key = (tuple(prefix_ids),) + parameters_fingerprint(model)
+        with self._lock:
+            if model_key != self._model_key:
+                self._past_key_values = self.compute(model, prefix_ids)
+                self._model_key = model_key
+            return copy.deepcopy(self._past_key_values)
+
+    @staticmethod
+    def compute(model: torch.nn.Module, prefix_ids: list[int]) -> Any:
+        """Compute the past key values of `prefix_ids`, without caching."""
+        # if reaches here, then the huggingface extra is installed
+        from transformers import DynamicCache
+
+        device = getattr(model, "device", None)
+        with torch.no_grad():
+            outputs = model(
+                input_ids=torch.tensor([prefix_ids], device=device),
+                past_key_values=DynamicCache(),
+                use_cache=True,
+            )
+        return outputs.past_key_values
+
+    def clear(self) -> None:
+        """Drop the cached past key values."""
+        with self._lock:
+            self._model_key = None
+            self._past_key_values = None
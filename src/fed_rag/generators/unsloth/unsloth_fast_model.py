@@ -1,6 +1,6 @@
 """Unsloth FastModel Generator"""
 
-from typing import TYPE_CHECKING, Any, Optional, Union
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
 
 from pydantic import ConfigDict, Field, PrivateAttr, model_validator
 from typing_extensions import Self
@@ -15,7 +15,9 @@ from fed_rag.exceptions import GeneratorError
 from fed_rag.tokenizers.unsloth_pretrained_tokenizer import (
     UnslothPretrainedTokenizer,
 )
+from fed_rag.utils.batching import PaddingStats
 
+from ..huggingface.prefix_cache import PromptPrefixCache
 from .mixin import UnslothGeneratorMixin
 from .utils import check_unsloth_installed
 
@@ -60,6 +62,28 @@ class UnslothFastModelGenerator(UnslothGeneratorMixin, BaseGenerator):
         description="Optional kwargs dict for loading ~unsloth.FastModel.from_pretrained(). Defaults to None.",
         default_factory=dict,
     )
+    max_batch_size: int | None = Field(
+        description="Maximum number of prompts generated together. Larger batches are split into sub-batches of prompts of similar length. Defaults to None (no limit).",
+        default=None,
+        gt=0,
+    )
+    max_padding_ratio: float | None = Field(
+        description="Maximum fraction of padding tokens in a sub-batch of prompts. Defaults to None (no limit).",
+        default=None,
+        ge=0,
+        le=1,
+    )
+    padding_stats_callback: Callable[[PaddingStats], None] | None = Field(
+        description="Optional callback receiving the `PaddingStats` of every generated sub-batch. Defaults to None.",
+        default=None,
+    )
+    use_prefix_cache: bool = Field(
+        description="Whether to cache the past key values of the prompt template's static prefix and reuse them for single-prompt generation. Defaults to False.",
+        default=False,
+    )
+    _prefix_cache: PromptPrefixCache = PrivateAttr(
+        default_factory=PromptPrefixCache
+    )
     _prompt_template: str = PrivateAttr(default=DEFAULT_PROMPT_TEMPLATE)
     _model: Optional[Union["PreTrainedModel", "PeftModel"]] = PrivateAttr(
         default=None
@@ -73,6 +97,10 @@ class UnslothFastModelGenerator(UnslothGeneratorMixin, BaseGenerator):
         prompt_template: str | None = None,
         load_model_kwargs: dict | None = None,
         load_model_at_init: bool = True,
+        max_batch_size: int | None = None,
+        max_padding_ratio: float | None = None,
+        padding_stats_callback: Callable[[PaddingStats], None] | None = None,
+        use_prefix_cache: bool = False,
     ):
         # if reaches here, then passed checks for extra
         from transformers.generation.utils import GenerationConfig
@@ -84,6 +112,10 @@ class UnslothFastModelGenerator(UnslothGeneratorMixin, BaseGenerator):
             model_name=model_name,
             generation_config=generation_config,
             load_model_kwargs=load_model_kwargs if load_model_kwargs else {},
+            max_batch_size=max_batch_size,
+            max_padding_ratio=max_padding_ratio,
+            padding_stats_callback=padding_stats_callback,
+            use_prefix_cache=use_prefix_cache,
         )
         self._prompt_template = (
             prompt_template if prompt_template else DEFAULT_PROMPT_TEMPLATE
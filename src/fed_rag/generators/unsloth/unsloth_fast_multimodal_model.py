@@ -198,6 +198,16 @@ class UnslothFastMultimodalModelGenerator(
         prompt: Prompt | str,
         target: str,
         **kwargs: Any,
+    ) -> torch.Tensor:
+        return torch.exp(
+            self.compute_target_sequence_log_proba(prompt, target, **kwargs)
+        )
+
+    def compute_target_sequence_log_proba(
+        self,
+        prompt: Prompt | str,
+        target: str,
+        **kwargs: Any,
     ) -> torch.Tensor:
         q = self.to_query(prompt)
         base_text = getattr(q, "text", "") or ""
@@ -257,7 +267,7 @@ class UnslothFastMultimodalModelGenerator(
             F.log_softmax(target_logits[i], dim=-1)[tid].item()
             for i, tid in enumerate(target_ids)
         ]
-        return torch.exp(torch.tensor(sum(log_probs)))
+        return torch.tensor(sum(log_probs))
 
     @property
     def model(self) -> "FastModel":
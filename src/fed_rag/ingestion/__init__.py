@@ -0,0 +1,18 @@
+"""Ingestion pipelines for building knowledge stores from raw documents."""
+
+from .checkpoint import BatchManifestEntry, IngestionCheckpoint
+from .dedup import ContentHashSet, content_hash
+from .pipeline import IngestionPipeline, IngestionResult
+from .readers import stream_file, stream_jsonl, stream_parquet
+
+__all__ = [
+    "BatchManifestEntry",
+    "ContentHashSet",
+    "IngestionCheckpoint",
+    "IngestionPipeline",
+    "IngestionResult",
+    "content_hash",
+    "stream_file",
+    "stream_jsonl",
+    "stream_parquet",
+]
@@ -0,0 +1,137 @@
+"""Checkpoint manifests for resumable ingestion."""
+
+import os
+from pathlib import Path
+
+from pydantic import BaseModel
+from typing_extensions import Self
+
+from fed_rag.exceptions.ingestion import InvalidCheckpointError
+from fed_rag.ingestion.dedup import HASH_DTYPE, ContentHashSet, append_hashes
+
+BATCHES_SUFFIX = ".batches.jsonl"
+HASHES_SUFFIX = ".hashes"
+
+
+class BatchManifestEntry(BaseModel):
+    """Record of a single batch written to the knowledge store.
+
+    Attributes:
+        batch_index: Position of the batch within the ingestion job.
+        start_offset: Offset of the first source record covered by the batch.
+        end_offset: Offset one past the last source record covered by the batch.
+        num_nodes: Number of nodes written to the knowledge store.
+        num_duplicates: Number of source records skipped as duplicates.
+    """
+
+    batch_index: int
+    start_offset: int
+    end_offset: int
+    num_nodes: int
+    num_duplicates: int = 0
+
+
+class IngestionCheckpoint(BaseModel):
+    """Progress of an ingestion job, persisted after every uploaded batch.
+
+    A checkpoint at `path` is made up of three files:
+
+    - `path`: this summary, atomically replaced on every commit;
+    - `path` + ".batches.jsonl": an append-only log of `BatchManifestEntry`;
+    - `path` + ".hashes": an append-only array of 64-bit content hashes of
+        every ingested `text_content`.
+
+    The summary is written last, so it is the source of truth: log entries
+    beyond `batches_completed` and hashes beyond `num_hashes` are leftovers
+    of an interrupted commit and are discarded on load.
+
+    Attributes:
+        batches_completed: Number of batches written to the knowledge store.
+        records_consumed: Number of source records covered by those batches.
+        num_hashes: Number of committed content hashes.
+    """
+
+    batches_completed: int = 0
+    records_consumed: int = 0
+    num_hashes: int = 0
+
+    @classmethod
+    def load(cls, path: str | Path) -> Self:
+        """Load a checkpoint summary from a JSON file."""
+        try:
+            return cls.model_validate_json(Path(path).read_text())
+        except ValueError as e:
+            raise InvalidCheckpointError(
+                f"Unable to parse ingestion checkpoint at {path}: {str(e)}"
+            ) from e
+
+    def save(self, path: str | Path) -> None:
+        """Atomically write the checkpoint summary to a JSON file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(self.model_dump_json())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def read_batches(path: str | Path) -> list[BatchManifestEntry]:
+        """Read the batch log of the checkpoint at `path`."""
+        batches_path = Path(str(path) + BATCHES_SUFFIX)
+        if not batches_path.exists():
+            return []
+        with open(batches_path) as f:
+            return [
+                BatchManifestEntry.model_validate_json(line)
+                for line in f
+                if line.strip()
+            ]
+
+    def load_hashes(self, path: str | Path) -> ContentHashSet:
+        """Load the committed content hashes of the checkpoint at `path`."""
+        hashes_path = Path(str(path) + HASHES_SUFFIX)
+        if not hashes_path.exists():
+            if self.num_hashes:
+                raise InvalidCheckpointError(
+                    f"Content hashes for checkpoint at {path} not found at "
+                    f"expected location: {hashes_path}"
+                )
+            return ContentHashSet()
+        return ContentHashSet.from_file(hashes_path, count=self.num_hashes)
+
+    def repair(self, path: str | Path) -> None:
+        """Discard batch log entries and hashes of an interrupted commit."""
+        hashes_path = Path(str(path) + HASHES_SUFFIX)
+        if hashes_path.exists():
+            committed_size = self.num_hashes * HASH_DTYPE.itemsize
+            if hashes_path.stat().st_size > committed_size:
+                os.truncate(hashes_path, committed_size)
+
+        batches = self.read_batches(path)
+        if len(batches) > self.batches_completed:
+            batches_path = Path(str(path) + BATCHES_SUFFIX)
+            with open(batches_path, "w") as f:
+                for entry in batches[: self.batches_completed]:
+                    f.write(entry.model_dump_json() + "\n")
+
+    def commit(
+        self,
+        path: str | Path,
+        entry: BatchManifestEntry,
+        hashes: list[int],
+    ) -> None:
+        """Record a batch that has been written to the knowledge store.
+
+        Args:
+            path (str | Path): Path of the checkpoint summary.
+            entry (BatchManifestEntry): The batch to record.
+            hashes (list[int]): The content hashes of the batch's nodes.
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        append_hashes(str(path) + HASHES_SUFFIX, hashes)
+        with open(str(path) + BATCHES_SUFFIX, "a") as f:
+            f.write(entry.model_dump_json() + "\n")
+
+        self.batches_completed = entry.batch_index + 1
+        self.records_consumed = entry.end_offset
+        self.num_hashes += len(hashes)
+        self.save(path)
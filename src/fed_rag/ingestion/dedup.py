@@ -0,0 +1,95 @@
+"""Content hashing for incremental, de-duplicated ingestion."""
+
+import hashlib
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+HASH_DTYPE = np.dtype("<u8")
+_MIN_PENDING_SIZE = 65_536
+_PENDING_FRACTION = 16
+
+
+def content_hash(text: str) -> int:
+    """Return a 64-bit content hash of `text`.
+
+    Uses an 8-byte blake2b digest, for which accidental collisions are
+    negligible even for corpora with billions of passages.
+    """
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class ContentHashSet:
+    """Compact set of 64-bit content hashes.
+
+    Hashes are stored in a sorted `uint64` array (8 bytes per entry) with
+    membership tested by binary search. Newly added hashes go to a small
+    pending set that is merged into the array once it grows past a fraction
+    of the array's size, which keeps insertion amortized linear.
+    """
+
+    def __init__(self, hashes: Iterable[int] | np.ndarray | None = None):
+        self._sorted = np.empty(0, dtype=HASH_DTYPE)
+        self._pending: set[int] = set()
+        if hashes is not None:
+            self._sorted = np.unique(np.asarray(hashes, dtype=HASH_DTYPE))
+
+    def __contains__(self, value: int) -> bool:
+        if value in self._pending:
+            return True
+        if self._sorted.size == 0:
+            return False
+        ix = int(np.searchsorted(self._sorted, np.uint64(value)))
+        return ix < self._sorted.size and int(self._sorted[ix]) == value
+
+    def __len__(self) -> int:
+        return int(self._sorted.size) + len(self._pending)
+
+    def add(self, value: int) -> None:
+        """Add a hash to the set."""
+        if value in self:
+            return
+        self._pending.add(value)
+        threshold = max(
+            _MIN_PENDING_SIZE, self._sorted.size // _PENDING_FRACTION
+        )
+        if len(self._pending) >= threshold:
+            self._merge()
+
+    def to_array(self) -> np.ndarray:
+        """Return the hashes as a sorted `uint64` array."""
+        self._merge()
+        return self._sorted
+
+    def _merge(self) -> None:
+        if self._pending:
+            pending = np.fromiter(
+                self._pending, dtype=HASH_DTYPE, count=len(self._pending)
+            )
+            self._sorted = np.union1d(self._sorted, pending)
+            self._pending = set()
+
+    @classmethod
+    def from_file(
+        cls, path: str | Path, count: int | None = None
+    ) -> "ContentHashSet":
+        """Load hashes from a raw little-endian `uint64` file.
+
+        Args:
+            path (str | Path): Path to the hashes file.
+            count (int | None): If provided, only the first `count` hashes
+                are loaded.
+        """
+        return cls(
+            np.fromfile(
+                path, dtype=HASH_DTYPE, count=-1 if count is None else count
+            )
+        )
+
+
+def append_hashes(path: str | Path, hashes: list[int]) -> None:
+    """Append hashes to a raw little-endian `uint64` file."""
+    with open(path, "ab") as f:
+        np.asarray(hashes, dtype=HASH_DTYPE).tofile(f)
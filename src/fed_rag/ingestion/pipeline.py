@@ -0,0 +1,292 @@
+"""Streaming ingestion pipeline."""
+
+import itertools
+from pathlib import Path
+from typing import Any, Iterable, Iterator, NamedTuple
+
+import torch
+from pydantic import BaseModel, ConfigDict, Field
+
+from fed_rag.base.knowledge_store import BaseKnowledgeStore
+from fed_rag.base.retriever import BaseRetriever
+from fed_rag.data_structures.knowledge_node import KnowledgeNode, NodeType
+from fed_rag.exceptions.ingestion import IngestionError
+from fed_rag.ingestion.checkpoint import (
+    BatchManifestEntry,
+    IngestionCheckpoint,
+)
+from fed_rag.ingestion.dedup import ContentHashSet, content_hash
+from fed_rag.ingestion.readers import stream_file
+from fed_rag.utils.concurrency import threaded_map
+from fed_rag.utils.embeddings import EmbeddingBatchLike
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_MAX_QUEUE_SIZE = 2
+
+
+class _RecordBatch(NamedTuple):
+    batch_index: int
+    start_offset: int
+    end_offset: int
+    records: list[dict[str, Any]]
+    texts: list[str]
+    hashes: list[int]
+    num_duplicates: int
+
+
+class _EncodedBatch(NamedTuple):
+    batch: _RecordBatch
+    embeddings: EmbeddingBatchLike
+
+
+class _NodeBatch(NamedTuple):
+    batch: _RecordBatch
+    nodes: list[KnowledgeNode]
+
+
+class IngestionResult(BaseModel):
+    """Summary of an ingestion run."""
+
+    num_batches: int = 0
+    num_nodes: int = 0
+    num_duplicates: int = 0
+    num_skipped_records: int = 0
+
+
+class IngestionPipeline(BaseModel):
+    """Streaming pipeline that ingests raw records into a knowledge store.
+
+    Records are read lazily and grouped into batches of `batch_size`. Each
+    batch is encoded with a single call to `retriever.encode_context`,
+    converted to `KnowledgeNode` objects and written to the knowledge store
+    with `load_nodes`. Reading, encoding, conversion and upload run in
+    separate threads connected by bounded queues, so at most
+    `max_queue_size` batches are buffered between any two stages.
+
+    Every text is hashed before encoding. With `deduplicate` enabled,
+    records whose text has already been ingested (in this run or, when
+    checkpointing, in a previous one) are skipped and never re-encoded.
+
+    If `checkpoint_path` is set, a manifest of the source offsets and
+    content hashes of every uploaded batch is recorded (see
+    `IngestionCheckpoint`), and a re-run over the same source resumes after
+    the last committed record.
+
+    Attributes:
+        retriever: The retriever used to encode the text of each record.
+        knowledge_store: The knowledge store to write nodes to.
+        batch_size: Number of records encoded and uploaded together.
+        text_key: The record field holding the text to encode.
+        text_template: Optional template formatted with the record's fields
+            to build the text to encode, e.g. "title: {title}\\ntext: {text}".
+            Takes precedence over `text_key`.
+        node_id_key: Optional record field to use as the node id. Stable ids
+            make re-ingesting the same source idempotent.
+        metadata_keys: Record fields stored as node metadata. If `None`, all
+            fields other than `text_key` and `node_id_key` are stored.
+        deduplicate: Whether to skip records whose text was already ingested.
+        max_queue_size: Maximum number of batches buffered between stages.
+        checkpoint_path: Optional path of the JSON checkpoint file.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    knowledge_store: BaseKnowledgeStore
+    batch_size: int = Field(default=DEFAULT_BATCH_SIZE, gt=0)
+    text_key: str = "text"
+    text_template: str | None = None
+    node_id_key: str | None = None
+    metadata_keys: list[str] | None = None
+    deduplicate: bool = True
+    max_queue_size: int = Field(default=DEFAULT_MAX_QUEUE_SIZE, gt=0)
+    checkpoint_path: str | None = None
+
+    def run(self, records: Iterable[dict[str, Any]]) -> IngestionResult:
+        """Ingest an iterable of records into the knowledge store.
+
+        Args:
+            records (Iterable[dict[str, Any]]): The source records. Can be a
+                lazy iterator; it is consumed one batch at a time.
+
+        Returns:
+            IngestionResult: Summary of the run.
+        """
+        checkpoint, seen = self._load_state()
+        result = IngestionResult(
+            num_skipped_records=checkpoint.records_consumed
+        )
+
+        batches = threaded_map(
+            lambda batch: batch,
+            self._iter_batches(records, checkpoint=checkpoint, seen=seen),
+            max_queue_size=self.max_queue_size,
+        )
+        encoded = threaded_map(
+            self._encode_batch, batches, max_queue_size=self.max_queue_size
+        )
+        converted = threaded_map(
+            self._convert_batch, encoded, max_queue_size=self.max_queue_size
+        )
+        try:
+            for node_batch in converted:
+                if node_batch.nodes:
+                    self.knowledge_store.load_nodes(node_batch.nodes)
+                self._commit(checkpoint, node_batch)
+
+                result.num_batches += 1
+                result.num_nodes += len(node_batch.nodes)
+                result.num_duplicates += node_batch.batch.num_duplicates
+        finally:
+            converted.close()
+
+        return result
+
+    def run_from_file(self, path: str | Path) -> IngestionResult:
+        """Ingest a JSONL or parquet file into the knowledge store.
+
+        Args:
+            path (str | Path): Path to the source file.
+
+        Returns:
+            IngestionResult: Summary of the run.
+        """
+        return self.run(stream_file(path))
+
+    def _load_state(self) -> tuple[IngestionCheckpoint, ContentHashSet]:
+        if self.checkpoint_path and Path(self.checkpoint_path).exists():
+            checkpoint = IngestionCheckpoint.load(self.checkpoint_path)
+            checkpoint.repair(self.checkpoint_path)
+            seen = (
+                checkpoint.load_hashes(self.checkpoint_path)
+                if self.deduplicate
+                else ContentHashSet()
+            )
+            return checkpoint, seen
+        return IngestionCheckpoint(), ContentHashSet()
+
+    def _commit(
+        self, checkpoint: IngestionCheckpoint, node_batch: _NodeBatch
+    ) -> None:
+        batch = node_batch.batch
+        entry = BatchManifestEntry(
+            batch_index=batch.batch_index,
+            start_offset=batch.start_offset,
+            end_offset=batch.end_offset,
+            num_nodes=len(node_batch.nodes),
+            num_duplicates=batch.num_duplicates,
+        )
+        if self.checkpoint_path:
+            checkpoint.commit(self.checkpoint_path, entry, batch.hashes)
+        else:
+            checkpoint.batches_completed = entry.batch_index + 1
+            checkpoint.records_consumed = entry.end_offset
+            checkpoint.num_hashes += len(batch.hashes)
+
+    def _iter_batches(
+        self,
+        records: Iterable[dict[str, Any]],
+        checkpoint: IngestionCheckpoint,
+        seen: ContentHashSet,
+    ) -> Iterator[_RecordBatch]:
+        """Group records into batches, skipping committed and duplicate ones."""
+        batch_index = checkpoint.batches_completed
+        start_offset = checkpoint.records_consumed
+        batch_records: list[dict[str, Any]] = []
+        texts: list[str] = []
+        hashes: list[int] = []
+        num_duplicates = 0
+
+        records = itertools.islice(records, start_offset, None)
+        for offset, record in enumerate(records, start=start_offset):
+            text = self._get_text(record)
+            text_hash = content_hash(text)
+            if self.deduplicate:
+                if text_hash in seen:
+                    num_duplicates += 1
+                    continue
+                seen.add(text_hash)
+            batch_records.append(record)
+            texts.append(text)
+            hashes.append(text_hash)
+
+            if len(batch_records) == self.batch_size:
+                yield _RecordBatch(
+                    batch_index=batch_index,
+                    start_offset=start_offset,
+                    end_offset=offset + 1,
+                    records=batch_records,
+                    texts=texts,
+                    hashes=hashes,
+                    num_duplicates=num_duplicates,
+                )
+                batch_index += 1
+                start_offset = offset + 1
+                batch_records, texts, hashes = [], [], []
+                num_duplicates = 0
+
+        if batch_records or num_duplicates:
+            yield _RecordBatch(
+                batch_index=batch_index,
+                start_offset=start_offset,
+                end_offset=start_offset + len(batch_records) + num_duplicates,
+                records=batch_records,
+                texts=texts,
+                hashes=hashes,
+                num_duplicates=num_duplicates,
+            )
+
+    def _get_text(self, record: dict[str, Any]) -> str:
+        try:
+            if self.text_template is not None:
+                return self.text_template.format(**record)
+            return str(record[self.text_key])
+        except KeyError as e:
+            raise IngestionError(
+                f"Record is missing required field {str(e)}."
+            ) from e
+
+    def _encode_batch(self, batch: _RecordBatch) -> _EncodedBatch:
+        if not batch.texts:
+            return _EncodedBatch(batch=batch, embeddings=[])
+
+        embeddings = self.retriever.encode_context(batch.texts)
+        if not isinstance(embeddings, torch.Tensor):
+            raise IngestionError(
+                "IngestionPipeline requires `encode_context` to return a "
+                "torch.Tensor."
+            )
+        if embeddings.dim() == 1:
+            embeddings = embeddings.unsqueeze(0)
+        if embeddings.shape[0] != len(batch.texts):
+            raise IngestionError(
+                f"Retriever returned {embeddings.shape[0]} embeddings for "
+                f"a batch of {len(batch.texts)} texts."
+            )
+        # nodes hold rows of the batch array, without boxing into floats
+        return _EncodedBatch(
+            batch=batch, embeddings=embeddings.detach().cpu().numpy()
+        )
+
+    def _get_metadata(self, record: dict[str, Any]) -> dict[str, Any]:
+        if self.metadata_keys is not None:
+            return {k: record[k] for k in self.metadata_keys if k in record}
+        excluded = {self.text_key, self.node_id_key}
+        return {k: v for k, v in record.items() if k not in excluded}
+
+    def _convert_batch(self, encoded: _EncodedBatch) -> _NodeBatch:
+        batch = encoded.batch
+        nodes = []
+        for record, text, embedding in zip(
+            batch.records, batch.texts, encoded.embeddings
+        ):
+            node_kwargs: dict[str, Any] = {
+                "embedding": embedding,
+                "node_type": NodeType.TEXT,
+                "text_content": text,
+                "metadata": self._get_metadata(record),
+            }
+            if self.node_id_key is not None:
+                node_kwargs["node_id"] = str(record[self.node_id_key])
+            nodes.append(KnowledgeNode(**node_kwargs))
+        return _NodeBatch(batch=batch, nodes=nodes)
@@ -0,0 +1,73 @@
+"""Streaming readers for ingestion sources."""
+
+import json
+from pathlib import Path
+from typing import Any, Iterator
+
+import pyarrow.parquet as pq
+
+from fed_rag.exceptions.ingestion import UnsupportedFileFormatError
+
+DEFAULT_READ_BATCH_SIZE = 1024
+
+JSONL_SUFFIXES = (".jsonl", ".jsonlines", ".ndjson")
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+
+def stream_jsonl(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Lazily read records from a JSONL file, one line at a time.
+
+    Args:
+        path (str | Path): Path to the JSONL file.
+
+    Yields:
+        dict[str, Any]: The parsed records. Blank lines are skipped.
+    """
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def stream_parquet(
+    path: str | Path, read_batch_size: int = DEFAULT_READ_BATCH_SIZE
+) -> Iterator[dict[str, Any]]:
+    """Lazily read records from a parquet file, one record batch at a time.
+
+    Only a single record batch of at most `read_batch_size` rows is
+    materialized in memory at any given time.
+
+    Args:
+        path (str | Path): Path to the parquet file.
+        read_batch_size (int): Number of rows to read per record batch.
+
+    Yields:
+        dict[str, Any]: The records as dictionaries keyed by column name.
+    """
+    parquet_file = pq.ParquetFile(path)
+    for record_batch in parquet_file.iter_batches(batch_size=read_batch_size):
+        yield from record_batch.to_pylist()
+
+
+def stream_file(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Lazily read records from a file, dispatching on its suffix.
+
+    Args:
+        path (str | Path): Path to a JSONL or parquet file.
+
+    Raises:
+        UnsupportedFileFormatError: If the file suffix is not supported.
+
+    Returns:
+        Iterator[dict[str, Any]]: The records of the file.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix in JSONL_SUFFIXES:
+        return stream_jsonl(path)
+    if suffix in PARQUET_SUFFIXES:
+        return stream_parquet(path)
+    raise UnsupportedFileFormatError(
+        f"Unsupported file format '{suffix}' for ingestion. Supported "
+        f"formats are: {', '.join(JSONL_SUFFIXES + PARQUET_SUFFIXES)}."
+    )
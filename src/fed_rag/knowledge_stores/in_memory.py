@@ -1,19 +1,32 @@
 """In Memory Knowledge Store"""
 
 import gc
+import threading
 from pathlib import Path
-from typing import Any, Dict, cast
+from typing import Any, Dict, Iterator, cast
 
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 import torch
 from pydantic import Field, PrivateAttr, model_serializer
 from typing_extensions import Self
 
+from fed_rag.base.blob_store import BaseBlobStore
 from fed_rag.base.knowledge_store import BaseKnowledgeStore
 from fed_rag.data_structures.knowledge_node import KnowledgeNode
-from fed_rag.exceptions.knowledge_stores import KnowledgeStoreNotFoundError
-from fed_rag.knowledge_stores.mixins import ManagedMixin
+from fed_rag.exceptions.knowledge_stores import (
+    KnowledgeStoreError,
+    KnowledgeStoreNotFoundError,
+)
+from fed_rag.knowledge_stores.mixins import BlobStoreMixin, ManagedMixin
+from fed_rag.utils.embeddings import (
+    EmbeddingBatchLike,
+    EmbeddingLike,
+    embedding_to_list,
+    embedding_to_numpy,
+)
 
 DEFAULT_CACHE_DIR = ".fed_rag/data_cache/"
 DEFAULT_TOP_K = 2
@@ -50,13 +63,93 @@ def _get_top_k_nodes(
     return sorted_similarities[:top_k]
 
 
-class InMemoryKnowledgeStore(BaseKnowledgeStore):
-    """InMemoryKnowledgeStore Class."""
+def _stack_embeddings(embeddings: list[Any]) -> torch.Tensor:
+    """Stack node embeddings into a float32 matrix."""
+    if not embeddings:
+        return torch.empty(0)
+    rows = [embedding_to_numpy(e, dtype=np.float32) for e in embeddings]
+    return torch.from_numpy(np.stack(rows))
+
+
+def _nodes_to_table(nodes: list[KnowledgeNode]) -> pa.Table:
+    """Convert nodes to an Arrow table.
+
+    Embeddings of equal length are written as a fixed-size list column built
+    directly from the stacked embedding matrix, i.e., as raw float buffers.
+    """
+    table = pa.Table.from_pylist(
+        [node.model_dump(exclude={"embedding"}) for node in nodes]
+    )
+    if not nodes:
+        return table
+
+    embeddings = [node.embedding for node in nodes]
+    lengths = {None if e is None else len(e) for e in embeddings}
+    if len(lengths) == 1 and None not in lengths:
+        matrix = np.asarray(
+            [embedding_to_numpy(e) for e in embeddings if e is not None]
+        ).reshape(len(nodes), -1)
+        column = pa.FixedSizeListArray.from_arrays(
+            pa.array(matrix.reshape(-1)), matrix.shape[1]
+        )
+    else:  # missing or ragged embeddings
+        column = pa.array(
+            [None if e is None else embedding_to_list(e) for e in embeddings],
+            type=pa.list_(pa.float64()),
+        )
+    return table.add_column(1, "embedding", column)
+
+
+def _read_nodes_from_parquet(
+    filename: Path,
+) -> tuple[list[KnowledgeNode], np.ndarray | None]:
+    """Read persisted nodes using the trusted `KnowledgeNode` fast path.
+
+    If all nodes have embeddings of equal length, these are read into a single
+    matrix and every node's embedding is a row view of it.
+
+    Returns:
+        tuple[list[KnowledgeNode], np.ndarray | None]: The nodes and, if
+            available, their embedding matrix.
+    """
+    table = pq.read_table(filename)
+    embeddings: list[Any] = [None] * table.num_rows
+    matrix = None
+    if "embedding" in table.column_names:
+        column = table.column("embedding").combine_chunks()
+        lengths = pc.unique(pc.list_value_length(column))
+        if table.num_rows and column.null_count == 0 and len(lengths) == 1:
+            values = column.flatten().to_numpy()
+            # copy out of the (read-only) Arrow buffer once, so that the
+            # matrix can be shared with torch
+            matrix = np.array(values.reshape(table.num_rows, -1))
+            embeddings = list(matrix)
+        else:  # missing or ragged embeddings
+            embeddings = column.to_pylist()
+        table = table.drop_columns(["embedding"])
+
+    nodes = [
+        KnowledgeNode.from_serialized({**row, "embedding": embedding})
+        for row, embedding in zip(table.to_pylist(), embeddings)
+    ]
+    return nodes, matrix
+
+
+class InMemoryKnowledgeStore(BlobStoreMixin, BaseKnowledgeStore):
+    """InMemoryKnowledgeStore Class.
+
+    Node embeddings are kept as a list of per-node embeddings while loading
+    and deleting, and as a single float32 matrix once retrieval starts.
+
+    If a `blob_store` is set, image content is moved to it on load, so that
+    neither memory nor persisted parquet files hold image bytes.
+    """
 
     cache_dir: str = Field(default=DEFAULT_CACHE_DIR)
     _data: dict[str, KnowledgeNode] = PrivateAttr(default_factory=dict)
-    _data_storage: list[float] = PrivateAttr(default_factory=list)
+    _data_storage: list[Any] | torch.Tensor = PrivateAttr(default_factory=list)
     _node_list: list[str] = PrivateAttr(default_factory=list)
+    _storage_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
 
     @classmethod
     def from_nodes(cls, nodes: list[KnowledgeNode], **kwargs: Any) -> Self:
@@ -64,68 +157,160 @@ class InMemoryKnowledgeStore(BaseKnowledgeStore):
         instance.load_nodes(nodes)
         return instance
 
-    def load_node(self, node: KnowledgeNode) -> None:
+    def _storage_to_list(self) -> list[Any]:
         if isinstance(self._data_storage, torch.Tensor):
             device = torch.device("cpu")
-            self._data_storage = self._data_storage.to(device).tolist()
+            self._data_storage = list(self._data_storage.to(device).numpy())
             gc.collect()  # Clean up Python garbage
             torch.cuda.empty_cache()
-        if node.node_id not in self._data:
-            self._data[node.node_id] = node
-            self._node_list.append(node.node_id)
-            self._data_storage.append(node.embedding)
+        return self._data_storage
+
+    def load_node(self, node: KnowledgeNode) -> None:
+        with self._storage_lock:
+            data_storage = self._storage_to_list()
+            if node.node_id not in self._data:
+                (node,) = self._offload_images([node])
+                self._data[node.node_id] = node
+                self._node_list.append(node.node_id)
+                data_storage.append(node.embedding)
 
     def load_nodes(self, nodes: list[KnowledgeNode]) -> None:
         for node in nodes:
             self.load_node(node)
 
+    def _load_nodes_with_matrix(
+        self, nodes: list[KnowledgeNode], matrix: np.ndarray | None
+    ) -> None:
+        """Load nodes whose embeddings are the rows of `matrix`.
+
+        When the store is empty, `matrix` is used as the retrieval matrix
+        directly (without copying if it is float32).
+        """
+        if self._data or matrix is None:
+            self.load_nodes(nodes)
+            return
+        self.load_nodes(nodes)
+        with self._storage_lock:
+            if len(self._node_list) == len(nodes):  # no duplicate node ids
+                self._data_storage = torch.from_numpy(
+                    matrix.astype(np.float32, copy=False)
+                )
+
     def retrieve(
-        self, query_emb: list[float], top_k: int = DEFAULT_TOP_K
+        self, query_emb: EmbeddingLike, top_k: int = DEFAULT_TOP_K
     ) -> list[tuple[float, KnowledgeNode]]:
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        query_emb = torch.tensor(query_emb).to(device)
-        if not torch.is_tensor(self._data_storage):
-            self._data_storage = torch.tensor(self._data_storage).to(device)
+        query_tensor = torch.from_numpy(
+            embedding_to_numpy(query_emb, dtype=np.float32)
+        ).to(device)
+        with self._storage_lock:
+            if not torch.is_tensor(self._data_storage):
+                self._data_storage = _stack_embeddings(self._data_storage)
+            self._data_storage = self._data_storage.to(device)
+            embeddings = self._data_storage
         node_ids_and_scores = _get_top_k_nodes(
             nodes=self._node_list,
-            embeddings=self._data_storage,
-            query_emb=query_emb,
+            embeddings=embeddings,
+            query_emb=query_tensor,
             top_k=top_k,
         )
         return [(el[1], self._data[el[0]]) for el in node_ids_and_scores]
 
     def batch_retrieve(
-        self, query_embs: list[list[float]], top_k: int = DEFAULT_TOP_K
+        self,
+        query_embs: EmbeddingBatchLike,
+        top_k: int = DEFAULT_TOP_K,
     ) -> list[list[tuple[float, "KnowledgeNode"]]]:
         raise NotImplementedError(
             f"batch_retrieve is not implemented for {self.__class__.__name__}."
         )
 
     def delete_node(self, node_id: str) -> bool:
-        if isinstance(self._data_storage, torch.Tensor):
-            device = torch.device("cpu")
-            self._data_storage = self._data_storage.to(device).tolist()
-            gc.collect()  # Clean up Python garbage
-            torch.cuda.empty_cache()
-        if node_id in self._data:
-            del self._data[node_id]
-            for i in range(len(self._node_list)):
-                print(len(self._node_list))
-                if node_id == self._node_list[i]:
-                    del self._data_storage[i]
-                    del self._node_list[i]
-                    break
-            return True
-        else:
-            return False
+        with self._storage_lock:
+            data_storage = self._storage_to_list()
+            if node_id in self._data:
+                del self._data[node_id]
+                for i in range(len(self._node_list)):
+                    if node_id == self._node_list[i]:
+                        del data_storage[i]
+                        del self._node_list[i]
+                        break
+                return True
+            else:
+                return False
 
     def clear(self) -> None:
-        self._data = {}
+        with self._storage_lock:
+            self._data = {}
+            self._node_list = []
+            self._data_storage = []
 
     @property
     def count(self) -> int:
         return len(self._data)
 
+    def iter_node_batches(
+        self, batch_size: int
+    ) -> Iterator[list[KnowledgeNode]]:
+        node_ids = list(self._node_list)
+        for start in range(0, len(node_ids), batch_size):
+            yield [
+                self._data[node_id]
+                for node_id in node_ids[start : start + batch_size]
+                if node_id in self._data
+            ]
+
+    def update_embeddings(
+        self, node_ids: list[str], embeddings: EmbeddingBatchLike
+    ) -> None:
+        """Replace the embeddings of nodes of the store.
+
+        The new retrieval matrix is built and swapped in under the storage
+        lock, so concurrent retrievals score nodes with either the previous
+        or the new embeddings, never a mix of both, and nodes loaded or
+        deleted concurrently cannot shift the rows being updated.
+        """
+        matrix = _stack_embeddings(list(embeddings))
+        if len(node_ids) != matrix.shape[0]:
+            raise KnowledgeStoreError(
+                "There should be one embedding for every node id."
+            )
+        if not node_ids:
+            return
+
+        rows = {node_id: row for row, node_id in enumerate(node_ids)}
+        with self._storage_lock:
+            unknown = [
+                node_id for node_id in node_ids if node_id not in self._data
+            ]
+            if unknown:
+                raise KnowledgeStoreError(
+                    f"Nodes not found in knowledge store: {unknown[:5]}"
+                )
+            if len(rows) == len(self._node_list):
+                # all nodes are re-encoded, so the new matrix replaces the old
+                storage = matrix[
+                    [rows[node_id] for node_id in self._node_list]
+                ]
+            else:
+                current = self._data_storage
+                storage = (
+                    current.cpu().clone()
+                    if isinstance(current, torch.Tensor)
+                    else _stack_embeddings(current)
+                )
+                positions = {
+                    node_id: ix for ix, node_id in enumerate(self._node_list)
+                }
+                storage[[positions[node_id] for node_id in rows]] = matrix[
+                    list(rows.values())
+                ]
+            self._data_storage = storage
+            for node_id, row in rows.items():
+                self._data[node_id] = self._data[node_id].model_copy(
+                    update={"embedding": matrix[row].numpy()}
+                )
+
     @model_serializer(mode="wrap")
     def custom_model_dump(self, handler: Any) -> Dict[str, Any]:
         data = handler(self)
@@ -136,10 +321,7 @@ class InMemoryKnowledgeStore(BaseKnowledgeStore):
         return data  # type: ignore[no-any-return]
 
     def persist(self) -> None:
-        serialized_model = self.model_dump()
-        data_values = list(serialized_model["_data"].values())
-
-        parquet_table = pa.Table.from_pylist(data_values)
+        parquet_table = _nodes_to_table(list(self._data.values()))
 
         filename = Path(self.cache_dir) / f"{self.name}.parquet"
         Path(filename).parent.mkdir(parents=True, exist_ok=True)
@@ -151,17 +333,14 @@ class InMemoryKnowledgeStore(BaseKnowledgeStore):
             msg = f"Knowledge store '{self.name}' not found at expected location: {filename}"
             raise KnowledgeStoreNotFoundError(msg)
 
-        parquet_data = pq.read_table(filename).to_pylist()
-        nodes = [KnowledgeNode(**data) for data in parquet_data]
-        self.load_nodes(nodes)
+        nodes, matrix = _read_nodes_from_parquet(filename)
+        self._attach_blob_store(nodes)
+        self._load_nodes_with_matrix(nodes, matrix)
 
 
 class ManagedInMemoryKnowledgeStore(ManagedMixin, InMemoryKnowledgeStore):
     def persist(self) -> None:
-        serialized_model = self.model_dump()
-        data_values = list(serialized_model["_data"].values())
-
-        parquet_table = pa.Table.from_pylist(data_values)
+        parquet_table = _nodes_to_table(list(self._data.values()))
 
         filename = Path(self.cache_dir) / self.name / f"{self.ks_id}.parquet"
         Path(filename).parent.mkdir(parents=True, exist_ok=True)
@@ -169,7 +348,11 @@ class ManagedInMemoryKnowledgeStore(ManagedMixin, InMemoryKnowledgeStore):
 
     @classmethod
     def from_name_and_id(
-        cls, name: str, ks_id: str, cache_dir: str | None = None
+        cls,
+        name: str,
+        ks_id: str,
+        cache_dir: str | None = None,
+        blob_store: BaseBlobStore | None = None,
     ) -> Self:
         cache_dir = cache_dir if cache_dir else DEFAULT_CACHE_DIR
         filename = Path(cache_dir) / name / f"{ks_id}.parquet"
@@ -177,11 +360,12 @@ class ManagedInMemoryKnowledgeStore(ManagedMixin, InMemoryKnowledgeStore):
             msg = f"Knowledge store '{name}/{ks_id}' not found at expected location: {filename}"
             raise KnowledgeStoreNotFoundError(msg)
 
-        parquet_data = pq.read_table(filename).to_pylist()
-        nodes = [KnowledgeNode(**data) for data in parquet_data]
-        knowledge_store = ManagedInMemoryKnowledgeStore.from_nodes(
-            nodes, name=name, cache_dir=cache_dir
+        nodes, matrix = _read_nodes_from_parquet(filename)
+        knowledge_store = ManagedInMemoryKnowledgeStore(
+            name=name, cache_dir=cache_dir, blob_store=blob_store
         )
+        knowledge_store._attach_blob_store(nodes)
+        knowledge_store._load_nodes_with_matrix(nodes, matrix)
         # set id
         knowledge_store.ks_id = ks_id
         return knowledge_store
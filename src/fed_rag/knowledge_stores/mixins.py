@@ -1,9 +1,13 @@
 import uuid
 from abc import ABC, abstractmethod
+from typing import Iterable
 
 from pydantic import BaseModel, Field
 from typing_extensions import Self
 
+from fed_rag.base.blob_store import BaseBlobStore
+from fed_rag.data_structures.knowledge_node import KnowledgeNode
+
 
 def generate_ks_id() -> str:
     return str(uuid.uuid4())
@@ -16,3 +20,43 @@ class ManagedMixin(BaseModel, ABC):
     @abstractmethod
     def from_name_and_id(cls, ks_id: str) -> Self:
         """Load a managed Knowledge Store by id."""
+
+
+class BlobStoreMixin(BaseModel):
+    """Mixin for knowledge stores that keep image content out-of-line.
+
+    When a `blob_store` is set, image content of loaded nodes is moved to it
+    and only its reference is stored, while retrieved nodes get the blob
+    store attached so that their images can be loaded on demand.
+    """
+
+    blob_store: BaseBlobStore | None = Field(
+        default=None,
+        description="Optional blob store for out-of-line image content.",
+    )
+
+    def _offload_images(
+        self, nodes: list[KnowledgeNode]
+    ) -> list[KnowledgeNode]:
+        """Return the nodes with their inline images moved to the blob store.
+
+        Nodes are copied before being modified, the given nodes are left
+        untouched.
+        """
+        if self.blob_store is None:
+            return nodes
+        offloaded = []
+        for node in nodes:
+            if node.image_content is not None:
+                node = node.model_copy()
+                node.offload_image(self.blob_store)
+            offloaded.append(node)
+        return offloaded
+
+    def _attach_blob_store(self, nodes: Iterable[KnowledgeNode]) -> None:
+        """Attach the blob store to nodes with out-of-line images."""
+        if self.blob_store is None:
+            return
+        for node in nodes:
+            if node.image_ref is not None:
+                node.attach_blob_store(self.blob_store)
@@ -15,6 +15,12 @@ from fed_rag.exceptions import (
     KnowledgeStoreWarning,
     LoadNodeError,
 )
+from fed_rag.knowledge_stores.mixins import BlobStoreMixin
+from fed_rag.utils.embeddings import (
+    EmbeddingBatchLike,
+    EmbeddingLike,
+    embedding_to_list,
+)
 
 from .utils import (
     check_qdrant_installed,
@@ -57,7 +63,7 @@ def _get_qdrant_client(
         )
 
 
-class AsyncQdrantKnowledgeStore(BaseAsyncKnowledgeStore):
+class AsyncQdrantKnowledgeStore(BlobStoreMixin, BaseAsyncKnowledgeStore):
     """Async Qdrant Knowledge Store Class
 
     NOTE: This is a minimal implementation in order to just get started using Qdrant.
@@ -198,6 +204,7 @@ class AsyncQdrantKnowledgeStore(BaseAsyncKnowledgeStore):
             vector_size=len(node.embedding)
         )
 
+        (node,) = self._offload_images([node])
         point = convert_knowledge_node_to_qdrant_point(node)
         async with self.get_client() as client:
             try:
@@ -217,7 +224,10 @@ class AsyncQdrantKnowledgeStore(BaseAsyncKnowledgeStore):
             vector_size=len(nodes[0].embedding)
         )
 
-        points = [convert_knowledge_node_to_qdrant_point(n) for n in nodes]
+        points = [
+            convert_knowledge_node_to_qdrant_point(n)
+            for n in self._offload_images(nodes)
+        ]
         async with self.get_client() as client:
             try:
                 # upload points is a sync method
@@ -232,7 +242,7 @@ class AsyncQdrantKnowledgeStore(BaseAsyncKnowledgeStore):
                 ) from e
 
     async def retrieve(
-        self, query_emb: list[float], top_k: int
+        self, query_emb: EmbeddingLike, top_k: int
     ) -> list[tuple[float, KnowledgeNode]]:
         """Asynchronously retrieve top-k nodes from the vector store."""
         from qdrant_client.conversions.common_types import QueryResponse
@@ -243,7 +253,7 @@ class AsyncQdrantKnowledgeStore(BaseAsyncKnowledgeStore):
             try:
                 hits: QueryResponse = await client.query_points(
                     collection_name=self.collection_name,
-                    query=query_emb,
+                    query=embedding_to_list(query_emb),
                     limit=top_k,
                 )
             except Exception as e:
@@ -251,13 +261,15 @@ class AsyncQdrantKnowledgeStore(BaseAsyncKnowledgeStore):
                     f"Failed to retrieve from collection '{self.collection_name}': {str(e)}"
                 ) from e
 
-        return [
+        results = [
             convert_scored_point_to_knowledge_node_and_score_tuple(pt)
             for pt in hits.points
         ]
+        self._attach_blob_store(node for _, node in results)
+        return results
 
     async def batch_retrieve(
-        self, query_embs: list[list[float]], top_k: int
+        self, query_embs: EmbeddingBatchLike, top_k: int
     ) -> list[list[tuple[float, "KnowledgeNode"]]]:
         """Asynchronously batch retrieve top-k nodes from the vector store."""
         from qdrant_client.conversions.common_types import QueryResponse
@@ -272,7 +284,11 @@ class AsyncQdrantKnowledgeStore(BaseAsyncKnowledgeStore):
                 ] = await client.query_batch_points(
                     collection_name=self.collection_name,
                     requests=[
-                        QueryRequest(query=emb, limit=top_k, with_payload=True)
+                        QueryRequest(
+                            query=embedding_to_list(emb),
+                            limit=top_k,
+                            with_payload=True,
+                        )
                         for emb in query_embs
                     ],
                 )
@@ -281,13 +297,16 @@ class AsyncQdrantKnowledgeStore(BaseAsyncKnowledgeStore):
                     f"Failed to batch retrieve from collection '{self.collection_name}': {str(e)}"
                 ) from e
 
-        return [
+        batch_results = [
             [
                 convert_scored_point_to_knowledge_node_and_score_tuple(pt)
                 for pt in hits.points
             ]
             for hits in batch_hits
         ]
+        for results in batch_results:
+            self._attach_blob_store(node for _, node in results)
+        return batch_results
 
     async def delete_node(self, node_id: str) -> bool:
         """Delete a node based on its node_id."""
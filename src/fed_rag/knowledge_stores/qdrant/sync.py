@@ -2,7 +2,14 @@
 
 import warnings
 from contextlib import contextmanager
-from typing import TYPE_CHECKING, Any, Generator, Literal, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Generator,
+    Iterator,
+    Literal,
+    Optional,
+)
 
 from pydantic import Field, PrivateAttr, SecretStr, model_validator
 
@@ -15,6 +22,12 @@ from fed_rag.exceptions import (
     KnowledgeStoreWarning,
     LoadNodeError,
 )
+from fed_rag.knowledge_stores.mixins import BlobStoreMixin
+from fed_rag.utils.embeddings import (
+    EmbeddingBatchLike,
+    EmbeddingLike,
+    embedding_to_list,
+)
 
 from .utils import (
     check_qdrant_installed,
@@ -57,7 +70,7 @@ def _get_qdrant_client(
         )
 
 
-class QdrantKnowledgeStore(BaseKnowledgeStore):
+class QdrantKnowledgeStore(BlobStoreMixin, BaseKnowledgeStore):
     """Qdrant Knowledge Store Class
 
     NOTE: This is a minimal implementation in order to just get started using Qdrant.
@@ -194,6 +207,7 @@ class QdrantKnowledgeStore(BaseKnowledgeStore):
             vector_size=len(node.embedding)
         )
 
+        (node,) = self._offload_images([node])
         point = convert_knowledge_node_to_qdrant_point(node)
         with self.get_client() as client:
             try:
@@ -213,7 +227,10 @@ class QdrantKnowledgeStore(BaseKnowledgeStore):
             vector_size=len(nodes[0].embedding)
         )
 
-        points = [convert_knowledge_node_to_qdrant_point(n) for n in nodes]
+        points = [
+            convert_knowledge_node_to_qdrant_point(n)
+            for n in self._offload_images(nodes)
+        ]
         with self.get_client() as client:
             try:
                 client.upload_points(
@@ -227,7 +244,7 @@ class QdrantKnowledgeStore(BaseKnowledgeStore):
                 ) from e
 
     def retrieve(
-        self, query_emb: list[float], top_k: int
+        self, query_emb: EmbeddingLike, top_k: int
     ) -> list[tuple[float, KnowledgeNode]]:
         """Retrieve top-k nodes from the vector store."""
         from qdrant_client.conversions.common_types import QueryResponse
@@ -238,7 +255,7 @@ class QdrantKnowledgeStore(BaseKnowledgeStore):
             try:
                 hits: QueryResponse = client.query_points(
                     collection_name=self.collection_name,
-                    query=query_emb,
+                    query=embedding_to_list(query_emb),
                     limit=top_k,
                 )
             except Exception as e:
@@ -246,13 +263,15 @@ class QdrantKnowledgeStore(BaseKnowledgeStore):
                     f"Failed to retrieve from collection '{self.collection_name}': {str(e)}"
                 ) from e
 
-        return [
+        results = [
             convert_scored_point_to_knowledge_node_and_score_tuple(pt)
             for pt in hits.points
         ]
+        self._attach_blob_store(node for _, node in results)
+        return results
 
     def batch_retrieve(
-        self, query_embs: list[list[float]], top_k: int
+        self, query_embs: EmbeddingBatchLike, top_k: int
     ) -> list[list[tuple[float, "KnowledgeNode"]]]:
         """Batch retrieve top-k nodes from the vector store."""
         from qdrant_client.conversions.common_types import QueryResponse
@@ -265,7 +284,11 @@ class QdrantKnowledgeStore(BaseKnowledgeStore):
                 batch_hits: list[QueryResponse] = client.query_batch_points(
                     collection_name=self.collection_name,
                     requests=[
-                        QueryRequest(query=emb, limit=top_k, with_payload=True)
+                        QueryRequest(
+                            query=embedding_to_list(emb),
+                            limit=top_k,
+                            with_payload=True,
+                        )
                         for emb in query_embs
                     ],
                 )
@@ -274,13 +297,16 @@ class QdrantKnowledgeStore(BaseKnowledgeStore):
                     f"Failed to batch retrieve from collection '{self.collection_name}': {str(e)}"
                 ) from e
 
-        return [
+        batch_results = [
             [
                 convert_scored_point_to_knowledge_node_and_score_tuple(pt)
                 for pt in hits.points
             ]
             for hits in batch_hits
         ]
+        for results in batch_results:
+            self._attach_blob_store(node for _, node in results)
+        return batch_results
 
     def delete_node(self, node_id: str) -> bool:
         """Delete a node based on its node_id."""
@@ -342,6 +368,79 @@ class QdrantKnowledgeStore(BaseKnowledgeStore):
                     f"Failed to get vector count for collection '{self.collection_name}': {str(e)}"
                 ) from e
 
+    def iter_node_batches(
+        self, batch_size: int
+    ) -> Iterator[list[KnowledgeNode]]:
+        """Iterate over all nodes of the collection, without embeddings."""
+        self._ensure_collection_exists()
+
+        offset = None
+        with self.get_client() as client:
+            while True:
+                try:
+                    records, offset = client.scroll(
+                        collection_name=self.collection_name,
+                        limit=batch_size,
+                        offset=offset,
+                        with_payload=True,
+                        with_vectors=False,
+                    )
+                except Exception as e:
+                    raise KnowledgeStoreError(
+                        f"Failed to scroll collection '{self.collection_name}': {str(e)}"
+                    ) from e
+                if records:
+                    nodes = []
+                    for record in records:
+                        if record.payload is None:
+                            raise KnowledgeStoreError(
+                                f"Point '{record.id}' of collection "
+                                f"'{self.collection_name}' has no payload."
+                            )
+                        nodes.append(
+                            KnowledgeNode.from_serialized(
+                                {**record.payload, "embedding": None}
+                            )
+                        )
+                    self._attach_blob_store(nodes)
+                    yield nodes
+                if offset is None:
+                    break
+
+    def update_embeddings(
+        self, node_ids: list[str], embeddings: EmbeddingBatchLike
+    ) -> None:
+        """Replace the vectors of points of the collection.
+
+        NOTE: points are updated in a single request, but Qdrant may serve
+        queries while the update is being applied.
+        """
+        from qdrant_client.http.models import PointVectors
+
+        embeddings = list(embeddings)
+        if len(node_ids) != len(embeddings):
+            raise KnowledgeStoreError(
+                "There should be one embedding for every node id."
+            )
+        if not node_ids:
+            return
+
+        self._ensure_collection_exists()
+
+        with self.get_client() as client:
+            try:
+                client.update_vectors(
+                    collection_name=self.collection_name,
+                    points=[
+                        PointVectors(id=node_id, vector=embedding_to_list(emb))
+                        for node_id, emb in zip(node_ids, embeddings)
+                    ],
+                )
+            except Exception as e:
+                raise KnowledgeStoreError(
+                    f"Failed to update vectors of collection '{self.collection_name}': {str(e)}"
+                ) from e
+
     def persist(self) -> None:
         """Persist a knowledge store to disk."""
         raise NotImplementedError(
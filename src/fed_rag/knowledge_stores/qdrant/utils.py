@@ -39,11 +39,13 @@ def convert_knowledge_node_to_qdrant_point(
 def convert_scored_point_to_knowledge_node_and_score_tuple(
     scored_point: "ScoredPoint",
 ) -> tuple[float, KnowledgeNode]:
+    if scored_point.payload is None:
+        raise KnowledgeStoreError(f"Point '{scored_point.id}' has no payload.")
     knowledge_data = scored_point.payload
     knowledge_data.update(
         embedding=scored_point.vector
     )  # attach vector to embedding if it is even returned
     return (
         scored_point.score,
-        KnowledgeNode.model_validate(knowledge_data),
+        KnowledgeNode.from_serialized(knowledge_data),
     )
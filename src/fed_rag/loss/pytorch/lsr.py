@@ -7,7 +7,10 @@ import torch.nn as nn
 import torch.nn.functional as F
 from typing_extensions import assert_never
 
-from fed_rag.exceptions.loss import InvalidReductionParam
+from fed_rag.exceptions.loss import (
+    InvalidReductionParam,
+    InvalidTemperatureParam,
+)
 
 
 class ReductionMode(str, Enum):
@@ -28,12 +31,26 @@ class LSRLoss(nn.Module):
     between retrieval likelihood P_R(d|x) and language model likelihood Q_LM(d|x,y),
     where d is the retrieved document.
 
+    The LM scores are log-likelihoods log P_LM(y|d,x), e.g. as computed by
+    `batch_compute_target_sequence_log_proba`, and Q_LM(d|x,y) is their
+    softmax with temperature `temperature`. Both distributions are kept in
+    log-space, so that long targets with vanishing likelihoods don't
+    underflow.
+
+    When queries retrieved different numbers of documents, scores are padded
+    to the largest number and `mask` marks the actual documents, so that
+    padding is excluded from both distributions.
+
     Source: Shi, Weijia, et al. "Replug: Retrieval-augmented black-box language models."
         arXiv preprint arXiv:2301.12652 (2023).
     Arxiv: https://arxiv.org/pdf/2301.12652
     """
 
-    def __init__(self, reduction: ReductionMode = ReductionMode.MEAN):
+    def __init__(
+        self,
+        reduction: ReductionMode = ReductionMode.MEAN,
+        temperature: float = 1.0,
+    ):
         # This line is critical - it initializes all the Module machinery
         super(LSRLoss, self).__init__()
 
@@ -44,16 +61,37 @@ class LSRLoss(nn.Module):
             )
             raise InvalidReductionParam(msg)
 
+        if temperature <= 0:
+            raise InvalidTemperatureParam(
+                f"Invalid temperature {temperature}. Temperature must be positive."
+            )
+
         self.reduction = reduction
+        self.temperature = temperature
 
     def forward(
-        self, retrieval_scores: torch.Tensor, lm_scores: torch.Tensor
+        self,
+        retrieval_scores: torch.Tensor,
+        lm_scores: torch.Tensor,
+        mask: torch.Tensor | None = None,
     ) -> torch.Tensor:
+        lm_scores = lm_scores / self.temperature
+        if mask is not None:
+            mask = mask.bool()
+            retrieval_scores = retrieval_scores.masked_fill(~mask, -torch.inf)
+            lm_scores = lm_scores.masked_fill(~mask, -torch.inf)
         retrieval_log_probs = F.log_softmax(retrieval_scores, dim=1)
-        lm_probs = F.softmax(lm_scores, dim=1)
-        kl_div = F.kl_div(retrieval_log_probs, lm_probs, reduction="none").sum(
-            dim=-1
+        lm_log_probs = F.log_softmax(lm_scores, dim=1)
+        kl_div = F.kl_div(
+            retrieval_log_probs,
+            lm_log_probs,
+            reduction="none",
+            log_target=True,
         )
+        if mask is not None:
+            # padded documents give nan terms (0 * (-inf - -inf))
+            kl_div = kl_div.masked_fill(~mask, 0.0)
+        kl_div = kl_div.sum(dim=-1)
 
         match self.reduction:
             case ReductionMode.MEAN:
@@ -92,5 +92,33 @@ class HFPretrainedTokenizer(BaseTokenizer):
         }
         return retval
 
+    def batch_encode(
+        self, inputs: list[str], **kwargs: Any
+    ) -> list[EncodeResult]:
+        if not inputs:
+            return []
+        tokenizer_result = self.unwrapped(text=inputs, **kwargs)
+        input_ids_list = tokenizer_result.get("input_ids")
+        attention_mask_list = tokenizer_result.get("attention_mask", None)
+
+        if not input_ids_list or len(input_ids_list) != len(inputs):
+            raise TokenizerError(
+                "Unexpected shape of `input_ids` from `tokenizer.__call__`."
+            )
+        if any(not input_ids for input_ids in input_ids_list):
+            raise TokenizerError("Tokenizer returned empty input_ids")
+
+        return [
+            {
+                "input_ids": list(input_ids),
+                "attention_mask": (
+                    list(attention_mask_list[ix])
+                    if attention_mask_list is not None
+                    else None
+                ),
+            }
+            for ix, input_ids in enumerate(input_ids_list)
+        ]
+
     def decode(self, input_ids: list[int], **kwargs: Any) -> str:
         return self.unwrapped.decode(token_ids=input_ids, **kwargs)  # type: ignore[no-any-return]
@@ -0,0 +1,72 @@
+"""HuggingFace Trainer Callbacks"""
+
+from typing import TYPE_CHECKING, Any
+
+from fed_rag.core.reindexer import KnowledgeStoreReindexer
+from fed_rag.exceptions import MissingExtraError
+
+try:
+    from transformers import TrainerCallback
+
+    _has_huggingface = True
+except ModuleNotFoundError:
+    _has_huggingface = False
+
+    class TrainerCallback:  # type: ignore[no-redef]
+        """Dummy placeholder when transformers is not available."""
+
+        pass
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    from transformers import TrainerControl, TrainerState, TrainingArguments
+
+
+class ReindexCallback(TrainerCallback):
+    """Re-index a knowledge store periodically during retriever training.
+
+    Every `every_n_steps` optimizer steps, a background re-index of the
+    knowledge store is started with the `KnowledgeStoreReindexer`, unless
+    the previous one is still running. Training keeps going while the
+    knowledge store is re-encoded. At the end of training, the callback
+    waits for the last re-index to complete.
+
+    Args:
+        reindexer (KnowledgeStoreReindexer): The re-indexer to run.
+        every_n_steps (int): Number of optimizer steps between re-indexes.
+    """
+
+    def __init__(self, reindexer: KnowledgeStoreReindexer, every_n_steps: int):
+        if not _has_huggingface:
+            msg = (
+                f"`{self.__class__.__name__}` requires `huggingface` extra to be installed. "
+                "To fix please run `pip install fed-rag[huggingface]`."
+            )
+            raise MissingExtraError(msg)
+        if every_n_steps < 1:
+            raise ValueError("`every_n_steps` must be a positive integer.")
+
+        self.reindexer = reindexer
+        self.every_n_steps = every_n_steps
+
+    def on_step_end(
+        self,
+        args: "TrainingArguments",
+        state: "TrainerState",
+        control: "TrainerControl",
+        **kwargs: Any,
+    ) -> None:
+        if (
+            state.global_step > 0
+            and state.global_step % self.every_n_steps == 0
+        ):
+            self.reindexer.start()
+
+    def on_train_end(
+        self,
+        args: "TrainingArguments",
+        state: "TrainerState",
+        control: "TrainerControl",
+        **kwargs: Any,
+    ) -> None:
+        self.reindexer.close()
@@ -1,12 +1,16 @@
 """HuggingFace LM-Supervised Retriever Trainer"""
 
-from typing import TYPE_CHECKING, Any, Optional
+from typing import TYPE_CHECKING, Any, Optional, cast
 
 import torch
-from pydantic import PrivateAttr, model_validator
+from pydantic import Field, PrivateAttr, model_validator
 
 from fed_rag import RAGSystem
 from fed_rag.base.trainer import BaseRetrieverTrainer
+from fed_rag.core.reindexer import (
+    DEFAULT_REINDEX_BATCH_SIZE,
+    KnowledgeStoreReindexer,
+)
 from fed_rag.data_collators.huggingface import DataCollatorForLSR
 from fed_rag.data_structures.results import TestResult, TrainResult
 from fed_rag.exceptions import (
@@ -17,11 +21,13 @@ from fed_rag.exceptions import (
     TrainerError,
 )
 from fed_rag.loss.pytorch.lsr import LSRLoss
+from fed_rag.trainers.huggingface.callbacks import ReindexCallback
 from fed_rag.trainers.huggingface.mixin import HuggingFaceTrainerMixin
 from fed_rag.utils.huggingface import _validate_rag_system
 
 try:
     from sentence_transformers import SentenceTransformerTrainer
+    from transformers import Trainer
 
     _has_huggingface = True
 except ModuleNotFoundError:
@@ -43,6 +49,24 @@ if TYPE_CHECKING:  # pragma: no cover
     from transformers.trainer_utils import TrainOutput
 
 
+def _encode(
+    model: Any, sentence_transformer: "SentenceTransformer", texts: list[str]
+) -> torch.Tensor:
+    """Encode texts with a forward pass of `model`, keeping the graph.
+
+    `model` may be a wrapper (e.g., for distributed training) of
+    `sentence_transformer`, which is used for tokenization.
+    """
+    features = sentence_transformer.tokenize(texts)
+    features = {
+        k: v.to(sentence_transformer.device)
+        if isinstance(v, torch.Tensor)
+        else v
+        for k, v in features.items()
+    }
+    return model(features)["sentence_embedding"]  # type: ignore[no-any-return]
+
+
 class LSRSentenceTransformerTrainer(SentenceTransformerTrainer):
     def __init__(
         self,
@@ -76,6 +100,17 @@ class LSRSentenceTransformerTrainer(SentenceTransformerTrainer):
             *args, loss=loss, data_collator=data_collator, **kwargs
         )
 
+    def get_optimizer_cls_and_kwargs(
+        self, args: "TrainingArguments", model: Any | None = None
+    ) -> tuple[Any, Any]:
+        """Optimize the parameters of the model being trained.
+
+        `SentenceTransformerTrainer` optimizes the parameters of its loss,
+        which wrap the model for sentence-transformers losses, but `LSRLoss`
+        has no parameters.
+        """
+        return Trainer.get_optimizer_cls_and_kwargs(args, model)  # type: ignore[no-any-return]
+
     def collect_scores(
         self, inputs: dict[str, torch.Tensor | Any]
     ) -> tuple[torch.Tensor, torch.Tensor]:
@@ -94,6 +129,83 @@ class LSRSentenceTransformerTrainer(SentenceTransformerTrainer):
 
         return retrieval_scores, lm_scores
 
+    def compute_retrieval_scores(
+        self,
+        model: "SentenceTransformer",
+        query_texts: list[str],
+        context_texts: list[list[str]],
+        num_contexts: list[int] | None = None,
+    ) -> torch.Tensor:
+        """Score the retrieved contexts of every query with the live encoder.
+
+        Only the retrieved contexts are re-encoded, in a single batched
+        forward pass, so that the scores are part of the autograd graph of
+        the model being trained. With a dual-encoder retriever, the model
+        is the query encoder and contexts are encoded by the (frozen)
+        context encoder.
+
+        Args:
+            model (SentenceTransformer): The model being trained.
+            query_texts (list[str]): The queries.
+            context_texts (list[list[str]]): The retrieved contexts of every
+                query.
+            num_contexts (list[int] | None): The number of retrieved contexts
+                of every query, as collated by `DataCollatorForLSR`.
+
+        Raises:
+            TrainerError: If the number of contexts of a query does not match
+                `num_contexts`.
+
+        Returns:
+            torch.Tensor: The retrieval scores, of shape
+                (num_queries, max(num_contexts)), computed with the similarity
+                function of the model. Scores of queries with fewer contexts
+                are right-padded with zeros.
+        """
+        if num_contexts is None:
+            num_contexts = [len(contexts) for contexts in context_texts]
+        if len(query_texts) != len(context_texts) or len(num_contexts) != len(
+            query_texts
+        ):
+            raise TrainerError(
+                f"Got {len(query_texts)} queries, but contexts for "
+                f"{len(context_texts)} and context counts for "
+                f"{len(num_contexts)} queries."
+            )
+        for ix, (contexts, count) in enumerate(
+            zip(context_texts, num_contexts)
+        ):
+            if len(contexts) != count:
+                raise TrainerError(
+                    f"Query {ix} has {len(contexts)} contexts, but its "
+                    f"context count is {count}."
+                )
+
+        data_collator = cast(DataCollatorForLSR, self.data_collator)
+        retriever = data_collator.rag_system.retriever
+        flat_context_texts = [
+            c for contexts in context_texts for c in contexts
+        ]
+
+        query_embs = _encode(model, self.model, query_texts)
+        if retriever.encoder is not None:
+            context_embs = _encode(model, self.model, flat_context_texts)
+        else:
+            context_encoder = retriever.context_encoder
+            with torch.no_grad():
+                context_embs = _encode(
+                    context_encoder, context_encoder, flat_context_texts
+                )
+
+        counts = torch.tensor(num_contexts, device=query_embs.device)
+        scores = self.model.similarity_pairwise(
+            query_embs.repeat_interleave(counts, dim=0),
+            context_embs.to(query_embs.device),
+        )
+        return torch.nn.utils.rnn.pad_sequence(
+            list(scores.split(num_contexts)), batch_first=True
+        )
+
     def compute_loss(
         self,
         model: "SentenceTransformer",
@@ -103,7 +215,9 @@ class LSRSentenceTransformerTrainer(SentenceTransformerTrainer):
     ) -> torch.Tensor | tuple[torch.Tensor, dict[str, Any]]:
         """Compute LSR loss.
 
-        NOTE: the forward pass of the model is taken care of in the DataCollatorForLSR.
+        NOTE: the forward pass of the generator is taken care of in the
+        DataCollatorForLSR. Retrieval scores are recomputed with the model being
+        trained whenever the collated inputs contain the query and context texts.
 
         Args:
             model (SentenceTransformer): _description_
@@ -118,15 +232,41 @@ class LSRSentenceTransformerTrainer(SentenceTransformerTrainer):
             torch.Tensor | tuple[torch.Tensor, dict[str, Any]]: _description_
         """
         retrieval_scores, lm_scores = self.collect_scores(inputs)
-        loss = self.loss(retrieval_scores, lm_scores)
+        num_contexts = inputs.get("num_contexts")
+        if "query_texts" in inputs and "context_texts" in inputs:
+            retrieval_scores = self.compute_retrieval_scores(
+                model,
+                query_texts=inputs["query_texts"],  # type: ignore[arg-type]
+                context_texts=inputs["context_texts"],  # type: ignore[arg-type]
+                num_contexts=num_contexts,  # type: ignore[arg-type]
+            )
+        mask = None
+        if num_contexts is not None and min(num_contexts) < max(num_contexts):
+            # exclude the padding of queries with fewer contexts
+            positions = torch.arange(
+                lm_scores.shape[1], device=lm_scores.device
+            )
+            mask = positions < torch.tensor(
+                num_contexts, device=lm_scores.device
+            ).unsqueeze(1)
+        loss = self.loss(retrieval_scores, lm_scores, mask=mask)
 
         # inputs are actually the outputs of RAGSystem's "forward" pass
         return (loss, inputs) if return_outputs else loss
 
 
 class HuggingFaceTrainerForLSR(HuggingFaceTrainerMixin, BaseRetrieverTrainer):
-    """HuggingFace LM-Supervised Retriever Trainer."""
+    """HuggingFace LM-Supervised Retriever Trainer.
+
+    If `reindex_every_n_steps` is set, the knowledge store of the RAG system
+    is re-encoded with the retriever being trained every
+    `reindex_every_n_steps` steps, on a background thread (see
+    `ReindexCallback`), so that retrieval in later steps uses embeddings
+    matching the updated encoder.
+    """
 
+    reindex_every_n_steps: int | None = Field(default=None, gt=0)
+    reindex_batch_size: int = Field(default=DEFAULT_REINDEX_BATCH_SIZE, gt=0)
     _hf_trainer: Optional["SentenceTransformerTrainer"] = PrivateAttr(
         default=None
     )
@@ -160,17 +300,32 @@ class HuggingFaceTrainerForLSR(HuggingFaceTrainerMixin, BaseRetrieverTrainer):
                 "`~sentence_transformers.SentenceTransformer`."
             )
 
+        callbacks = []
+        if self.reindex_every_n_steps is not None:
+            reindexer = KnowledgeStoreReindexer(
+                retriever=self.rag_system.retriever,
+                knowledge_store=self.rag_system.knowledge_store,
+                batch_size=self.reindex_batch_size,
+            )
+            callbacks.append(
+                ReindexCallback(
+                    reindexer, every_n_steps=self.reindex_every_n_steps
+                )
+            )
+
         self._hf_trainer = LSRSentenceTransformerTrainer(
             model=self.model,
             args=self.training_arguments,
             data_collator=DataCollatorForLSR(rag_system=self.rag_system),
             train_dataset=self.train_dataset,
+            callbacks=callbacks or None,
         )
 
         return self
 
     def train(self, **kwargs: Any) -> TrainResult:
-        output: TrainOutput = self.hf_trainer_obj.train(**kwargs)
+        with self.serve_retrievals():
+            output: TrainOutput = self.hf_trainer_obj.train(**kwargs)
         return TrainResult(loss=output.training_loss)
 
     def evaluate(self) -> TestResult:
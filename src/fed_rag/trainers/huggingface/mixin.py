@@ -1,9 +1,11 @@
 """HuggingFace Trainer Mixin"""
 
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from typing import (
     TYPE_CHECKING,
     Any,
+    Iterator,
     Optional,
     Protocol,
     Union,
@@ -73,3 +75,36 @@ class HuggingFaceTrainerMixin(BaseModel, ABC):
     @abstractmethod
     def hf_trainer_obj(self) -> "Trainer":
         """A ~transformers.Trainer object."""
+
+    @contextmanager
+    def serve_retrievals(self) -> Iterator[None]:
+        """Serve the retrievals of data loader workers while in this context.
+
+        If the `hf_trainer_obj` loads data with worker processes (i.e.,
+        `dataloader_num_workers > 0`), a `RetrievalService` is started for
+        the RAG system of its data collator, which retrieves through the
+        service instead of in the workers.
+        """
+        # imported here, as the data collators import the RAG systems
+        from fed_rag.base.data_collator import BaseDataCollator
+        from fed_rag.core.retrieval_service import RetrievalService
+
+        trainer = self.hf_trainer_obj
+        # `Trainer` sets these in `__init__`, untyped for mypy
+        collator = getattr(trainer, "data_collator", None)
+        args = getattr(trainer, "args", None)
+        if (
+            not isinstance(collator, BaseDataCollator)
+            or collator.retrieval_client is not None
+            or not isinstance(args, TrainingArguments)
+            or not args.dataloader_num_workers
+        ):
+            yield
+            return
+
+        with RetrievalService(rag_system=collator.rag_system) as service:
+            collator.retrieval_client = service.client()
+            try:
+                yield
+            finally:
+                collator.retrieval_client = None
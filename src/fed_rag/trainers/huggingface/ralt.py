@@ -88,7 +88,8 @@ class HuggingFaceTrainerForRALT(HuggingFaceTrainerMixin, BaseGeneratorTrainer):
         return self
 
     def train(self, **kwargs: Any) -> TrainResult:
-        output: TrainOutput = self.hf_trainer_obj.train(**kwargs)
+        with self.serve_retrievals():
+            output: TrainOutput = self.hf_trainer_obj.train(**kwargs)
         return TrainResult(loss=output.training_loss)
 
     def evaluate(self) -> TestResult:
@@ -0,0 +1,92 @@
+"""Length-bucketed batching utilities."""
+
+from typing import Sequence
+
+from pydantic import BaseModel
+
+
+class PaddingStats(BaseModel):
+    """Padding statistics of a batch of padded sequences.
+
+    Attributes:
+        num_sequences: Number of sequences in the batch.
+        num_tokens: Number of actual (non-padding) tokens.
+        num_padding_tokens: Number of padding tokens.
+    """
+
+    num_sequences: int = 0
+    num_tokens: int = 0
+    num_padding_tokens: int = 0
+
+    @property
+    def padding_ratio(self) -> float:
+        """Fraction of the padded batch that is padding."""
+        total = self.num_tokens + self.num_padding_tokens
+        return self.num_padding_tokens / total if total else 0.0
+
+    @classmethod
+    def from_lengths(cls, lengths: Sequence[int]) -> "PaddingStats":
+        """Statistics of padding sequences of `lengths` to the longest one."""
+        max_length = max(lengths, default=0)
+        num_tokens = sum(lengths)
+        return cls(
+            num_sequences=len(lengths),
+            num_tokens=num_tokens,
+            num_padding_tokens=max_length * len(lengths) - num_tokens,
+        )
+
+    def __add__(self, other: "PaddingStats") -> "PaddingStats":
+        return PaddingStats(
+            num_sequences=self.num_sequences + other.num_sequences,
+            num_tokens=self.num_tokens + other.num_tokens,
+            num_padding_tokens=self.num_padding_tokens
+            + other.num_padding_tokens,
+        )
+
+
+def length_buckets(
+    lengths: Sequence[int],
+    max_batch_size: int | None = None,
+    max_padding_ratio: float | None = None,
+) -> list[list[int]]:
+    """Group sequences of similar lengths into buckets.
+
+    Sequences are sorted by length and consecutive ones are grouped, starting
+    a new bucket whenever adding the next sequence would exceed
+    `max_batch_size` sequences or a padding ratio of `max_padding_ratio`.
+
+    Args:
+        lengths (Sequence[int]): The length of every sequence.
+        max_batch_size (int | None): Maximum number of sequences per bucket.
+        max_padding_ratio (float | None): Maximum fraction of padding tokens
+            per bucket, once padded to its longest sequence.
+
+    Returns:
+        list[list[int]]: The indices of the sequences in every bucket, by
+            increasing length.
+    """
+    order = sorted(range(len(lengths)), key=lambda ix: lengths[ix])
+    buckets: list[list[int]] = []
+    bucket: list[int] = []
+    num_tokens = 0
+    for ix in order:
+        length = lengths[ix]
+        if bucket:
+            # sequences are sorted, so `length` is the new longest one
+            padded_size = length * (len(bucket) + 1)
+            padding_ratio = (
+                1 - (num_tokens + length) / padded_size if padded_size else 0.0
+            )
+            if (
+                max_batch_size is not None and len(bucket) >= max_batch_size
+            ) or (
+                max_padding_ratio is not None
+                and padding_ratio > max_padding_ratio
+            ):
+                buckets.append(bucket)
+                bucket, num_tokens = [], 0
+        bucket.append(ix)
+        num_tokens += length
+    if bucket:
+        buckets.append(bucket)
+    return buckets
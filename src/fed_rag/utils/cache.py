@@ -0,0 +1,317 @@
+"""Caching utilities."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Generic, Hashable, NamedTuple, TypeVar
+
+import torch
+
+if TYPE_CHECKING:  # pragma: no cover
+    from fed_rag.base.knowledge_store import (
+        BaseAsyncKnowledgeStore,
+        BaseKnowledgeStore,
+    )
+    from fed_rag.base.retriever import BaseRetriever
+    from fed_rag.data_structures.rag import SourceNode
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a cache, in the style of `functools.lru_cache`."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe, bounded least-recently-used cache.
+
+    Entries can optionally expire `ttl` seconds after they were added.
+    Expired entries count as misses and are evicted on access.
+
+    Args:
+        maxsize (int): Maximum number of entries kept in the cache.
+        ttl (float | None): Optional time-to-live of entries, in seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        if maxsize < 1:
+            raise ValueError("`maxsize` must be a positive integer.")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("`ttl` must be positive.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        with self._lock:
+            return self._lookup(key) is not None
+
+    def _lookup(self, key: K) -> tuple[float, V] | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        """Get the value cached for `key`, recording a hit or a miss."""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: K, value: V) -> None:
+        """Cache `value` for `key`, evicting the least recently used entry."""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries. Hit and miss counters are kept."""
+        with self._lock:
+            self._data.clear()
+
+    def cache_info(self) -> CacheInfo:
+        """Return the hit/miss statistics of the cache."""
+        with self._lock:
+            return CacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                maxsize=self.maxsize,
+                currsize=len(self._data),
+            )
+
+
+def parameters_fingerprint(*modules: Any) -> tuple[tuple[int, int], ...]:
+    """Fingerprint the identity and weights of torch modules.
+
+    The fingerprint combines each module's identity with the sum of the
+    version counters of its parameters, which torch increments on every
+    in-place update, e.g. an optimizer step or `load_state_dict`. It thus
+    changes whenever the weights change, without hashing them.
+
+    Args:
+        *modules (Any): The modules to fingerprint. Values that are not
+            `torch.nn.Module` (e.g., `None`) are ignored.
+
+    Returns:
+        tuple[tuple[int, int], ...]: The fingerprint.
+    """
+    fingerprint = []
+    for module in modules:
+        if not isinstance(module, torch.nn.Module):
+            continue
+        version = 0
+        for param in module.parameters():
+            try:
+                version += param._version
+            except RuntimeError:  # inference tensors don't track versions
+                continue
+        fingerprint.append((id(module), version))
+    return tuple(fingerprint)
+
+
+def retriever_fingerprint(retriever: "BaseRetriever") -> tuple:
+    """Fingerprint the identity and query-encoder weights of a retriever."""
+    return (id(retriever),) + parameters_fingerprint(
+        retriever.encoder, retriever.query_encoder
+    )
+
+
+class QueryEmbeddingCache:
+    """LRU cache of query embeddings for a retriever.
+
+    Embeddings of string queries are cached keyed on the query text. The
+    cache is tied to the identity and weights of the retriever's query
+    encoder (see `parameters_fingerprint`) and is cleared as soon as these
+    change, e.g. after a retriever training step. Cached embeddings are
+    detached from the autograd graph.
+
+    Args:
+        maxsize (int): Maximum number of cached query embeddings.
+        ttl (float | None): Optional time-to-live of entries, in seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.cache: LRUCache[str, torch.Tensor] = LRUCache(maxsize, ttl=ttl)
+        self._fingerprint: tuple | None = None
+        self._lock = threading.Lock()
+
+    def _check_retriever(self, retriever: "BaseRetriever") -> None:
+        """Clear the cache if the retriever or its weights have changed."""
+        fingerprint = retriever_fingerprint(retriever)
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self.cache.clear()
+                self._fingerprint = fingerprint
+
+    def encode_query(self, retriever: "BaseRetriever", query: Any) -> Any:
+        """Encode a query with `retriever`, using cached embeddings.
+
+        Args:
+            retriever (BaseRetriever): The retriever used on cache misses.
+            query (Any): The query. Only string queries are cached.
+
+        Returns:
+            Any: The query embedding.
+        """
+        if not isinstance(query, str):
+            return retriever.encode_query(query)
+
+        self._check_retriever(retriever)
+        query_emb = self.cache.get(query)
+        if query_emb is not None:
+            return query_emb
+
+        query_emb = retriever.encode_query(query)
+        if isinstance(query_emb, torch.Tensor):
+            query_emb = query_emb.detach()
+            if query_emb.dim() == 2 and query_emb.shape[0] == 1:
+                query_emb = query_emb[0]
+            self.cache.put(query, query_emb)
+        return query_emb
+
+    def batch_encode_query(
+        self, retriever: "BaseRetriever", queries: list[Any]
+    ) -> Any:
+        """Encode a batch of queries, encoding only the cache misses.
+
+        Args:
+            retriever (BaseRetriever): The retriever used on cache misses.
+            queries (list[Any]): The queries. Only string queries are cached.
+
+        Returns:
+            Any: The query embeddings, stacked in a 2D tensor whenever the
+                retriever's output could be split into per-query rows.
+        """
+        if not queries or not all(isinstance(q, str) for q in queries):
+            return retriever.encode_query(queries)
+
+        self._check_retriever(retriever)
+        query_embs = {q: self.cache.get(q) for q in queries}
+        misses = [q for q, emb in query_embs.items() if emb is None]
+        if misses:
+            miss_embs = retriever.encode_query(misses)
+            if not (
+                isinstance(miss_embs, torch.Tensor)
+                and miss_embs.dim() == 2
+                and miss_embs.shape[0] == len(misses)
+            ):
+                # can't split the result into rows, so don't cache it
+                if len(misses) == len(queries):
+                    return miss_embs
+                return retriever.encode_query(queries)
+            for query, query_emb in zip(misses, miss_embs.detach()):
+                query_embs[query] = query_emb
+                self.cache.put(query, query_emb)
+        return torch.stack([query_embs[q] for q in queries])
+
+    def cache_info(self) -> CacheInfo:
+        """Return the hit/miss statistics of the cache."""
+        return self.cache.cache_info()
+
+    def clear(self) -> None:
+        """Remove all cached embeddings."""
+        self.cache.clear()
+
+
+class RetrievalCache:
+    """LRU cache of retrieval results.
+
+    Results are cached keyed on the query text and `top_k`. The cache is tied
+    to the retriever (see `retriever_fingerprint`) and to the identity and
+    `version` of the knowledge store, which is incremented on every
+    modification of the store. Whenever any of these change, all cached
+    results are dropped, so stale results are never served.
+
+    Args:
+        maxsize (int): Maximum number of cached retrieval results.
+        ttl (float | None): Optional time-to-live of entries, in seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.cache: LRUCache[tuple[str, int], list["SourceNode"]] = LRUCache(
+            maxsize, ttl=ttl
+        )
+        self._state: tuple | None = None
+        self._lock = threading.Lock()
+
+    def check_state(
+        self,
+        retriever: "BaseRetriever",
+        knowledge_store: "BaseKnowledgeStore | BaseAsyncKnowledgeStore",
+    ) -> tuple:
+        """Clear the cache if the retriever or knowledge store have changed.
+
+        Returns:
+            tuple: The current state, to be passed to `put`.
+        """
+        state = (
+            retriever_fingerprint(retriever),
+            id(knowledge_store),
+            knowledge_store.version,
+        )
+        with self._lock:
+            if state != self._state:
+                self.cache.clear()
+                self._state = state
+        return state
+
+    def get(self, query: str, top_k: int) -> list["SourceNode"] | None:
+        """Get the cached retrieval result for `query`, if any.
+
+        Returned source nodes are copies, so their `score` and `node` can be
+        reassigned without affecting the cache. The knowledge nodes are
+        shared with the cache and must not be modified in place.
+        """
+        source_nodes = self.cache.get((query, top_k))
+        if source_nodes is None:
+            return None
+        return [s.model_copy() for s in source_nodes]
+
+    def put(
+        self,
+        query: str,
+        top_k: int,
+        source_nodes: list["SourceNode"],
+        state: tuple,
+    ) -> None:
+        """Cache a retrieval result computed in the given `state`.
+
+        Results computed in a state that is no longer current are dropped.
+        """
+        source_nodes = [s.model_copy() for s in source_nodes]
+        # hold the lock while writing, so that a concurrent `check_state`
+        # cannot clear the cache between the state check and the write
+        with self._lock:
+            if state != self._state:
+                return
+            self.cache.put((query, top_k), source_nodes)
+
+    def cache_info(self) -> CacheInfo:
+        """Return the hit/miss statistics of the cache."""
+        return self.cache.cache_info()
+
+    def clear(self) -> None:
+        """Remove all cached retrieval results."""
+        self.cache.clear()
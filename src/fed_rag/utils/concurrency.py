@@ -0,0 +1,87 @@
+"""Threading utilities for pipelining producer/consumer stages."""
+
+import queue
+import threading
+from typing import Any, Callable, Generator, Iterable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_POLL_INTERVAL = 0.1
+_DONE = object()
+
+
+class _StageError:
+    """Wrapper used to hand an exception from a worker thread to the consumer."""
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def threaded_map(
+    fn: Callable[[T], R],
+    iterable: Iterable[T],
+    max_queue_size: int = 1,
+) -> Generator[R, None, None]:
+    """Lazily apply `fn` to the items of `iterable` in a background thread.
+
+    Results are handed to the consumer through a bounded queue so that the
+    producer runs at most `max_queue_size` items ahead of the consumer. Stages
+    can be chained (i.e., the output of one `threaded_map` fed as the input of
+    another) to overlap e.g. I/O, encoding and uploading.
+
+    Exceptions raised by `fn` or by the underlying iterable are re-raised in
+    the consuming thread. Closing the returned iterator early stops the
+    background thread and closes the upstream iterator.
+
+    Args:
+        fn (Callable[[T], R]): The function to apply to each item.
+        iterable (Iterable[T]): The items to process.
+        max_queue_size (int): Maximum number of results buffered ahead of
+            the consumer. Defaults to 1.
+
+    Yields:
+        R: The results of `fn`, in the order of `iterable`.
+    """
+    if max_queue_size < 1:
+        raise ValueError("`max_queue_size` must be a positive integer.")
+
+    buffer: queue.Queue = queue.Queue(maxsize=max_queue_size)
+    stop_event = threading.Event()
+
+    def _put(item: Any) -> bool:
+        while not stop_event.is_set():
+            try:
+                buffer.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _worker() -> None:
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if stop_event.is_set() or not _put(fn(item)):
+                    return
+            _put(_DONE)
+        except BaseException as e:
+            _put(_StageError(e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=_worker, daemon=True)
+    thread.start()
+    try:
+        while True:
+            result = buffer.get()
+            if result is _DONE:
+                break
+            if isinstance(result, _StageError):
+                raise result.exc
+            yield result
+    finally:
+        stop_event.set()
+        thread.join()
@@ -1,3 +1,11 @@
-from ._functions import build_finetune_dataset
+from ._functions import (
+    build_finetune_dataset,
+    get_retrieved_contexts,
+    precompute_retrievals,
+)
 
-__all__ = ["build_finetune_dataset"]
+__all__ = [
+    "build_finetune_dataset",
+    "get_retrieved_contexts",
+    "precompute_retrievals",
+]
@@ -1,15 +1,43 @@
 """Data utils"""
 
+import itertools
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from enum import Enum
-from typing import Any, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, TypeVar
 
+import pyarrow as pa
 import torch
 from typing_extensions import assert_never
 
 from fed_rag import RAGSystem
+from fed_rag.base.tokenizer import BaseTokenizer
+from fed_rag.core.no_encode_rag_system import NoEncodeRAGSystem
 from fed_rag.utils.data.finetuning_datasets import PyTorchRAGFinetuningDataset
 
+if TYPE_CHECKING:  # pragma: no cover
+    from datasets import Dataset
+
 DEFAULT_FINETUNE_EXAMPLE_TEMPLATE = "{query} {context} {answer}"
+DEFAULT_RETRIEVAL_BATCH_SIZE = 64
+DEFAULT_FINETUNE_SHARD_SIZE = 1024
+
+T = TypeVar("T")
+
+# schema of the Arrow shards written by `build_finetune_dataset`
+_FINETUNE_SCHEMA = pa.schema(
+    [
+        ("input_ids", pa.list_(pa.int64())),
+        ("target_ids", pa.list_(pa.int64())),
+        ("attention_mask", pa.list_(pa.int64())),
+    ]
+)
+
+# columns added by `precompute_retrievals`
+RETRIEVED_NODE_IDS_KEY = "retrieved_node_ids"
+RETRIEVED_SCORES_KEY = "retrieved_scores"
+RETRIEVED_CONTEXTS_KEY = "retrieved_contexts"
 
 
 class ReturnType(str, Enum):
@@ -18,16 +46,108 @@ class ReturnType(str, Enum):
     TEXT = "txt"
 
 
+def _iter_chunks(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _build_finetune_texts(
+    rag_system: RAGSystem,
+    examples: list[dict],
+    finetune_example_template: str,
+    query_key: str,
+    answer_key: str,
+    batch_size: int,
+) -> list[str]:
+    """Build the fine-tuning texts of examples, retrieving in batches."""
+    texts: list[str] = []
+    for batch in _iter_chunks(examples, batch_size):
+        source_nodes_list = rag_system.batch_retrieve(
+            [example[query_key] for example in batch]
+        )
+        # parallel in-context retrieval-augmentation creates
+        # top_k separated finetuning instances
+        texts.extend(
+            finetune_example_template.format(
+                query=example[query_key],
+                answer=example[answer_key],
+                context=source.node.text_content,
+            )
+            for example, source_nodes in zip(batch, source_nodes_list)
+            for source in source_nodes
+        )
+    return texts
+
+
+def _tokenize_shard(
+    tokenizer: BaseTokenizer,
+    texts: list[str],
+    eos_token_id: int,
+    encode_kwargs: dict[str, Any],
+    path: str | None = None,
+) -> dict[str, list] | str:
+    """Tokenize the texts of a shard, and write them to `path` if given."""
+    encode_results = tokenizer.batch_encode(texts, **encode_kwargs)
+    input_ids = [r["input_ids"] for r in encode_results]
+    columns: dict[str, list] = {
+        "input_ids": input_ids,
+        "target_ids": [ids[1:] + [eos_token_id] for ids in input_ids],
+        "attention_mask": [r["attention_mask"] for r in encode_results],
+    }
+    if path is None:
+        return columns
+
+    table = pa.table(columns, schema=_FINETUNE_SCHEMA)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return path
+
+
 def build_finetune_dataset(
     rag_system: RAGSystem,
-    examples: Sequence[dict],
+    examples: Iterable[dict],
     eos_token_id: int,
     finetune_example_template: str = DEFAULT_FINETUNE_EXAMPLE_TEMPLATE,
     query_key: str = "query",
     answer_key: str = "answer",
     return_dataset: ReturnType = ReturnType.PYTORCH,
+    max_length: int | None = None,
+    batch_size: int = DEFAULT_RETRIEVAL_BATCH_SIZE,
+    shard_size: int = DEFAULT_FINETUNE_SHARD_SIZE,
+    num_proc: int | None = None,
+    output_dir: str | Path | None = None,
 ) -> Any:
-    """Generates the finetuning dataset using the supplied rag_system and examples."""
+    """Generates the finetuning dataset using the supplied rag_system and examples.
+
+    Examples are processed in shards of `shard_size` examples. The queries
+    of a shard are retrieved in batches of `batch_size` with
+    `rag_system.batch_retrieve`, and the texts of its fine-tuning instances
+    are tokenized with a single `batch_encode` call, truncated to
+    `max_length` tokens if given. With `num_proc > 1`, shards are tokenized
+    in a pool of processes while the next shards are retrieved.
+
+    With `return_dataset="hf"` and an `output_dir`, the token ids of every
+    shard are written to an Arrow file of `output_dir`, and the returned
+    dataset is memory-mapped from these files, so that the fine-tuning set
+    never needs to fit in memory.
+
+    Args:
+        rag_system (RAGSystem): The RAG system to retrieve with.
+        examples (Iterable[dict]): The examples, with a query and an answer.
+        eos_token_id (int): The token id ending the target ids.
+        finetune_example_template (str): Template of fine-tuning texts.
+        query_key (str): The key holding the queries. Defaults to "query".
+        answer_key (str): The key holding the answers. Defaults to "answer".
+        return_dataset (ReturnType): The type of dataset to return.
+        max_length (int | None): Maximum number of tokens per instance.
+        batch_size (int): Number of queries retrieved together.
+        shard_size (int): Number of examples per shard.
+        num_proc (int | None): Number of processes tokenizing shards.
+        output_dir (str | Path | None): Directory to write the Arrow shards
+            of a "hf" dataset to.
+    """
 
     if (
         isinstance(return_dataset, str)
@@ -36,41 +156,76 @@ def build_finetune_dataset(
         raise ValueError(
             "Invalid `return_type` specified."
         )  # TODO: give a proper exception to this
+    if output_dir is not None and return_dataset != ReturnType.HUGGINGFACE:
+        raise ValueError(
+            "`output_dir` is only supported with `return_dataset='hf'`."
+        )
 
-    inputs_list = []
-    targets_list = []
-    attention_mask_list = []
-    finetuning_instances = []
-    for example in examples:
-        # retrieve
-        source_nodes = rag_system.retrieve(query=example[query_key])
-        total_sum_scores = sum(s.score for s in source_nodes)
+    shards = (
+        _build_finetune_texts(
+            rag_system,
+            shard_examples,
+            finetune_example_template,
+            query_key,
+            answer_key,
+            batch_size,
+        )
+        for shard_examples in _iter_chunks(examples, shard_size)
+    )
 
-        # parallel in-context retrieval-augmentation creates
-        # top_k separated finetuning instances
-        for source in source_nodes:
-            finetune_instance_text = finetune_example_template.format(
-                query=example[query_key],
-                answer=example[answer_key],
-                context=source.node.get_content()["text_content"],
-            )
-            finetuning_instances.append(finetune_instance_text)
-            _weight = source.score / total_sum_scores
+    if return_dataset == ReturnType.TEXT:
+        return list(itertools.chain.from_iterable(shards))
 
-            # tokenize to get input_ids and target_ids
-            tokenizer = rag_system.generator.tokenizer
-            encode_result = tokenizer.encode(finetune_instance_text)
-            input_ids = encode_result["input_ids"]
-            attention_mask = encode_result["attention_mask"]
-            target_ids = input_ids[1:] + [eos_token_id]
+    # tokenize to get input_ids and target_ids
+    tokenizer = rag_system.generator.tokenizer
+    encode_kwargs = (
+        {"truncation": True, "max_length": max_length}
+        if max_length is not None
+        else {}
+    )
+    if output_dir is not None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
 
-            inputs_list.append(input_ids)
-            targets_list.append(target_ids)
-            attention_mask_list.append(attention_mask)
+    def _shard_args(ix: int, texts: list[str]) -> tuple:
+        path = (
+            str(output_dir / f"shard-{ix:05d}.arrow")
+            if output_dir is not None
+            else None
+        )
+        return tokenizer, texts, eos_token_id, encode_kwargs, path
 
-    if return_dataset == ReturnType.TEXT:
-        return finetuning_instances
-    elif return_dataset == ReturnType.PYTORCH:
+    results: list[Any] = []
+    if num_proc is not None and num_proc > 1:
+        with ProcessPoolExecutor(max_workers=num_proc) as executor:
+            pending: deque[Future] = deque()
+            for ix, texts in enumerate(shards):
+                # bound the number of shards held in memory
+                if len(pending) >= 2 * num_proc:
+                    results.append(pending.popleft().result())
+                pending.append(
+                    executor.submit(_tokenize_shard, *_shard_args(ix, texts))
+                )
+            results.extend(future.result() for future in pending)
+    else:
+        results = [
+            _tokenize_shard(*_shard_args(ix, texts))
+            for ix, texts in enumerate(shards)
+        ]
+
+    if output_dir is not None:
+        # needs `fed-rag[huggingface]` extra to be installed
+        from fed_rag.utils.data.finetuning_datasets.huggingface import (
+            HuggingFaceRAGFinetuningDataset,
+        )
+
+        return HuggingFaceRAGFinetuningDataset.from_arrow_files(results)
+
+    inputs_list = [ids for r in results for ids in r["input_ids"]]
+    targets_list = [ids for r in results for ids in r["target_ids"]]
+    attention_mask_list = [m for r in results for m in r["attention_mask"]]
+
+    if return_dataset == ReturnType.PYTORCH:
         return PyTorchRAGFinetuningDataset(
             input_ids=[torch.Tensor(el) for el in inputs_list],
             target_ids=[torch.Tensor(el) for el in targets_list],
@@ -89,3 +244,85 @@ def build_finetune_dataset(
         )
     else:
         assert_never(return_dataset)  # pragma: no cover
+
+
+def precompute_retrievals(
+    rag_system: RAGSystem | NoEncodeRAGSystem,
+    dataset: "Dataset",
+    query_key: str = "query",
+    batch_size: int = DEFAULT_RETRIEVAL_BATCH_SIZE,
+    **map_kwargs: Any,
+) -> "Dataset":
+    """Retrieve for every example of a dataset ahead of training.
+
+    Queries are retrieved in batches with `rag_system.batch_retrieve`, and
+    the ids, scores and text contents of the retrieved nodes are stored as
+    the `retrieved_node_ids`, `retrieved_scores` and `retrieved_contexts`
+    columns of the returned ~datasets.Dataset, which are backed by Arrow
+    (and memory-mapped for datasets loaded from disk).
+
+    Data collators that find these columns in their features use them
+    instead of retrieving. This takes retrieval off the critical path of
+    training steps, but is only appropriate while the retriever and
+    knowledge store are frozen.
+
+    Args:
+        rag_system (RAGSystem | NoEncodeRAGSystem): The RAG system to
+            retrieve with.
+        dataset (Dataset): The dataset of examples.
+        query_key (str): The column holding the queries. Defaults to "query".
+        batch_size (int): Number of queries retrieved together.
+        **map_kwargs (Any): Additional keyword arguments passed to
+            `dataset.map`, e.g. `cache_file_name`.
+
+    Returns:
+        Dataset: The dataset with the retrieval columns added.
+    """
+
+    def _retrieve_batch(batch: dict[str, list[Any]]) -> dict[str, list[Any]]:
+        source_nodes_list = rag_system.batch_retrieve(batch[query_key])
+        return {
+            RETRIEVED_NODE_IDS_KEY: [
+                [s.node.node_id for s in source_nodes]
+                for source_nodes in source_nodes_list
+            ],
+            RETRIEVED_SCORES_KEY: [
+                [s.score for s in source_nodes]
+                for source_nodes in source_nodes_list
+            ],
+            RETRIEVED_CONTEXTS_KEY: [
+                [s.node.text_content for s in source_nodes]
+                for source_nodes in source_nodes_list
+            ],
+        }
+
+    return dataset.map(
+        _retrieve_batch, batched=True, batch_size=batch_size, **map_kwargs
+    )
+
+
+def get_retrieved_contexts(
+    rag_system: RAGSystem | NoEncodeRAGSystem,
+    example: dict[str, Any],
+    query_key: str = "query",
+) -> tuple[list[str | None], list[float]]:
+    """Get the retrieved contexts and scores of an example.
+
+    Uses the columns added by `precompute_retrievals` when present, and
+    otherwise retrieves with the RAG system.
+
+    Returns:
+        tuple[list[str | None], list[float]]: The text contents and scores
+            of the retrieved nodes.
+    """
+    if RETRIEVED_CONTEXTS_KEY in example and RETRIEVED_SCORES_KEY in example:
+        return (
+            list(example[RETRIEVED_CONTEXTS_KEY]),
+            list(example[RETRIEVED_SCORES_KEY]),
+        )
+
+    source_nodes = rag_system.retrieve(example[query_key])
+    return (
+        [s.node.text_content for s in source_nodes],
+        [s.score for s in source_nodes],
+    )
@@ -1,12 +1,14 @@
 """HuggingFace RAG Finetuning Dataset"""
 
+from pathlib import Path
+
 from typing_extensions import Self
 
 from fed_rag.exceptions.common import MissingExtraError
 
 # check if huggingface extra was installed
 try:
-    from datasets import Dataset
+    from datasets import Dataset, concatenate_datasets
 except ModuleNotFoundError:
     msg = (
         "`HuggingFaceRAGFinetuningDataset` requires the `huggingface` extra to be installed. "
@@ -32,3 +34,15 @@ class HuggingFaceRAGFinetuningDataset(Dataset):
                 "attention_mask": attention_mask,
             }
         )
+
+    @classmethod
+    def from_arrow_files(cls, paths: list[str] | list[Path]) -> Self:
+        """Memory-map a dataset from Arrow stream files, e.g., shards."""
+        if not paths:
+            return cls.from_inputs(
+                input_ids=[], target_ids=[], attention_mask=[]
+            )
+        dataset = concatenate_datasets(
+            [Dataset.from_file(str(path)) for path in paths]
+        )
+        return cls(dataset.data)
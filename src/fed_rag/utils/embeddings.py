@@ -0,0 +1,44 @@
+"""Helpers for working with embeddings in their different representations."""
+
+from typing import Sequence, TypeAlias
+
+import numpy as np
+import torch
+
+EmbeddingLike: TypeAlias = list[float] | np.ndarray | torch.Tensor
+"""An embedding as a Python list, numpy array or torch tensor."""
+
+EmbeddingBatchLike: TypeAlias = (
+    Sequence[EmbeddingLike] | np.ndarray | torch.Tensor
+)
+"""A batch of embeddings as a sequence of embeddings or a 2D array/tensor."""
+
+
+def embedding_to_numpy(
+    embedding: EmbeddingLike, dtype: np.dtype | type | None = None
+) -> np.ndarray:
+    """Convert an embedding to a numpy array.
+
+    CPU tensors and numpy arrays of the requested dtype are returned without
+    copying.
+
+    Args:
+        embedding (EmbeddingLike): The embedding to convert.
+        dtype (np.dtype | type | None): Optional target dtype.
+
+    Returns:
+        np.ndarray: The embedding as a numpy array.
+    """
+    if isinstance(embedding, torch.Tensor):
+        embedding = embedding.detach().cpu().numpy()
+    return np.asarray(embedding, dtype=dtype)
+
+
+def embedding_to_list(embedding: EmbeddingLike) -> list[float]:
+    """Convert an embedding to a list of floats.
+
+    Only needed at boundaries with third-party APIs that require lists.
+    """
+    if isinstance(embedding, list):
+        return embedding
+    return embedding_to_numpy(embedding).tolist()  # type: ignore[no-any-return]
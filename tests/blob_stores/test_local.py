@@ -0,0 +1,103 @@
+import io
+import pickle
+import tempfile
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from fed_rag.base.blob_store import BaseBlobStore
+from fed_rag.blob_stores import LocalBlobStore
+from fed_rag.exceptions import BlobNotFoundError, InvalidBlobReferenceError
+
+
+@pytest.fixture
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), color="red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_local_blob_store_class() -> None:
+    names_of_base_classes = [b.__name__ for b in LocalBlobStore.__mro__]
+    assert BaseBlobStore.__name__ in names_of_base_classes
+
+
+def test_put_and_get() -> None:
+    with tempfile.TemporaryDirectory() as dirpath:
+        blob_store = LocalBlobStore(root_dir=dirpath)
+        ref = blob_store.put(b"mock_bytes")
+
+        assert blob_store.exists(ref)
+        assert blob_store.get(ref) == b"mock_bytes"
+        assert (Path(dirpath) / ref[:2] / ref[2:4] / ref).exists()
+
+
+def test_put_deduplicates_content() -> None:
+    with tempfile.TemporaryDirectory() as dirpath:
+        blob_store = LocalBlobStore(root_dir=dirpath)
+        ref = blob_store.put(b"mock_bytes")
+
+        assert blob_store.put(b"mock_bytes") == ref
+        assert blob_store.put(b"other_bytes") != ref
+        assert len([p for p in Path(dirpath).rglob("*") if p.is_file()]) == 2
+
+
+def test_delete() -> None:
+    with tempfile.TemporaryDirectory() as dirpath:
+        blob_store = LocalBlobStore(root_dir=dirpath)
+        ref = blob_store.put(b"mock_bytes")
+
+        assert blob_store.delete(ref)
+        assert not blob_store.exists(ref)
+        assert not blob_store.delete(ref)
+
+
+def test_get_missing_blob_raises_error() -> None:
+    with tempfile.TemporaryDirectory() as dirpath:
+        blob_store = LocalBlobStore(root_dir=dirpath)
+        ref = "0" * 64
+
+        with pytest.raises(BlobNotFoundError, match=f"Blob '{ref}' not found"):
+            blob_store.get(ref)
+
+
+def test_invalid_ref_raises_error() -> None:
+    blob_store = LocalBlobStore()
+
+    with pytest.raises(
+        InvalidBlobReferenceError, match="Invalid blob reference '../secret'"
+    ):
+        blob_store.get("../secret")
+
+
+def test_get_image_uses_lru_cache(png_bytes: bytes) -> None:
+    with tempfile.TemporaryDirectory() as dirpath:
+        blob_store = LocalBlobStore(root_dir=dirpath, image_cache_size=1)
+        ref = blob_store.put(png_bytes)
+        image = blob_store.get_image(ref)
+
+        assert image.size == (4, 4)
+        assert blob_store.get_image(ref) is image
+
+        # evicted once the cache is full
+        other_buffer = io.BytesIO()
+        Image.new("RGB", (2, 2)).save(other_buffer, format="PNG")
+        other_ref = blob_store.put(other_buffer.getvalue())
+        blob_store.get_image(other_ref)
+
+        assert list(blob_store._image_cache) == [other_ref]
+        assert blob_store.get_image(ref) is not image
+
+
+def test_pickling_drops_image_cache(png_bytes: bytes) -> None:
+    with tempfile.TemporaryDirectory() as dirpath:
+        blob_store = LocalBlobStore(root_dir=dirpath)
+        ref = blob_store.put(png_bytes)
+        blob_store.get_image(ref)
+
+        unpickled = pickle.loads(pickle.dumps(blob_store))
+
+        assert len(blob_store._image_cache) == 1
+        assert len(unpickled._image_cache) == 0
+        assert unpickled.get(ref) == png_bytes
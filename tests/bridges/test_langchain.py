@@ -483,17 +483,33 @@ def test_rag_llm_generate_multiple_queries(
     )
 
 
-def test_rag_llm_stream_not_implemented_error(
+def test_rag_llm_stream(
+    mock_rag_system: _RAGSystem,
+) -> None:
+    fedrag_llm = FedRAGLLM(mock_rag_system)
+
+    with patch.object(
+        type(mock_rag_system.generator),
+        "stream_generate",
+        return_value=iter(["Generated ", "response"]),
+    ) as mock_stream_generate:
+        chunks = list(fedrag_llm.stream(query_text))
+
+    assert chunks == ["Generated ", "response"]
+    mock_stream_generate.assert_called_once_with(query=query_text, context="")
+
+
+def test_rag_llm_stream_stop_sequences_error(
     mock_rag_system: _RAGSystem,
 ) -> None:
     fedrag_llm = FedRAGLLM(mock_rag_system)
     msg = (
-        "FedRAGLLM does not support streaming. "
+        "FedRAGLLM does not support stop sequences. "
         "Please use the generator directly if you need this feature."
     )
     with pytest.raises(
         BridgeError,
         match=re.escape(msg),
     ):
-        for _ in fedrag_llm.stream(query_text):
+        for _ in fedrag_llm.stream(query_text, stop=["stop"]):
             pass
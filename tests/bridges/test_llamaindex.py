@@ -229,16 +229,21 @@ def test_fedrag_llm_complete(mock_rag_system: _RAGSystem) -> None:
     assert response.text == "mock output from 'mock prompt' and ''."
 
 
-def test_fedrag_llm_stream_complete_raises_error(
-    mock_rag_system: _RAGSystem,
-) -> None:
+def test_fedrag_llm_stream_complete(mock_rag_system: _RAGSystem) -> None:
     llm = FedRAGManagedIndex.FedRAGLLM(mock_rag_system)
 
-    with pytest.raises(
-        NotImplementedError,
-        match="stream_complete is not implemented for FedRAGLLM.",
-    ):
-        llm.stream_complete(prompt="mock prompt")
+    with patch.object(
+        type(mock_rag_system.generator),
+        "stream_generate",
+        return_value=iter(["mock ", "output"]),
+    ) as mock_stream_generate:
+        responses = list(llm.stream_complete(prompt="mock prompt"))
+
+    assert [r.delta for r in responses] == ["mock ", "output"]
+    assert responses[-1].text == "mock output"
+    mock_stream_generate.assert_called_once_with(
+        query="mock prompt", context=""
+    )
 
 
 ## test methods with no implementation
@@ -200,7 +200,9 @@ def test_lsr_collator_with_mocks(
         "attention_mask": [1, 1, 1],
         "input_ids": [1, 2, 3],
     }
-    mock_tokenizer.encode.return_value = mock_encode_return
+    mock_tokenizer.batch_encode.side_effect = lambda texts, **kwargs: [
+        mock_encode_return for _ in texts
+    ]
     mock_tokenizer.unwrapped.pad_token_id = 42
     mock_tokenizer.unwrapped.pad_token = "<PAD>"
     rag_system.generator.tokenizer = mock_tokenizer
@@ -394,3 +396,131 @@ def test_lsr_collator_apply_padding_with_eos_token(
     }
     for k, v in batch.items():
         assert_close(v, expected[k])
+
+
+def test_lsr_collator_apply_padding_to_multiple_of(
+    mock_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+
+    # arrange collator
+    collator = DataCollatorForRALT(
+        rag_system=mock_rag_system, pad_to_multiple_of=4
+    )
+
+    # arrange mock tokenizer
+    mock_tokenizer = MagicMock()
+    mock_tokenizer.pad_token = "<PAD>"
+    mock_tokenizer.pad_token_id = 0
+
+    # act
+    batch = collator._apply_padding(
+        max_length=5,
+        inputs_list=[[1, 2, 3, 4, 5], [6, 7]],
+        attention_mask_list=[[1, 1, 1, 1, 1], [1, 1]],
+        tokenizer=mock_tokenizer,
+    )
+
+    # assert
+    expected = {
+        "input_ids": torch.tensor(
+            [[0, 0, 0, 1, 2, 3, 4, 5], [0, 0, 0, 0, 0, 0, 6, 7]]
+        ),
+        "attention_mask": torch.tensor(
+            [[0, 0, 0, 1, 1, 1, 1, 1], [0, 0, 0, 0, 0, 0, 1, 1]]
+        ).to(collator.model_dtype),
+        "labels": torch.tensor(
+            [
+                [-100, -100, -100, 1, 2, 3, 4, 5],
+                [-100, -100, -100, -100, -100, -100, 6, 7],
+            ]
+        ),
+    }
+    for k, v in batch.items():
+        assert_close(v, expected[k])
+
+
+def test_ralt_collator_tokenizes_batch_together(
+    mock_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+
+    # arrange mocks
+    mock_tokenizer = MagicMock()
+    mock_tokenizer.batch_encode.side_effect = lambda texts, **kwargs: [
+        {"input_ids": [1] * (ix + 1), "attention_mask": [1] * (ix + 1)}
+        for ix in range(len(texts))
+    ]
+    mock_tokenizer.unwrapped.pad_token_id = 0
+    mock_tokenizer.unwrapped.pad_token = "<PAD>"
+    mock_rag_system.generator.tokenizer = mock_tokenizer
+    collator = DataCollatorForRALT(
+        rag_system=mock_rag_system,
+        example_template="{query} {context} {response}",
+        max_seq_length=16,
+    )
+    features = [
+        {
+            "query": f"query {ix}",
+            "response": "response",
+            "retrieved_scores": [0.1, 0.2],
+            "retrieved_contexts": ["node 1", "node 2"],
+        }
+        for ix in range(2)
+    ]
+
+    # act
+    batch = collator(features)
+
+    mock_tokenizer.batch_encode.assert_called_once_with(
+        [
+            "query 0 node 1 response",
+            "query 0 node 2 response",
+            "query 1 node 1 response",
+            "query 1 node 2 response",
+        ],
+        truncation=True,
+        max_length=16,
+    )
+    mock_tokenizer.encode.assert_not_called()
+    assert batch["input_ids"].shape == (4, 4)
+
+
+def test_ralt_collator_defaults_missing_attention_mask(
+    mock_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+
+    # arrange mocks
+    mock_tokenizer = MagicMock()
+    mock_tokenizer.batch_encode.side_effect = lambda texts, **kwargs: [
+        {"input_ids": [1] * (ix + 1), "attention_mask": None}
+        for ix in range(len(texts))
+    ]
+    mock_tokenizer.unwrapped.pad_token_id = 0
+    mock_tokenizer.unwrapped.pad_token = "<PAD>"
+    mock_rag_system.generator.tokenizer = mock_tokenizer
+    collator = DataCollatorForRALT(
+        rag_system=mock_rag_system,
+        example_template="{query} {context} {response}",
+        max_seq_length=16,
+    )
+    features = [
+        {
+            "query": "query",
+            "response": "response",
+            "retrieved_scores": [0.1, 0.2],
+            "retrieved_contexts": ["node 1", "node 2"],
+        }
+    ]
+
+    # act
+    batch = collator(features)
+
+    assert_close(
+        batch["attention_mask"],
+        torch.tensor([[0, 1], [1, 1]]).to(torch.float32),
+    )
@@ -1,16 +1,16 @@
 import re
 import sys
-from unittest.mock import MagicMock, _Call, patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 import torch
 from pytest import MonkeyPatch
 from torch.testing import assert_close
 
-from fed_rag import RAGSystem
+from fed_rag import RAGSystem, RetrievalClient
 from fed_rag.data_collators.huggingface import DataCollatorForLSR
 from fed_rag.data_structures import KnowledgeNode, SourceNode
-from fed_rag.exceptions import MissingExtraError
+from fed_rag.exceptions import DataCollatorError, MissingExtraError
 from fed_rag.exceptions.core import FedRAGError
 from fed_rag.generators.huggingface import HFPeftModelGenerator
 from fed_rag.retrievers.huggingface.hf_sentence_transformer import (
@@ -173,11 +173,9 @@ def test_lsr_collator_with_mocks(
 
     # use mocks
     mock_generator = MagicMock()
-    mock_generator.compute_target_sequence_proba.side_effect = [
-        torch.tensor(0.01),
-        torch.tensor(0.02),
-        torch.tensor(0.03),
-    ]
+    mock_generator.batch_compute_target_sequence_log_proba.return_value = (
+        torch.log(torch.tensor([0.01, 0.02, 0.03]))
+    )
     rag_system.generator = mock_generator
 
     mock_retrieve.return_value = [
@@ -213,37 +211,197 @@ def test_lsr_collator_with_mocks(
         batch["retrieval_scores"], torch.tensor([0.1, 0.2, 0.3]).unsqueeze(0)
     )
     assert_close(
-        batch["lm_scores"], torch.tensor([0.01, 0.02, 0.03]).unsqueeze(0)
+        batch["lm_scores"],
+        torch.log(torch.tensor([0.01, 0.02, 0.03])).unsqueeze(0),
     )
     mock_retrieve.assert_called_once_with("mock query")
-    mock_generator.compute_target_sequence_proba.assert_has_calls(
-        [
-            _Call(
-                (
-                    (),
-                    {
-                        "prompt": "mock query node 1",
-                        "target": "\n<response>\nmock response\n</response>\n",
-                    },
-                )
-            ),
-            _Call(
-                (
-                    (),
-                    {
-                        "prompt": "mock query node 2",
-                        "target": "\n<response>\nmock response\n</response>\n",
-                    },
-                )
-            ),
-            _Call(
-                (
-                    (),
-                    {
-                        "prompt": "mock query node 3",
-                        "target": "\n<response>\nmock response\n</response>\n",
-                    },
-                )
-            ),
-        ]
+    mock_generator.batch_compute_target_sequence_log_proba.assert_called_once_with(
+        prompts=[
+            "mock query node 1",
+            "mock query node 2",
+            "mock query node 3",
+        ],
+        targets=["\n<response>\nmock response\n</response>\n"] * 3,
+    )
+
+
+@patch.object(RAGSystem, "retrieve")
+def test_lsr_collator_with_precomputed_retrievals(
+    mock_retrieve: MagicMock,
+    mock_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+    rag_system = RAGSystem(
+        generator=mock_rag_system.generator,
+        retriever=mock_rag_system.retriever,
+        knowledge_store=mock_rag_system.knowledge_store,
+        rag_config=mock_rag_system.rag_config,
+    )
+    mock_generator = MagicMock()
+    mock_generator.batch_compute_target_sequence_log_proba.return_value = (
+        torch.log(torch.tensor([0.01, 0.02]))
+    )
+    rag_system.generator = mock_generator
+    collator = DataCollatorForLSR(
+        rag_system=rag_system, prompt_template="{query} {context}"
+    )
+
+    # act
+    features = [
+        {
+            "query": "mock query",
+            "response": "mock response",
+            "retrieved_scores": [0.1, 0.2],
+            "retrieved_contexts": ["node 1", "node 2"],
+        }
+    ]
+    batch = collator(features)
+
+    mock_retrieve.assert_not_called()
+    assert batch["query_texts"] == ["mock query"]
+    assert batch["context_texts"] == [["node 1", "node 2"]]
+    assert_close(
+        batch["retrieval_scores"], torch.tensor([0.1, 0.2]).unsqueeze(0)
+    )
+    assert mock_generator.batch_compute_target_sequence_log_proba.call_args.kwargs[
+        "prompts"
+    ] == [
+        "mock query node 1",
+        "mock query node 2",
+    ]
+
+
+def test_lsr_collator_scores_batch_together(
+    mock_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+    collator = DataCollatorForLSR(
+        rag_system=mock_rag_system, prompt_template="{query} {context}"
+    )
+    features = [
+        {
+            "query": f"mock query {ix}",
+            "response": "mock response",
+            "retrieved_scores": [0.1, 0.2],
+            "retrieved_contexts": ["node 1", "node 2"],
+        }
+        for ix in range(3)
+    ]
+
+    with patch.object(
+        type(mock_rag_system.generator),
+        "batch_compute_target_sequence_log_proba",
+        wraps=mock_rag_system.generator.batch_compute_target_sequence_log_proba,
+    ) as spy:
+        batch = collator(features)
+
+    spy.assert_called_once()
+    assert len(spy.call_args.kwargs["prompts"]) == 6
+    assert batch["retrieval_scores"].shape == (3, 2)
+    assert_close(batch["lm_scores"], torch.full((3, 2), 0.42).log())
+
+
+def test_lsr_collator_pads_ragged_retrievals(
+    mock_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+    collator = DataCollatorForLSR(
+        rag_system=mock_rag_system, prompt_template="{query} {context}"
+    )
+    features = [
+        {
+            "query": "mock query 0",
+            "response": "mock response",
+            "retrieved_scores": [0.1, 0.2],
+            "retrieved_contexts": ["node 1", "node 2"],
+        },
+        {
+            "query": "mock query 1",
+            "response": "mock response",
+            "retrieved_scores": [0.3],
+            "retrieved_contexts": ["node 3"],
+        },
+    ]
+
+    batch = collator(features)
+
+    assert batch["num_contexts"] == [2, 1]
+    assert batch["context_texts"] == [["node 1", "node 2"], ["node 3"]]
+    assert_close(
+        batch["retrieval_scores"], torch.tensor([[0.1, 0.2], [0.3, 0.0]])
+    )
+    assert_close(
+        batch["lm_scores"],
+        torch.tensor([[0.42, 0.42], [0.42, 1.0]]).log(),
+    )
+
+
+def test_lsr_collator_raises_error_without_contexts(
+    mock_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+    collator = DataCollatorForLSR(rag_system=mock_rag_system)
+    features = [
+        {
+            "query": "mock query",
+            "response": "mock response",
+            "retrieved_scores": [],
+            "retrieved_contexts": [],
+        }
+    ]
+
+    with pytest.raises(
+        DataCollatorError,
+        match="No contexts were retrieved for query 'mock query'.",
+    ):
+        collator(features)
+
+
+@patch.object(RAGSystem, "retrieve")
+def test_lsr_collator_with_retrieval_client(
+    mock_retrieve: MagicMock,
+    mock_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+    client = MagicMock(spec=RetrievalClient)
+    client.retrieve.return_value = [
+        (["node 1", "node 2"], [0.1, 0.2]),
+        (["node 3", "node 4"], [0.3, 0.4]),
+    ]
+    client.batch_compute_target_sequence_log_proba.return_value = torch.log(
+        torch.tensor([0.1, 0.2, 0.3, 0.4])
+    )
+    collator = DataCollatorForLSR(
+        rag_system=mock_rag_system,
+        prompt_template="{query} {context}",
+        retrieval_client=client,
+    )
+    features = [
+        {"query": f"mock query {ix}", "response": "mock response"}
+        for ix in range(2)
+    ]
+
+    batch = collator(features)
+
+    mock_retrieve.assert_not_called()
+    client.retrieve.assert_called_once_with(["mock query 0", "mock query 1"])
+    assert client.batch_compute_target_sequence_log_proba.call_args.kwargs[
+        "prompts"
+    ] == [
+        "mock query 0 node 1",
+        "mock query 0 node 2",
+        "mock query 1 node 3",
+        "mock query 1 node 4",
+    ]
+    assert batch["context_texts"] == [
+        ["node 1", "node 2"],
+        ["node 3", "node 4"],
+    ]
+    assert_close(
+        batch["lm_scores"], torch.log(torch.tensor([[0.1, 0.2], [0.3, 0.4]]))
     )
@@ -1,4 +1,7 @@
-from fed_rag import RAGSystem
+import pickle
+from unittest.mock import MagicMock
+
+from fed_rag import RAGSystem, RetrievalClient
 
 from .conftest import MockDataCollator
 
@@ -17,3 +20,41 @@ def test_collate(mock_rag_system: RAGSystem) -> None:
 
     assert collator.rag_system == mock_rag_system
     assert res == "collated!"
+
+
+def test_get_retrieved_contexts_with_retrieval_client(
+    mock_rag_system: RAGSystem,
+) -> None:
+    client = MagicMock(spec=RetrievalClient)
+    client.retrieve.return_value = [(["context 1"], [0.5])]
+    collator = MockDataCollator(
+        rag_system=mock_rag_system, retrieval_client=client
+    )
+    features = [
+        {
+            "query": "precomputed",
+            "retrieved_contexts": ["node 1"],
+            "retrieved_scores": [0.1],
+        },
+        {"query": "mock query"},
+    ]
+
+    results = collator.get_retrieved_contexts(features)
+
+    client.retrieve.assert_called_once_with(["mock query"])
+    assert results == [(["node 1"], [0.1]), (["context 1"], [0.5])]
+
+
+def test_pickle_leaves_out_rag_system_with_retrieval_client(
+    mock_rag_system: RAGSystem,
+) -> None:
+    client = RetrievalClient(address=("127.0.0.1", 0), authkey=b"key")
+    collator = MockDataCollator(
+        rag_system=mock_rag_system, retrieval_client=client
+    )
+
+    unpickled = pickle.loads(pickle.dumps(collator))
+
+    assert unpickled.rag_system is None
+    assert unpickled.retrieval_client.address == ("127.0.0.1", 0)
+    assert collator.rag_system is mock_rag_system
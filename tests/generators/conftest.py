@@ -3,8 +3,10 @@ from typing import Any
 import pytest
 import torch
 from peft import LoraConfig, PeftModel, get_peft_model
-from tokenizers import Tokenizer, models
+from tokenizers import Tokenizer, models, pre_tokenizers
 from transformers import (
+    GPT2Config,
+    GPT2LMHeadModel,
     PretrainedConfig,
     PreTrainedModel,
     PreTrainedTokenizer,
@@ -54,6 +56,33 @@ def dummy_pretrained_model_and_tokenizer(
     return _TestHFPretrainedModel(_TestHFConfig()), dummy_tokenizer
 
 
+@pytest.fixture
+def tiny_causal_lm_and_tokenizer() -> (
+    tuple[PreTrainedModel, PreTrainedTokenizer]
+):
+    """A tiny, randomly initialized GPT-2 with a word-level tokenizer."""
+    words = ["[PAD]", "[EOS]"] + [f"w{ix}" for ix in range(30)]
+    vocab = {word: ix for ix, word in enumerate(words)}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[PAD]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    hf_tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, pad_token="[PAD]", eos_token="[EOS]"
+    )
+
+    torch.manual_seed(42)
+    config = GPT2Config(
+        vocab_size=len(vocab),
+        n_layer=1,
+        n_embd=16,
+        n_head=2,
+        n_positions=64,
+        pad_token_id=vocab["[PAD]"],
+        bos_token_id=vocab["[EOS]"],
+        eos_token_id=vocab["[EOS]"],
+    )
+    return GPT2LMHeadModel(config).eval(), hf_tokenizer
+
+
 @pytest.fixture
 def dummy_peft_model_and_tokenizer(
     dummy_tokenizer: PreTrainedTokenizer,
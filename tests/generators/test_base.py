@@ -1,3 +1,5 @@
+import torch
+
 from fed_rag.base.generator import BaseGenerator
 
 
@@ -16,3 +18,34 @@ def test_compute_target_sequence_proba(mock_generator: BaseGenerator) -> None:
         prompt="mock prompt", target="mock target"
     )
     assert proba == 0.42
+
+
+def test_stream_generate_default(mock_generator: BaseGenerator) -> None:
+    chunks = list(
+        mock_generator.stream_generate(query="hello", context="again")
+    )
+    assert chunks == ["mock output from 'hello' and 'again'."]
+
+
+def test_stream_complete_default(mock_generator: BaseGenerator) -> None:
+    chunks = list(mock_generator.stream_complete(prompt="hello again"))
+    assert chunks == ["mock completion output from 'hello again'."]
+
+
+def test_compute_target_sequence_log_proba_default(
+    mock_generator: BaseGenerator,
+) -> None:
+    log_proba = mock_generator.compute_target_sequence_log_proba(
+        prompt="mock prompt", target="mock target"
+    )
+    assert torch.allclose(log_proba, torch.log(torch.tensor(0.42)))
+
+
+def test_batch_compute_target_sequence_log_proba_default(
+    mock_generator: BaseGenerator,
+) -> None:
+    log_probas = mock_generator.batch_compute_target_sequence_log_proba(
+        prompts=["mock prompt", "another prompt"],
+        targets=["mock target", "another target"],
+    )
+    assert torch.allclose(log_probas, torch.log(torch.tensor([0.42, 0.42])))
@@ -181,7 +181,7 @@ def test_generate() -> None:
     mock_model.device = torch.device("cpu")
     mock_model.generate.return_value = torch.Tensor([[1, 2, 3]])
     mock_tokenizer_result = MagicMock()
-    mock_tokenizer_result.input_ids = torch.ones(2)
+    mock_tokenizer_result.input_ids = [[1, 2]]
     mock_tokenizer.batch_decode.return_value = ["Mock output"]
     mock_tokenizer.return_value = mock_tokenizer_result
     generator.tokenizer.unwrapped = mock_tokenizer
@@ -195,10 +195,7 @@ def test_generate() -> None:
     mock_model.generate.assert_called_once()
 
 
-@patch("fed_rag.generators.huggingface.mixin.F")
-def test_compute_target_sequence_proba(
-    mock_torch_functional: MagicMock,
-) -> None:
+def test_compute_target_sequence_proba() -> None:
     # arrange
     generator = HFPeftModelGenerator(
         model_name="fake_name",
@@ -210,11 +207,10 @@ def test_compute_target_sequence_proba(
         EncodeResult(input_ids=[0, 1, 2, 3, 4]),
         EncodeResult(input_ids=[0, 1, 2]),
     ]
-    mock_torch_functional.softmax.return_value = torch.tensor(
-        [0.2, 0.2, 0.2, 0.2, 0.2]
-    )
     mock_model = MagicMock()
     mock_model.device = torch.device("cpu")
+    # uniform next-token distribution over a vocab of 5 tokens
+    mock_model.return_value.logits = torch.zeros(1, 5, 5)
     generator.model = mock_model
     generator.tokenizer = mock_tokenizer
 
@@ -225,7 +221,6 @@ def test_compute_target_sequence_proba(
 
     mock_tokenizer.encode.assert_any_call("fake prompt fake target")
     mock_tokenizer.encode.assert_any_call("fake prompt")
-    assert mock_torch_functional.softmax.call_count == 2
     mock_model.assert_called_once()
     assert_close(result, torch.tensor(0.2**2))
 
@@ -0,0 +1,128 @@
+from unittest.mock import patch
+
+import pytest
+import torch
+from transformers import (
+    GenerationConfig,
+    PreTrainedModel,
+    PreTrainedTokenizer,
+)
+
+from fed_rag.base.generator import DEFAULT_PROMPT_TEMPLATE
+from fed_rag.generators.huggingface import HFPretrainedModelGenerator
+from fed_rag.generators.huggingface.prefix_cache import (
+    PromptPrefixCache,
+    template_prefix,
+)
+
+
+@pytest.mark.parametrize(
+    ("template", "expected"),
+    [
+        ("w1 w2 {query} w3 {context}", "w1 w2 "),
+        ("{query} and {context}", ""),
+        ("no placeholders", "no placeholders"),
+        ("", ""),
+    ],
+)
+def test_template_prefix(template: str, expected: str) -> None:
+    assert template_prefix(template) == expected
+
+
+def test_template_prefix_default_template() -> None:
+    prefix = template_prefix(DEFAULT_PROMPT_TEMPLATE)
+
+    assert DEFAULT_PROMPT_TEMPLATE.startswith(prefix)
+    assert prefix.endswith("<query>\n")
+
+
+def test_prefix_cache_computes_prefix_once(
+    tiny_causal_lm_and_tokenizer: tuple[PreTrainedModel, PreTrainedTokenizer],
+) -> None:
+    model, tokenizer = tiny_causal_lm_and_tokenizer
+    cache = PromptPrefixCache()
+    input_ids = tokenizer("w1 w2 w3 w4").input_ids
+
+    with patch.object(
+        PromptPrefixCache, "compute", wraps=PromptPrefixCache.compute
+    ) as mock_compute:
+        first = cache.get(model, tokenizer, "w1 w2", input_ids)
+        second = cache.get(model, tokenizer, "w1 w2", input_ids)
+
+    mock_compute.assert_called_once()
+    assert first is not second  # copies, as generate extends the cache
+    assert first.get_seq_length() == second.get_seq_length() == 2
+
+
+def test_prefix_cache_recomputes_on_weight_update(
+    tiny_causal_lm_and_tokenizer: tuple[PreTrainedModel, PreTrainedTokenizer],
+) -> None:
+    model, tokenizer = tiny_causal_lm_and_tokenizer
+    cache = PromptPrefixCache()
+    input_ids = tokenizer("w1 w2 w3 w4").input_ids
+
+    with patch.object(
+        PromptPrefixCache, "compute", wraps=PromptPrefixCache.compute
+    ) as mock_compute:
+        cache.get(model, tokenizer, "w1 w2", input_ids)
+        with torch.no_grad():
+            next(model.parameters()).add_(1.0)
+        cache.get(model, tokenizer, "w1 w2", input_ids)
+
+    assert mock_compute.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    ["w5 w1 w2 w3", "w1 w2"],
+    ids=["prefix_mismatch", "prompt_not_longer_than_prefix"],
+)
+def test_prefix_cache_skips_prompts_not_extending_prefix(
+    prompt: str,
+    tiny_causal_lm_and_tokenizer: tuple[PreTrainedModel, PreTrainedTokenizer],
+) -> None:
+    model, tokenizer = tiny_causal_lm_and_tokenizer
+    cache = PromptPrefixCache()
+
+    assert (
+        cache.get(model, tokenizer, "w1 w2", tokenizer(prompt).input_ids)
+        is None
+    )
+
+
+def test_generate_with_prefix_cache(
+    tiny_causal_lm_and_tokenizer: tuple[PreTrainedModel, PreTrainedTokenizer],
+) -> None:
+    # arrange
+    model, tokenizer = tiny_causal_lm_and_tokenizer
+    generator = HFPretrainedModelGenerator(
+        model_name="fake_name",
+        generation_config=GenerationConfig(max_new_tokens=4, do_sample=False),
+        prompt_template="w1 w2 w3 w4 w5 {query} w6 {context}",
+        load_model_at_init=False,
+        use_prefix_cache=True,
+    )
+    generator.tokenizer.unwrapped = tokenizer
+    generator.model = model
+    prefill_lengths = []
+    hook = model.register_forward_pre_hook(
+        lambda m, args, kwargs: prefill_lengths.append(
+            kwargs["input_ids"].shape[-1]
+        ),
+        with_kwargs=True,
+    )
+
+    # act
+    try:
+        cached = generator.generate(query="w7", context="w8")
+        streamed = "".join(generator.stream_generate(query="w7", context="w8"))
+    finally:
+        hook.remove()
+    generator.use_prefix_cache = False
+    uncached = generator.generate(query="w7", context="w8")
+
+    # assert
+    assert cached == uncached
+    assert streamed.split() == uncached.split()
+    # forward pass on the prefix, then prefill of the remaining 3 tokens
+    assert prefill_lengths[:2] == [5, 3]
@@ -1,5 +1,6 @@
 import re
 import sys
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -8,6 +9,7 @@ from torch.testing import assert_close
 from transformers import (
     AutoModelForCausalLM,
     AutoTokenizer,
+    GenerationConfig,
     PreTrainedModel,
     PreTrainedTokenizer,
 )
@@ -18,6 +20,7 @@ from fed_rag.data_structures import Prompt
 from fed_rag.exceptions import GeneratorError, MissingExtraError
 from fed_rag.generators.huggingface import HFPretrainedModelGenerator
 from fed_rag.tokenizers.hf_pretrained_tokenizer import HFPretrainedTokenizer
+from fed_rag.utils.batching import PaddingStats
 
 
 def test_hf_pretrained_generator_class() -> None:
@@ -167,7 +170,7 @@ def test_generate() -> None:
     mock_model.device = torch.device("cpu")
     mock_model.generate.return_value = torch.Tensor([[1, 2, 3]])
     mock_tokenizer_result = MagicMock()
-    mock_tokenizer_result.input_ids = torch.ones(2)
+    mock_tokenizer_result.input_ids = [[1, 2]]
     mock_tokenizer.batch_decode.return_value = ["Mock output"]
     mock_tokenizer.return_value = mock_tokenizer_result
     generator.tokenizer.unwrapped = mock_tokenizer
@@ -191,7 +194,7 @@ def test_generate_raises_error_with_query_context_length_mismatch() -> None:
     mock_model.device = torch.device("cpu")
     mock_model.generate.return_value = torch.Tensor([[1, 2, 3]])
     mock_tokenizer_result = MagicMock()
-    mock_tokenizer_result.input_ids = torch.ones(2)
+    mock_tokenizer_result.input_ids = [[1, 2]]
     mock_tokenizer.batch_decode.return_value = ["Mock output"]
     mock_tokenizer.return_value = mock_tokenizer_result
     generator.tokenizer.unwrapped = mock_tokenizer
@@ -210,10 +213,7 @@ def test_generate_raises_error_with_query_context_length_mismatch() -> None:
     mock_model.generate.assert_not_called()
 
 
-@patch("fed_rag.generators.huggingface.mixin.F")
-def test_compute_target_sequence_proba(
-    mock_torch_functional: MagicMock,
-) -> None:
+def test_compute_target_sequence_proba() -> None:
     # arrange
     generator = HFPretrainedModelGenerator(
         model_name="fake_name",
@@ -224,11 +224,10 @@ def test_compute_target_sequence_proba(
         EncodeResult(input_ids=[0, 1, 2, 3, 4], attention_mask=None),
         EncodeResult(input_ids=[0, 1, 2], attention_mask=None),
     ]
-    mock_torch_functional.softmax.return_value = torch.tensor(
-        [0.2, 0.2, 0.2, 0.2, 0.2]
-    )
     mock_model = MagicMock()
     mock_model.device = torch.device("cpu")
+    # uniform next-token distribution over a vocab of 5 tokens
+    mock_model.return_value.logits = torch.zeros(1, 5, 5)
     generator.model = mock_model
     generator.tokenizer = mock_tokenizer
 
@@ -239,11 +238,105 @@ def test_compute_target_sequence_proba(
 
     mock_tokenizer.encode.assert_any_call("fake prompt fake target")
     mock_tokenizer.encode.assert_any_call("fake prompt")
-    assert mock_torch_functional.softmax.call_count == 2
     mock_model.assert_called_once()
     assert_close(result, torch.tensor(0.2**2))
 
 
+def test_batch_compute_target_sequence_log_proba(
+    tiny_causal_lm_and_tokenizer: tuple[PreTrainedModel, PreTrainedTokenizer],
+) -> None:
+    # arrange
+    model, tokenizer = tiny_causal_lm_and_tokenizer
+    generator = HFPretrainedModelGenerator(
+        model_name="fake_name", load_model_at_init=False
+    )
+    generator.tokenizer.unwrapped = tokenizer
+    generator.model = model
+    prompts = ["w1 w2 w3", "w4", "w5 w6 w7 w8 w9"]
+    targets = [" w10 w11", " w12 w13 w14", " w15"]
+
+    # act
+    with patch.object(model, "forward", wraps=model.forward) as spy:
+        log_probas = generator.batch_compute_target_sequence_log_proba(
+            prompts, targets
+        )
+
+    # assert
+    spy.assert_called_once()
+    assert log_probas.shape == (3,)
+    for prompt, target, log_proba in zip(prompts, targets, log_probas):
+        # logits at position i score the token at position i + 1
+        input_ids = tokenizer(prompt + target).input_ids
+        target_start = len(tokenizer(prompt).input_ids)
+        with torch.no_grad():
+            logits = model(torch.tensor([input_ids])).logits[0]
+        expected = sum(
+            torch.log_softmax(logits[i - 1], dim=-1)[input_ids[i]]
+            for i in range(target_start, len(input_ids))
+        )
+        assert_close(log_proba, expected)
+        assert_close(
+            generator.compute_target_sequence_log_proba(prompt, target),
+            expected,
+        )
+        assert_close(
+            generator.compute_target_sequence_proba(prompt, target),
+            torch.exp(expected),
+        )
+
+
+@pytest.mark.parametrize("max_batch_size", [None, 2])
+def test_batch_compute_target_sequence_log_proba_shared_prefix(
+    tiny_causal_lm_and_tokenizer: tuple[PreTrainedModel, PreTrainedTokenizer],
+    max_batch_size: int | None,
+) -> None:
+    # arrange
+    model, tokenizer = tiny_causal_lm_and_tokenizer
+    generator = HFPretrainedModelGenerator(
+        model_name="fake_name",
+        load_model_at_init=False,
+        max_batch_size=max_batch_size,
+        use_prefix_cache=True,
+    )
+    generator.tokenizer.unwrapped = tokenizer
+    generator.model = model
+    prompts = ["w1 w2 w3 w4", "w1 w2 w3 w5 w6", "w1 w2 w3 w7"]
+    targets = [" w10 w11", " w12", " w13 w14 w15"]
+    expected = torch.stack(
+        [
+            torch.log(generator.compute_target_sequence_proba(p, t))
+            for p, t in zip(prompts, targets)
+        ]
+    )
+
+    # act
+    with patch.object(model, "forward", wraps=model.forward) as spy:
+        log_probas = generator.batch_compute_target_sequence_log_proba(
+            prompts, targets
+        )
+
+    # assert
+    assert_close(log_probas, expected)
+    # the shared prefix "w1 w2 w3" goes through the model once per bucket of
+    # more than one sequence, i.e., once in total with max_batch_size=2
+    assert spy.call_count == (2 if max_batch_size is None else 3)
+    prefix_call = spy.call_args_list[0]
+    assert prefix_call.kwargs["input_ids"].tolist() == [[3, 4, 5]]
+
+
+def test_batch_compute_target_sequence_log_proba_raises_error() -> None:
+    generator = HFPretrainedModelGenerator(
+        model_name="fake_name", load_model_at_init=False
+    )
+
+    with pytest.raises(
+        GeneratorError, match="There should be one target for every prompt."
+    ):
+        generator.batch_compute_target_sequence_log_proba(
+            ["prompt", "another prompt"], ["target"]
+        )
+
+
 def test_huggingface_extra_missing() -> None:
     """Test extra is not installed."""
 
@@ -287,3 +380,126 @@ def test_prompt_setter() -> None:
         generator.prompt_template.format(query="a", context="b")
         == "query: a and context: b"
     )
+
+
+def _mock_streaming_generator(
+    chunks: list[str],
+) -> tuple[HFPretrainedModelGenerator, MagicMock]:
+    generator = HFPretrainedModelGenerator(
+        model_name="fake_name", load_model_at_init=False
+    )
+    mock_tokenizer = MagicMock()
+    mock_tokenizer_result = MagicMock()
+    mock_tokenizer_result.input_ids = [1, 2]
+    mock_tokenizer.return_value = mock_tokenizer_result
+    mock_model = MagicMock()
+    mock_model.device = torch.device("cpu")
+
+    def _generate(
+        streamer: Any, stopping_criteria: Any, **kwargs: Any
+    ) -> None:
+        for ix, chunk in enumerate(chunks):
+            input_ids = torch.ones(1, 2 + ix, dtype=torch.long)
+            if all(stopping_criteria(input_ids, None)):
+                break
+            streamer.on_finalized_text(chunk, stream_end=False)
+        streamer.end()
+
+    mock_model.generate.side_effect = _generate
+    generator.tokenizer.unwrapped = mock_tokenizer
+    generator.model = mock_model
+    return generator, mock_model
+
+
+def test_stream_generate() -> None:
+    # arrange
+    generator, mock_model = _mock_streaming_generator(["Mock ", "output"])
+
+    # act
+    chunks = list(generator.stream_generate("fake input", "fake context"))
+
+    # assert
+    assert chunks == ["Mock ", "output"]
+    mock_model.generate.assert_called_once()
+    assert "streamer" in mock_model.generate.call_args.kwargs
+
+
+def test_stream_complete_early_close_stops_generation() -> None:
+    # arrange
+    generator, mock_model = _mock_streaming_generator(["a", "b", "c", "d"])
+
+    # act
+    stream = generator.stream_complete("fake prompt")
+    first = next(stream)
+    stream.close()
+
+    # assert
+    assert first == "a"
+    mock_model.generate.assert_called_once()
+
+
+def test_stream_complete_raises_generation_error() -> None:
+    # arrange
+    generator, mock_model = _mock_streaming_generator([])
+    mock_model.generate.side_effect = RuntimeError("generation failed")
+
+    # act
+    with pytest.raises(RuntimeError, match="generation failed"):
+        list(generator.stream_complete("fake prompt"))
+
+
+def test_complete_batches_variable_length_prompts(
+    tiny_causal_lm_and_tokenizer: tuple[PreTrainedModel, PreTrainedTokenizer],
+) -> None:
+    # arrange
+    model, tokenizer = tiny_causal_lm_and_tokenizer
+    generator = HFPretrainedModelGenerator(
+        model_name="fake_name",
+        generation_config=GenerationConfig(max_new_tokens=4, do_sample=False),
+        load_model_at_init=False,
+        max_batch_size=2,
+    )
+    generator.tokenizer.unwrapped = tokenizer
+    generator.model = model
+    prompts = ["w1 w2 w3 w4 w5 w6", "w7", "w8 w9 w10"]
+
+    # act
+    with patch.object(model, "generate", wraps=model.generate) as spy:
+        batched = generator.complete(prompts)
+    single = [generator.complete(p) for p in prompts]
+
+    # assert
+    assert batched == single
+    # prompts are sorted by length into left-padded sub-batches
+    assert spy.call_count == 2
+    first_call = spy.call_args_list[0].kwargs
+    assert first_call["inputs"].tolist() == [[0, 0, 9], [10, 11, 12]]
+    assert first_call["attention_mask"].tolist() == [[0, 0, 1], [1, 1, 1]]
+    assert spy.call_args_list[1].kwargs["inputs"].shape == (1, 6)
+
+
+def test_complete_reports_padding_stats(
+    tiny_causal_lm_and_tokenizer: tuple[PreTrainedModel, PreTrainedTokenizer],
+) -> None:
+    # arrange
+    model, tokenizer = tiny_causal_lm_and_tokenizer
+    generator = HFPretrainedModelGenerator(
+        model_name="fake_name",
+        generation_config=GenerationConfig(max_new_tokens=2, do_sample=False),
+        load_model_at_init=False,
+        max_padding_ratio=0.25,
+    )
+    generator.tokenizer.unwrapped = tokenizer
+    generator.model = model
+    padding_stats: list[PaddingStats] = []
+    generator.with_padding_stats_callback(padding_stats.append)
+
+    # act
+    outputs = generator.complete(["w1 w2 w3 w4", "w5", "w6 w7 w8", "w9"])
+
+    # assert
+    assert len(outputs) == 4
+    assert padding_stats == [
+        PaddingStats(num_sequences=2, num_tokens=2, num_padding_tokens=0),
+        PaddingStats(num_sequences=2, num_tokens=7, num_padding_tokens=1),
+    ]
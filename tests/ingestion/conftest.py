@@ -0,0 +1,56 @@
+from typing import Any
+
+import pytest
+import torch
+from pydantic import PrivateAttr
+
+from fed_rag.base.retriever import BaseRetriever
+from fed_rag.knowledge_stores.in_memory import InMemoryKnowledgeStore
+
+
+class BatchMockRetriever(BaseRetriever):
+    """Retriever that encodes each text as [len(text), 1.0, 0.0]."""
+
+    _num_encode_calls: int = PrivateAttr(default=0)
+
+    def _encode(self, texts: str | list[str]) -> torch.Tensor:
+        self._num_encode_calls += 1
+        if isinstance(texts, str):
+            return torch.tensor([float(len(texts)), 1.0, 0.0])
+        return torch.tensor([[float(len(t)), 1.0, 0.0] for t in texts])
+
+    def encode_context(self, context: Any, **kwargs: Any) -> torch.Tensor:
+        return self._encode(context)
+
+    def encode_query(self, query: Any, **kwargs: Any) -> torch.Tensor:
+        return self._encode(query)
+
+    @property
+    def encoder(self) -> torch.nn.Module | None:
+        return None
+
+    @property
+    def query_encoder(self) -> torch.nn.Module | None:
+        return None
+
+    @property
+    def context_encoder(self) -> torch.nn.Module | None:
+        return None
+
+
+@pytest.fixture
+def batch_retriever() -> BatchMockRetriever:
+    return BatchMockRetriever()
+
+
+@pytest.fixture
+def knowledge_store() -> InMemoryKnowledgeStore:
+    return InMemoryKnowledgeStore()
+
+
+@pytest.fixture
+def records() -> list[dict[str, Any]]:
+    return [
+        {"id": f"doc-{i}", "title": f"title {i}", "text": f"passage {i}"}
+        for i in range(10)
+    ]
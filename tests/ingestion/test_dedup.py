@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from fed_rag.ingestion import ContentHashSet, content_hash
+from fed_rag.ingestion.dedup import append_hashes
+
+
+def test_content_hash_is_stable_64_bit() -> None:
+    h = content_hash("some passage")
+
+    assert h == content_hash("some passage")
+    assert h != content_hash("some other passage")
+    assert 0 <= h < 2**64
+
+
+def test_content_hash_set_membership() -> None:
+    hash_set = ContentHashSet([3, 1, 2, 2])
+
+    assert len(hash_set) == 3
+    assert 2 in hash_set
+    assert 4 not in hash_set
+
+    hash_set.add(4)
+    hash_set.add(4)
+
+    assert 4 in hash_set
+    assert len(hash_set) == 4
+    assert hash_set.to_array().tolist() == [1, 2, 3, 4]
+
+
+def test_content_hash_set_merges_pending(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("fed_rag.ingestion.dedup._MIN_PENDING_SIZE", 2)
+    hash_set = ContentHashSet()
+    max_hash = 2**64 - 1
+
+    hash_set.add(max_hash)
+    hash_set.add(5)
+
+    assert hash_set._pending == set()
+    assert hash_set._sorted.dtype == np.dtype("<u8")
+    assert max_hash in hash_set
+    assert 5 in hash_set
+    assert 6 not in hash_set
+
+
+def test_content_hash_set_file_roundtrip(tmp_path: Path) -> None:
+    path = tmp_path / "hashes"
+    append_hashes(path, [10, 20])
+    append_hashes(path, [30])
+
+    assert ContentHashSet.from_file(path).to_array().tolist() == [10, 20, 30]
+    assert len(ContentHashSet.from_file(path, count=2)) == 2
+    assert 30 not in ContentHashSet.from_file(path, count=2)
@@ -0,0 +1,353 @@
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+import torch
+
+from fed_rag.exceptions import IngestionError, InvalidCheckpointError
+from fed_rag.ingestion import (
+    BatchManifestEntry,
+    IngestionCheckpoint,
+    IngestionPipeline,
+    IngestionResult,
+    content_hash,
+)
+from fed_rag.knowledge_stores.in_memory import InMemoryKnowledgeStore
+
+from .conftest import BatchMockRetriever
+
+
+def test_run(
+    batch_retriever: BatchMockRetriever,
+    knowledge_store: InMemoryKnowledgeStore,
+    records: list[dict[str, Any]],
+) -> None:
+    pipeline = IngestionPipeline(
+        retriever=batch_retriever,
+        knowledge_store=knowledge_store,
+        batch_size=4,
+        node_id_key="id",
+    )
+
+    result = pipeline.run(iter(records))
+
+    assert result == IngestionResult(num_batches=3, num_nodes=10)
+    # one encode call per batch
+    assert batch_retriever._num_encode_calls == 3
+    assert knowledge_store.count == 10
+    node = knowledge_store._data["doc-3"]
+    assert node.text_content == "passage 3"
+    assert list(node.embedding) == [9.0, 1.0, 0.0]
+    assert node.metadata == {"title": "title 3"}
+
+
+def test_run_keeps_array_embeddings(
+    batch_retriever: BatchMockRetriever,
+    knowledge_store: InMemoryKnowledgeStore,
+    records: list[dict[str, Any]],
+) -> None:
+    pipeline = IngestionPipeline(
+        retriever=batch_retriever, knowledge_store=knowledge_store
+    )
+
+    pipeline.run(records)
+
+    for node in knowledge_store._data.values():
+        assert isinstance(node.embedding, np.ndarray)
+        assert node.embedding.dtype == np.float32
+
+
+def test_run_with_text_template_and_metadata_keys(
+    batch_retriever: BatchMockRetriever,
+    knowledge_store: InMemoryKnowledgeStore,
+    records: list[dict[str, Any]],
+) -> None:
+    pipeline = IngestionPipeline(
+        retriever=batch_retriever,
+        knowledge_store=knowledge_store,
+        text_template="title: {title}\ntext: {text}",
+        metadata_keys=["id"],
+    )
+
+    pipeline.run(records[:1])
+
+    node = list(knowledge_store._data.values())[0]
+    assert node.text_content == "title: title 0\ntext: passage 0"
+    assert node.metadata == {"id": "doc-0"}
+
+
+def test_run_uploads_in_bounded_batches(
+    batch_retriever: BatchMockRetriever,
+    records: list[dict[str, Any]],
+) -> None:
+    mock_store = MagicMock(spec=InMemoryKnowledgeStore)
+    pipeline = IngestionPipeline.model_construct(
+        retriever=batch_retriever,
+        knowledge_store=mock_store,
+        batch_size=3,
+        text_key="text",
+        text_template=None,
+        node_id_key=None,
+        metadata_keys=None,
+        max_queue_size=1,
+        checkpoint_path=None,
+    )
+
+    pipeline.run(records)
+
+    batch_lengths = [
+        len(call.args[0]) for call in mock_store.load_nodes.call_args_list
+    ]
+    assert batch_lengths == [3, 3, 3, 1]
+
+
+def test_run_from_file(
+    tmp_path: Path,
+    batch_retriever: BatchMockRetriever,
+    knowledge_store: InMemoryKnowledgeStore,
+    records: list[dict[str, Any]],
+) -> None:
+    path = tmp_path / "data.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in records))
+    pipeline = IngestionPipeline(
+        retriever=batch_retriever, knowledge_store=knowledge_store
+    )
+
+    result = pipeline.run_from_file(path)
+
+    assert result.num_nodes == 10
+    assert knowledge_store.count == 10
+
+
+def test_run_writes_checkpoint_and_resumes(
+    tmp_path: Path,
+    batch_retriever: BatchMockRetriever,
+    knowledge_store: InMemoryKnowledgeStore,
+    records: list[dict[str, Any]],
+) -> None:
+    checkpoint_path = tmp_path / "checkpoint.json"
+
+    def failing_stream() -> Iterator[dict[str, Any]]:
+        yield from records[:6]
+        raise RuntimeError("source went away")
+
+    pipeline = IngestionPipeline(
+        retriever=batch_retriever,
+        knowledge_store=knowledge_store,
+        batch_size=3,
+        node_id_key="id",
+        checkpoint_path=str(checkpoint_path),
+    )
+
+    with pytest.raises(RuntimeError, match="source went away"):
+        pipeline.run(failing_stream())
+
+    checkpoint = IngestionCheckpoint.load(checkpoint_path)
+    assert checkpoint.batches_completed == 2
+    assert checkpoint.records_consumed == 6
+    assert checkpoint.num_hashes == 6
+    assert knowledge_store.count == 6
+
+    # resume, with a different batch size
+    pipeline.batch_size = 2
+    batch_retriever._num_encode_calls = 0
+    result = pipeline.run(records)
+
+    assert result.num_skipped_records == 6
+    assert result.num_batches == 2
+    assert batch_retriever._num_encode_calls == 2
+    assert knowledge_store.count == 10
+    checkpoint = IngestionCheckpoint.load(checkpoint_path)
+    assert checkpoint.batches_completed == 4
+    assert checkpoint.records_consumed == 10
+    assert checkpoint.num_hashes == 10
+    assert [
+        (b.start_offset, b.end_offset)
+        for b in IngestionCheckpoint.read_batches(checkpoint_path)
+    ] == [(0, 3), (3, 6), (6, 8), (8, 10)]
+
+
+def test_run_skips_duplicates(
+    batch_retriever: BatchMockRetriever,
+    knowledge_store: InMemoryKnowledgeStore,
+    records: list[dict[str, Any]],
+) -> None:
+    duplicated = records[:4] + [
+        {"id": "dup-1", "title": "other", "text": "passage 1"},
+        {"id": "dup-3", "title": "other", "text": "passage 3"},
+    ]
+    pipeline = IngestionPipeline(
+        retriever=batch_retriever,
+        knowledge_store=knowledge_store,
+        batch_size=2,
+        node_id_key="id",
+    )
+
+    result = pipeline.run(duplicated)
+
+    assert result.num_nodes == 4
+    assert result.num_duplicates == 2
+    # the trailing duplicates form an empty batch that is never encoded
+    assert result.num_batches == 3
+    assert batch_retriever._num_encode_calls == 2
+    assert sorted(knowledge_store._data) == [f"doc-{i}" for i in range(4)]
+
+
+def test_run_without_deduplicate(
+    batch_retriever: BatchMockRetriever,
+    knowledge_store: InMemoryKnowledgeStore,
+    records: list[dict[str, Any]],
+) -> None:
+    pipeline = IngestionPipeline(
+        retriever=batch_retriever,
+        knowledge_store=knowledge_store,
+        deduplicate=False,
+    )
+
+    result = pipeline.run(records[:2] + records[:2])
+
+    assert result.num_nodes == 4
+    assert result.num_duplicates == 0
+    assert knowledge_store.count == 4
+
+
+def test_rerun_on_grown_source_is_incremental(
+    tmp_path: Path,
+    batch_retriever: BatchMockRetriever,
+    knowledge_store: InMemoryKnowledgeStore,
+    records: list[dict[str, Any]],
+) -> None:
+    checkpoint_path = tmp_path / "checkpoint.json"
+    pipeline = IngestionPipeline(
+        retriever=batch_retriever,
+        knowledge_store=knowledge_store,
+        batch_size=4,
+        checkpoint_path=str(checkpoint_path),
+    )
+    pipeline.run(records[:5])
+
+    # appended records, one of which repeats an already ingested passage
+    grown = records[:5] + [
+        {"id": "new-0", "title": "new", "text": "passage 2"},
+        {"id": "new-1", "title": "new", "text": "brand new passage"},
+    ]
+    batch_retriever._num_encode_calls = 0
+    result = pipeline.run(grown)
+
+    assert result.num_skipped_records == 5
+    assert result.num_nodes == 1
+    assert result.num_duplicates == 1
+    assert batch_retriever._num_encode_calls == 1
+    assert knowledge_store.count == 6
+
+
+def test_resume_discards_uncommitted_manifest_entries(
+    tmp_path: Path,
+    batch_retriever: BatchMockRetriever,
+    knowledge_store: InMemoryKnowledgeStore,
+    records: list[dict[str, Any]],
+) -> None:
+    checkpoint_path = tmp_path / "checkpoint.json"
+    pipeline = IngestionPipeline(
+        retriever=batch_retriever,
+        knowledge_store=knowledge_store,
+        batch_size=5,
+        checkpoint_path=str(checkpoint_path),
+    )
+    pipeline.run(records[:5])
+
+    # simulate a crash after appending to the logs but before the summary
+    stale = IngestionCheckpoint.load(checkpoint_path)
+    stale.commit(
+        checkpoint_path,
+        BatchManifestEntry(
+            batch_index=1, start_offset=5, end_offset=10, num_nodes=5
+        ),
+        [content_hash(r["text"]) for r in records[5:]],
+    )
+    IngestionCheckpoint.load(checkpoint_path).model_copy(
+        update={"batches_completed": 1, "records_consumed": 5, "num_hashes": 5}
+    ).save(checkpoint_path)
+
+    result = pipeline.run(records)
+
+    assert result.num_nodes == 5
+    assert result.num_duplicates == 0
+    assert knowledge_store.count == 10
+    assert len(IngestionCheckpoint.read_batches(checkpoint_path)) == 2
+
+
+def test_run_raises_on_corrupt_checkpoint(
+    tmp_path: Path,
+    batch_retriever: BatchMockRetriever,
+    knowledge_store: InMemoryKnowledgeStore,
+) -> None:
+    checkpoint_path = tmp_path / "checkpoint.json"
+    checkpoint_path.write_text("not json")
+    pipeline = IngestionPipeline(
+        retriever=batch_retriever,
+        knowledge_store=knowledge_store,
+        checkpoint_path=str(checkpoint_path),
+    )
+
+    with pytest.raises(
+        InvalidCheckpointError, match="Unable to parse ingestion checkpoint"
+    ):
+        pipeline.run([])
+
+
+def test_run_raises_on_missing_text_field(
+    batch_retriever: BatchMockRetriever,
+    knowledge_store: InMemoryKnowledgeStore,
+) -> None:
+    pipeline = IngestionPipeline(
+        retriever=batch_retriever, knowledge_store=knowledge_store
+    )
+
+    with pytest.raises(
+        IngestionError,
+        match=re.escape("Record is missing required field 'text'."),
+    ):
+        pipeline.run([{"body": "no text here"}])
+
+    assert knowledge_store.count == 0
+
+
+def test_run_raises_on_non_tensor_embeddings(
+    knowledge_store: InMemoryKnowledgeStore,
+    records: list[dict[str, Any]],
+) -> None:
+    retriever = BatchMockRetriever()
+    retriever._encode = MagicMock(return_value=[[0.1, 0.2]])  # type: ignore
+    pipeline = IngestionPipeline(
+        retriever=retriever, knowledge_store=knowledge_store
+    )
+
+    with pytest.raises(
+        IngestionError,
+        match="requires `encode_context` to return a torch.Tensor",
+    ):
+        pipeline.run(records)
+
+
+def test_run_raises_on_embedding_count_mismatch(
+    knowledge_store: InMemoryKnowledgeStore,
+    records: list[dict[str, Any]],
+) -> None:
+    retriever = BatchMockRetriever()
+    retriever._encode = MagicMock(  # type: ignore
+        return_value=torch.ones(2, 3)
+    )
+    pipeline = IngestionPipeline(
+        retriever=retriever, knowledge_store=knowledge_store, batch_size=4
+    )
+
+    with pytest.raises(
+        IngestionError,
+        match="Retriever returned 2 embeddings for a batch of 4 texts.",
+    ):
+        pipeline.run(records)
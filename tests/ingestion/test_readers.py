@@ -0,0 +1,48 @@
+import json
+import re
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from fed_rag.exceptions import UnsupportedFileFormatError
+from fed_rag.ingestion import stream_file, stream_jsonl, stream_parquet
+
+
+def test_stream_jsonl(tmp_path: Path, records: list[dict[str, Any]]) -> None:
+    path = tmp_path / "data.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in records[:3]) + "\n\n")
+
+    stream = stream_jsonl(path)
+
+    assert next(stream) == records[0]
+    assert list(stream) == records[1:3]
+
+
+def test_stream_parquet(tmp_path: Path, records: list[dict[str, Any]]) -> None:
+    path = tmp_path / "data.parquet"
+    pq.write_table(pa.Table.from_pylist(records), path)
+
+    assert list(stream_parquet(path, read_batch_size=3)) == records
+
+
+def test_stream_file_dispatches_on_suffix(
+    tmp_path: Path, records: list[dict[str, Any]]
+) -> None:
+    jsonl_path = tmp_path / "data.jsonl"
+    jsonl_path.write_text("\n".join(json.dumps(r) for r in records))
+    parquet_path = tmp_path / "data.parquet"
+    pq.write_table(pa.Table.from_pylist(records), parquet_path)
+
+    assert list(stream_file(jsonl_path)) == records
+    assert list(stream_file(parquet_path)) == records
+
+
+def test_stream_file_raises_unsupported_format(tmp_path: Path) -> None:
+    with pytest.raises(
+        UnsupportedFileFormatError,
+        match=re.escape("Unsupported file format '.csv' for ingestion."),
+    ):
+        stream_file(tmp_path / "data.csv")
@@ -109,3 +109,37 @@ def test_to_sync_methods() -> None:
 
         sync_store.clear()
         assert sync_store.count == 0
+
+
+def test_reindex_methods_not_implemented_by_default() -> None:
+    sync_store = DummyAsyncKnowledgeStore().to_sync()
+
+    with pytest.raises(
+        NotImplementedError,
+        match="`iter_node_batches\\(\\)` is not available in _SyncConvertedKnowledgeStore.",
+    ):
+        next(sync_store.iter_node_batches(batch_size=2))
+    with pytest.raises(
+        NotImplementedError,
+        match="`update_embeddings\\(\\)` is not available in _SyncConvertedKnowledgeStore.",
+    ):
+        sync_store.update_embeddings(["1"], [[1.0]])
+
+
+@pytest.mark.asyncio
+async def test_version_incremented_on_modification() -> None:
+    dummy_store = DummyAsyncKnowledgeStore()
+    node = KnowledgeNode(node_type=NodeType.TEXT, text_content="Dummy text")
+    assert dummy_store.version == 0
+
+    await dummy_store.load_node(node)
+    after_load = dummy_store.version
+    await dummy_store.retrieve([1.0], top_k=1)
+    after_retrieve = dummy_store.version
+    await dummy_store.delete_node(node.node_id)
+    after_delete = dummy_store.version
+    await dummy_store.clear()
+
+    assert 0 < after_load == after_retrieve < after_delete
+    assert dummy_store.version > after_delete
+    assert dummy_store.to_sync().version == dummy_store.version
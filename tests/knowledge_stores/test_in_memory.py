@@ -1,12 +1,20 @@
 import tempfile
+import threading
 from pathlib import Path
+from typing import Any
+from unittest.mock import patch
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 import torch
 
 from fed_rag.base.knowledge_store import BaseKnowledgeStore
+from fed_rag.blob_stores import LocalBlobStore
 from fed_rag.data_structures.knowledge_node import KnowledgeNode
-from fed_rag.exceptions import KnowledgeStoreNotFoundError
+from fed_rag.exceptions import KnowledgeStoreError, KnowledgeStoreNotFoundError
+from fed_rag.knowledge_stores import in_memory
 from fed_rag.knowledge_stores.in_memory import InMemoryKnowledgeStore
 
 
@@ -188,6 +196,118 @@ def test_load(text_nodes: list[KnowledgeNode]) -> None:
         assert loaded_knowledge_store._data == knowledge_store._data
 
 
+def test_load_with_missing_and_ragged_embeddings() -> None:
+    nodes = [
+        KnowledgeNode(node_type="text", text_content="no embedding"),
+        KnowledgeNode(
+            node_type="text", text_content="short", embedding=[1.0, 0.0]
+        ),
+        KnowledgeNode(
+            node_type="text", text_content="long", embedding=[1.0, 0.0, 1.0]
+        ),
+    ]
+    with tempfile.TemporaryDirectory() as dirpath:
+        knowledge_store = InMemoryKnowledgeStore.from_nodes(
+            nodes=nodes, name="test_ks", cache_dir=dirpath
+        )
+        knowledge_store.persist()
+
+        loaded_knowledge_store = InMemoryKnowledgeStore(
+            name="test_ks", cache_dir=dirpath
+        )
+        loaded_knowledge_store.load()
+
+        assert loaded_knowledge_store._data == knowledge_store._data
+
+
+def test_persist_and_load_array_embeddings() -> None:
+    nodes = [
+        KnowledgeNode(
+            node_type="text",
+            text_content=f"node {i}",
+            embedding=torch.rand(4),
+        )
+        for i in range(3)
+    ]
+    with tempfile.TemporaryDirectory() as dirpath:
+        knowledge_store = InMemoryKnowledgeStore.from_nodes(
+            nodes=nodes, name="test_ks", cache_dir=dirpath
+        )
+        knowledge_store.persist()
+        schema = pq.read_schema(Path(dirpath) / "test_ks.parquet")
+
+        loaded_knowledge_store = InMemoryKnowledgeStore(
+            name="test_ks", cache_dir=dirpath
+        )
+        loaded_knowledge_store.load()
+
+    assert schema.field("embedding").type == pa.list_(pa.float32(), 4)
+    assert loaded_knowledge_store._data == knowledge_store._data
+    # node embeddings are views into the retrieval matrix
+    storage = loaded_knowledge_store._data_storage
+    assert isinstance(storage, torch.Tensor)
+    for node in loaded_knowledge_store._data.values():
+        assert np.shares_memory(node.embedding, storage.numpy())
+
+
+@pytest.mark.parametrize(
+    "query_emb",
+    [
+        [1.0, 0.0, 0.0],
+        np.array([1.0, 0.0, 0.0]),
+        torch.tensor([1.0, 0.0, 0.0]),
+    ],
+    ids=["list", "numpy", "tensor"],
+)
+def test_retrieve_with_array_query(
+    query_emb: Any, text_nodes: list[KnowledgeNode]
+) -> None:
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(nodes=text_nodes)
+
+    res = knowledge_store.retrieve(query_emb, top_k=1)
+
+    assert res[0][1] == text_nodes[1]
+
+
+def test_load_node_after_retrieve(text_nodes: list[KnowledgeNode]) -> None:
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(nodes=text_nodes[:2])
+    knowledge_store.retrieve([1.0, 1.0, 0.0], top_k=1)
+
+    knowledge_store.load_node(text_nodes[2])
+    res = knowledge_store.retrieve([1.0, 1.0, 0.0], top_k=1)
+
+    assert res[0][1] == text_nodes[2]
+
+
+def test_load_does_not_decode_metadata(
+    text_nodes: list[KnowledgeNode],
+) -> None:
+    with tempfile.TemporaryDirectory() as dirpath:
+        knowledge_store = InMemoryKnowledgeStore.from_nodes(
+            nodes=text_nodes, name="test_ks", cache_dir=dirpath
+        )
+        knowledge_store.persist()
+
+        loaded_knowledge_store = InMemoryKnowledgeStore(
+            name="test_ks", cache_dir=dirpath
+        )
+        loaded_knowledge_store.load()
+        loaded_knowledge_store.retrieve([1.0, 0.0, 0.0], top_k=2)
+        loaded_knowledge_store.persist()
+
+        assert all(
+            "metadata" not in node.__dict__
+            for node in loaded_knowledge_store._data.values()
+        )
+
+        # re-persisting round trips the raw metadata
+        reloaded_knowledge_store = InMemoryKnowledgeStore(
+            name="test_ks", cache_dir=dirpath
+        )
+        reloaded_knowledge_store.load()
+        assert reloaded_knowledge_store._data == knowledge_store._data
+
+
 def test_load_with_missing_file_raises_error() -> None:
     with tempfile.TemporaryDirectory() as dirpath:
         knowledge_store = InMemoryKnowledgeStore(cache_dir=dirpath)
@@ -229,3 +349,143 @@ def test_batch_retrieve_raises_error() -> None:
 
         with pytest.raises(NotImplementedError):
             knowledge_store.batch_retrieve(query_embs=[[1, 2, 3], [4, 5, 6]])
+
+
+def test_persist_and_load_with_blob_store() -> None:
+    node = KnowledgeNode(
+        node_id="mock_id",
+        embedding=[1.0, 0.0, 1.0],
+        node_type="image",
+        image_content=b"mock_image",
+    )
+    with tempfile.TemporaryDirectory() as dirpath:
+        blob_store = LocalBlobStore(root_dir=str(Path(dirpath) / "blobs"))
+        knowledge_store = InMemoryKnowledgeStore.from_nodes(
+            nodes=[node],
+            name="test_ks",
+            cache_dir=dirpath,
+            blob_store=blob_store,
+        )
+        knowledge_store.persist()
+        table = pq.read_table(Path(dirpath) / "test_ks.parquet")
+
+        loaded_knowledge_store = InMemoryKnowledgeStore(
+            name="test_ks", cache_dir=dirpath, blob_store=blob_store
+        )
+        loaded_knowledge_store.load()
+        _, retrieved = loaded_knowledge_store.retrieve([1.0, 0.0, 1.0], 1)[0]
+
+        # given node is untouched, stored node only holds a reference
+        assert node.image_content == b"mock_image"
+        assert table.column("image_content").to_pylist() == [None]
+        assert table.column("image_ref").to_pylist() == [
+            blob_store.put(b"mock_image")
+        ]
+        assert retrieved.get_content()["image_content"] == b"mock_image"
+
+
+def test_iter_node_batches(text_nodes: list[KnowledgeNode]) -> None:
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(nodes=text_nodes)
+
+    batches = list(knowledge_store.iter_node_batches(batch_size=2))
+
+    assert [[n.node_id for n in batch] for batch in batches] == [
+        [text_nodes[0].node_id, text_nodes[1].node_id],
+        [text_nodes[2].node_id],
+    ]
+
+
+def test_update_embeddings(text_nodes: list[KnowledgeNode]) -> None:
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(nodes=text_nodes)
+    knowledge_store.retrieve(query_emb=[1.0, 1.0, 1.0], top_k=1)
+    version = knowledge_store.version
+    node_ids = [n.node_id for n in reversed(text_nodes)]
+
+    knowledge_store.update_embeddings(
+        node_ids, torch.tensor([[0.0, 0.0, 1.0], [0.0, 1.0, 0.0], [1, 0, 0]])
+    )
+
+    assert knowledge_store.version > version
+    assert knowledge_store._data[text_nodes[0].node_id].embedding.tolist() == [
+        1.0,
+        0.0,
+        0.0,
+    ]
+    res = knowledge_store.retrieve(query_emb=[0.0, 0.0, 1.0], top_k=1)
+    assert res[0][1].node_id == text_nodes[2].node_id
+    assert res[0][0] == pytest.approx(1.0)
+
+
+def test_update_embeddings_of_some_nodes(
+    text_nodes: list[KnowledgeNode],
+) -> None:
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(nodes=text_nodes)
+
+    knowledge_store.update_embeddings(
+        [text_nodes[1].node_id], [[0.0, 0.0, 1.0]]
+    )
+
+    res = knowledge_store.retrieve(query_emb=[0.0, 0.0, 1.0], top_k=3)
+    assert res[0][1].node_id == text_nodes[1].node_id
+    assert res[0][0] == pytest.approx(1.0)
+    # other nodes keep their embeddings
+    assert knowledge_store._data[text_nodes[0].node_id].embedding == [
+        1.0,
+        0.0,
+        1.0,
+    ]
+
+
+def test_update_embeddings_raises_error(
+    text_nodes: list[KnowledgeNode],
+) -> None:
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(nodes=text_nodes)
+
+    with pytest.raises(
+        KnowledgeStoreError,
+        match="There should be one embedding for every node id.",
+    ):
+        knowledge_store.update_embeddings([text_nodes[0].node_id], [])
+
+    with pytest.raises(
+        KnowledgeStoreError, match="Nodes not found in knowledge store"
+    ):
+        knowledge_store.update_embeddings(["missing"], [[0.0, 0.0, 1.0]])
+
+
+def test_update_embeddings_with_concurrent_delete(
+    text_nodes: list[KnowledgeNode],
+) -> None:
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(nodes=text_nodes)
+    deleter = threading.Thread(
+        target=knowledge_store.delete_node, args=(text_nodes[0].node_id,)
+    )
+    stack_embeddings = in_memory._stack_embeddings
+
+    def _stack_and_delete(embeddings: list[Any]) -> torch.Tensor:
+        stacked = stack_embeddings(embeddings)
+        if embeddings is knowledge_store._data_storage:
+            # delete a node once the current storage has been copied
+            deleter.start()
+            deleter.join(timeout=0.1)
+        return stacked
+
+    with patch.object(in_memory, "_stack_embeddings", _stack_and_delete):
+        knowledge_store.update_embeddings(
+            [text_nodes[2].node_id], [[0.0, 5.0, 0.0]]
+        )
+    deleter.join()
+
+    assert knowledge_store.count == 2
+    knowledge_store.retrieve(query_emb=[0.0, 1.0, 0.0], top_k=1)
+    # every row of the retrieval matrix belongs to its node
+    for node_id, row in zip(
+        knowledge_store._node_list, knowledge_store._data_storage
+    ):
+        node = knowledge_store._data[node_id]
+        assert row.tolist() == list(node.embedding)
+    assert list(knowledge_store._data[text_nodes[2].node_id].embedding) == [
+        0.0,
+        5.0,
+        0.0,
+    ]
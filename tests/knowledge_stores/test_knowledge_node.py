@@ -1,8 +1,17 @@
+import base64
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
+import torch
+from pydantic import ValidationError
 
-from fed_rag.data_structures.knowledge_node import KnowledgeNode, NodeContent
+from fed_rag.data_structures.knowledge_node import (
+    KnowledgeNode,
+    NodeContent,
+    NodeType,
+)
+from fed_rag.exceptions import MissingBlobStoreError
 
 
 @patch("fed_rag.data_structures.knowledge_node.uuid")
@@ -202,3 +211,240 @@ def test_deserialize_metadata_when_empty() -> None:
 
     assert node == deserialized_node
     assert serialized["metadata"] is None
+
+
+def test_from_serialized() -> None:
+    node = KnowledgeNode(
+        node_type="multimodal",
+        embedding=[0.1, 0.2],
+        text_content="content",
+        image_content=b"image",
+        metadata={"key1": "value1"},
+    )
+
+    reconstructed = KnowledgeNode.from_serialized(node.model_dump())
+
+    assert reconstructed == node
+    assert reconstructed.node_type is NodeType.MULTIMODAL
+    assert reconstructed.metadata == {"key1": "value1"}
+
+
+def test_from_serialized_with_empty_metadata_and_str_image() -> None:
+    node = KnowledgeNode.from_serialized(
+        {
+            "node_id": "1",
+            "node_type": "image",
+            "image_content": "image",
+            "metadata": None,
+        }
+    )
+
+    assert node.metadata == {}
+    assert node.image_content == b"image"
+    assert node.embedding is None
+    assert node.text_content is None
+
+
+def test_tensor_embedding_is_stored_as_numpy() -> None:
+    tensor = torch.tensor([0.1, 0.2, 0.3])
+
+    node = KnowledgeNode(
+        node_type="text", text_content="content", embedding=tensor
+    )
+
+    assert isinstance(node.embedding, np.ndarray)
+    assert node.embedding.dtype == np.float32
+    # cpu tensors are not copied
+    assert np.shares_memory(node.embedding, tensor.numpy())
+
+
+def test_array_embedding_json_roundtrip() -> None:
+    node = KnowledgeNode(
+        node_type="text",
+        text_content="content",
+        embedding=np.array([0.1, 0.2, 0.3], dtype=np.float32),
+    )
+
+    serialized = node.model_dump(mode="json")
+    deserialized_node = KnowledgeNode.model_validate_json(
+        node.model_dump_json()
+    )
+
+    assert isinstance(serialized["embedding"], str)
+    assert isinstance(deserialized_node.embedding, np.ndarray)
+    assert deserialized_node == node
+    assert KnowledgeNode.from_serialized(serialized) == node
+
+
+@pytest.mark.parametrize("dtype", [np.float16, np.float32, np.float64])
+def test_array_embedding_json_roundtrip_keeps_dtype(dtype: type) -> None:
+    node = KnowledgeNode(
+        node_type="text",
+        text_content="content",
+        embedding=np.array([0.1, 0.2, 0.3], dtype=dtype),
+    )
+
+    serialized = node.model_dump(mode="json")
+    deserialized_node = KnowledgeNode.model_validate(serialized)
+    lazy_node = KnowledgeNode.from_serialized(serialized)
+
+    assert serialized["embedding"].startswith(f"{np.dtype(dtype).str}:")
+    for other in (deserialized_node, lazy_node):
+        assert other.embedding.dtype == dtype
+        assert other == node
+        # decoded embeddings can be updated in place
+        other.embedding[0] = 1.0
+
+
+def test_untagged_base64_embedding_is_decoded_as_float32() -> None:
+    raw = np.array([0.5, 1.0], dtype="<f4").tobytes()
+
+    node = KnowledgeNode(
+        node_type="text",
+        text_content="content",
+        embedding=base64.b64encode(raw).decode("ascii"),
+    )
+
+    assert node.embedding.dtype == np.float32
+    assert list(node.embedding) == [0.5, 1.0]
+
+
+def test_serialized_embedding_with_non_float_dtype_raises_error() -> None:
+    with pytest.raises(ValidationError, match="non-float dtype '<i8'"):
+        KnowledgeNode(
+            node_type="text", text_content="content", embedding="<i8:AAAA"
+        )
+
+
+def test_list_embedding_json_serialization_is_unchanged() -> None:
+    node = KnowledgeNode(
+        node_type="text", text_content="content", embedding=[0.1, 0.2]
+    )
+
+    assert node.model_dump(mode="json")["embedding"] == [0.1, 0.2]
+
+
+def test_eq_with_array_embeddings() -> None:
+    node = KnowledgeNode(
+        node_id="1",
+        node_type="text",
+        text_content="content",
+        embedding=np.array([1.0, 0.0]),
+    )
+
+    assert node == node.model_copy(update={"embedding": [1.0, 0.0]})
+    assert node != node.model_copy(update={"embedding": [0.0, 1.0]})
+    assert node != node.model_copy(update={"embedding": None})
+    assert node != node.model_copy(update={"text_content": "other"})
+
+
+def test_from_serialized_decodes_metadata_lazily() -> None:
+    node = KnowledgeNode(
+        node_type="text",
+        text_content="content",
+        metadata={"key1": "value1"},
+    )
+
+    lazy_node = KnowledgeNode.from_serialized(node.model_dump())
+
+    assert "metadata" not in lazy_node.__dict__
+    # serialization re-emits the raw json without decoding it
+    assert lazy_node.model_dump() == node.model_dump()
+    assert lazy_node.model_dump_json() == node.model_dump_json()
+    assert "metadata" not in lazy_node.model_dump(exclude={"metadata"})
+    assert lazy_node.model_dump(include={"metadata"}) == {
+        "metadata": '{"key1": "value1"}'
+    }
+    assert "metadata" not in lazy_node.__dict__
+
+    # first access decodes and memoizes
+    assert lazy_node.metadata == {"key1": "value1"}
+    assert lazy_node.__dict__["metadata"] is lazy_node.metadata
+    assert lazy_node._metadata_json is None
+
+
+def test_lazy_metadata_eq_and_assignment() -> None:
+    node = KnowledgeNode(
+        node_type="text",
+        text_content="content",
+        metadata={"key1": "value1"},
+    )
+
+    assert KnowledgeNode.from_serialized(node.model_dump()) == node
+
+    lazy_node = KnowledgeNode.from_serialized(node.model_dump())
+    lazy_node.metadata = {"key2": "value2"}
+
+    assert lazy_node.metadata == {"key2": "value2"}
+    assert lazy_node.model_dump()["metadata"] == '{"key2": "value2"}'
+
+
+def test_iter_includes_lazy_metadata() -> None:
+    node = KnowledgeNode(
+        node_type="text",
+        text_content="content",
+        metadata={"key1": "value1"},
+    )
+
+    lazy_node = KnowledgeNode.from_serialized(node.model_dump())
+
+    assert dict(lazy_node) == dict(node)
+    assert dict(lazy_node)["metadata"] == {"key1": "value1"}
+
+
+def test_getattr_raises_for_unknown_attributes() -> None:
+    node = KnowledgeNode.from_serialized(
+        {"node_type": "text", "text_content": "content", "metadata": "{}"}
+    )
+
+    with pytest.raises(AttributeError):
+        node.unknown_attribute
+
+
+def test_image_knowledge_node_with_image_ref() -> None:
+    node = KnowledgeNode(node_type="image", image_ref="mock_ref")
+
+    assert node.image_content is None
+    assert node.image_ref == "mock_ref"
+
+
+def test_offload_image() -> None:
+    blob_store = MagicMock()
+    blob_store.put.return_value = "mock_ref"
+    blob_store.get.return_value = b"mock_image"
+    node = KnowledgeNode(
+        node_type="multimodal",
+        text_content="mock_text",
+        image_content=b"mock_image",
+    )
+
+    node.offload_image(blob_store)
+
+    blob_store.put.assert_called_once_with(b"mock_image")
+    assert node.image_content is None
+    assert node.image_ref == "mock_ref"
+    assert node.get_content() == {
+        "text_content": "mock_text",
+        "image_content": b"mock_image",
+    }
+    assert "mock_image" not in node.model_dump_json()
+
+
+def test_get_image_content_without_blob_store_raises_error() -> None:
+    node = KnowledgeNode(node_type="image", image_ref="mock_ref")
+
+    with pytest.raises(
+        MissingBlobStoreError,
+        match="references image 'mock_ref' but has no blob store attached",
+    ):
+        node.get_content()
+
+
+def test_eq_ignores_attached_blob_store() -> None:
+    node = KnowledgeNode(
+        node_id="mock_id", node_type="image", image_ref="mock_ref"
+    )
+    other = node.model_copy()
+    other.attach_blob_store(MagicMock())
+
+    assert node == other
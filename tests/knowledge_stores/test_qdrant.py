@@ -4,6 +4,7 @@ from contextlib import nullcontext as does_not_raise
 from unittest.mock import MagicMock, patch
 
 import pytest
+import torch
 from qdrant_client import QdrantClient
 
 from fed_rag.data_structures.knowledge_node import KnowledgeNode
@@ -812,3 +813,171 @@ def testconvert_knowledge_node_to_qdrant_point_raises_error_none_embedding() ->
         match="Cannot load a node with embedding set to None.",
     ):
         convert_knowledge_node_to_qdrant_point(node)
+
+
+def test_convert_knowledge_node_with_array_embedding_to_qdrant_point() -> None:
+    node = KnowledgeNode(
+        node_id="1",
+        text_content="mock",
+        node_type="text",
+        embedding=torch.tensor([1.0, 0.5]),
+    )
+
+    pt = convert_knowledge_node_to_qdrant_point(node)
+
+    assert pt.vector == [1.0, 0.5]
+    assert "embedding" not in pt.payload
+
+
+@patch.object(QdrantKnowledgeStore, "_ensure_collection_exists")
+@patch("qdrant_client.QdrantClient")
+def test_retrieve_with_tensor_query(
+    mock_qdrant_client_class: MagicMock,
+    mock_ensure_collection_exists: MagicMock,
+) -> None:
+    from qdrant_client.conversions.common_types import QueryResponse
+
+    mock_client = MagicMock()
+    mock_qdrant_client_class.return_value = mock_client
+    mock_client.query_points.return_value = QueryResponse(points=[])
+    knowledge_store = QdrantKnowledgeStore(
+        collection_name="test collection",
+    )
+
+    knowledge_store.retrieve(query_emb=torch.tensor([1.0, 1.0]), top_k=5)
+
+    mock_client.query_points.assert_called_once_with(
+        collection_name="test collection", query=[1.0, 1.0], limit=5
+    )
+
+
+@patch.object(QdrantKnowledgeStore, "_ensure_collection_exists")
+@patch("qdrant_client.QdrantClient")
+def test_iter_node_batches(
+    mock_qdrant_client_class: MagicMock,
+    mock_ensure_collection_exists: MagicMock,
+) -> None:
+    from qdrant_client.http.models import Record
+
+    mock_client = MagicMock()
+    mock_qdrant_client_class.return_value = mock_client
+    knowledge_store = QdrantKnowledgeStore(
+        collection_name="test collection",
+    )
+    nodes = [
+        KnowledgeNode(
+            embedding=[1.0, 0.0], node_type="text", text_content=f"node {ix}"
+        )
+        for ix in range(3)
+    ]
+    records = [
+        Record(id=n.node_id, payload=n.model_dump_without_embeddings())
+        for n in nodes
+    ]
+    mock_client.scroll.side_effect = [
+        (records[:2], nodes[2].node_id),
+        (records[2:], None),
+    ]
+
+    # act
+    batches = list(knowledge_store.iter_node_batches(batch_size=2))
+
+    # assert
+    assert [[n.node_id for n in batch] for batch in batches] == [
+        [nodes[0].node_id, nodes[1].node_id],
+        [nodes[2].node_id],
+    ]
+    assert batches[1][0].text_content == "node 2"
+    assert batches[1][0].embedding is None
+    assert mock_client.scroll.call_args_list[1].kwargs["offset"] == (
+        nodes[2].node_id
+    )
+    mock_ensure_collection_exists.assert_called_once()
+
+
+@patch.object(QdrantKnowledgeStore, "_ensure_collection_exists")
+@patch("qdrant_client.QdrantClient")
+def test_iter_node_batches_raises_error_on_missing_payload(
+    mock_qdrant_client_class: MagicMock,
+    mock_ensure_collection_exists: MagicMock,
+) -> None:
+    from qdrant_client.http.models import Record
+
+    mock_client = MagicMock()
+    mock_qdrant_client_class.return_value = mock_client
+    knowledge_store = QdrantKnowledgeStore(
+        collection_name="test collection",
+    )
+    mock_client.scroll.return_value = ([Record(id="1", payload=None)], None)
+
+    with pytest.raises(
+        KnowledgeStoreError,
+        match="Point '1' of collection 'test collection' has no payload.",
+    ):
+        list(knowledge_store.iter_node_batches(batch_size=2))
+
+
+def test_convert_scored_point_raises_error_on_missing_payload() -> None:
+    from qdrant_client.http.models import ScoredPoint
+
+    test_pt = ScoredPoint(id="1", score=0.42, version=1, payload=None)
+
+    with pytest.raises(KnowledgeStoreError, match="Point '1' has no payload."):
+        convert_scored_point_to_knowledge_node_and_score_tuple(test_pt)
+
+
+@patch.object(QdrantKnowledgeStore, "_ensure_collection_exists")
+@patch("qdrant_client.QdrantClient")
+def test_update_embeddings(
+    mock_qdrant_client_class: MagicMock,
+    mock_ensure_collection_exists: MagicMock,
+) -> None:
+    from qdrant_client.http.models import PointVectors
+
+    mock_client = MagicMock()
+    mock_qdrant_client_class.return_value = mock_client
+    knowledge_store = QdrantKnowledgeStore(
+        collection_name="test collection",
+    )
+    version = knowledge_store.version
+
+    # act
+    knowledge_store.update_embeddings(
+        ["1", "2"], torch.tensor([[1.0, 0.0], [0.0, 1.0]])
+    )
+
+    # assert
+    mock_client.update_vectors.assert_called_once_with(
+        collection_name="test collection",
+        points=[
+            PointVectors(id="1", vector=[1.0, 0.0]),
+            PointVectors(id="2", vector=[0.0, 1.0]),
+        ],
+    )
+    assert knowledge_store.version > version
+
+
+@patch.object(QdrantKnowledgeStore, "_ensure_collection_exists")
+@patch("qdrant_client.QdrantClient")
+def test_update_embeddings_raises_error(
+    mock_qdrant_client_class: MagicMock,
+    mock_ensure_collection_exists: MagicMock,
+) -> None:
+    mock_client = MagicMock()
+    mock_qdrant_client_class.return_value = mock_client
+    mock_client.update_vectors.side_effect = RuntimeError("qdrant error")
+    knowledge_store = QdrantKnowledgeStore(
+        collection_name="test collection",
+    )
+
+    with pytest.raises(
+        KnowledgeStoreError,
+        match="Failed to update vectors of collection 'test collection': qdrant error",
+    ):
+        knowledge_store.update_embeddings(["1"], [[1.0, 0.0]])
+
+    with pytest.raises(
+        KnowledgeStoreError,
+        match="There should be one embedding for every node id.",
+    ):
+        knowledge_store.update_embeddings(["1", "2"], [[1.0, 0.0]])
@@ -31,11 +31,11 @@ def contexts() -> torch.Tensor:
 
 @pytest.fixture()
 def lm_scores() -> torch.Tensor:
-    """Mock probas of generated outputs 'given' context and chunk."""
+    """Mock log-probas of generated outputs 'given' context and chunk."""
     batch = []
     for bx in range(1, BATCH_SIZE + 1):
         scores = [math.exp(ix) for ix in range(NUM_CHUNKS)]
-        scores = [el / sum(scores) for el in scores]
+        scores = [math.log(el / sum(scores)) for el in scores]
         batch.append(scores)
 
     return torch.tensor(batch, dtype=torch.float32)
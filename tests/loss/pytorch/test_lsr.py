@@ -2,9 +2,13 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 import torch
+import torch.nn.functional as F
 from torch.testing import assert_close
 
-from fed_rag.exceptions.loss import InvalidReductionParam
+from fed_rag.exceptions.loss import (
+    InvalidReductionParam,
+    InvalidTemperatureParam,
+)
 from fed_rag.loss.pytorch.lsr import LSRLoss, ReductionMode
 
 
@@ -19,6 +23,12 @@ def test_invalid_reduction_raises_error() -> None:
         LSRLoss(reduction="invalid_reduction")
 
 
+@pytest.mark.parametrize("temperature", [0.0, -1.0])
+def test_invalid_temperature_raises_error(temperature: float) -> None:
+    with pytest.raises(InvalidTemperatureParam):
+        LSRLoss(temperature=temperature)
+
+
 @pytest.mark.parametrize(
     ("reduction", "expected"), [("mean", 10.5), ("sum", 21)]
 )
@@ -27,7 +37,7 @@ def test_lsr_forward_with_mocks(
     mock_torch_functional: MagicMock, reduction: str, expected: float
 ) -> None:
     # arrange mocks
-    mock_torch_functional.softmax.side_effect = iter(
+    mock_torch_functional.log_softmax.side_effect = iter(
         [torch.Tensor([1, 2, 3]), torch.Tensor([4, 5, 6])]
     )
     mock_torch_functional.kl_div.return_value = torch.Tensor(
@@ -36,15 +46,17 @@ def test_lsr_forward_with_mocks(
 
     loss = LSRLoss(reduction=reduction)
     retrieval_scores = torch.zeros(3)
-    lm_logits = torch.zeros(3)
-    out = loss(retrieval_scores, lm_logits)
+    lm_scores = torch.zeros(3)
+    out = loss(retrieval_scores, lm_scores)
 
     # assert
-    mock_torch_functional.log_softmax.assert_called_once_with(
-        retrieval_scores, dim=1
-    )
-    mock_torch_functional.softmax.assert_called_once_with(lm_logits, dim=1)
+    assert mock_torch_functional.log_softmax.call_count == 2
+    mock_torch_functional.softmax.assert_not_called()
     mock_torch_functional.kl_div.assert_called_once()
+    args, kwargs = mock_torch_functional.kl_div.call_args
+    assert_close(args[0], torch.Tensor([1, 2, 3]))
+    assert_close(args[1], torch.Tensor([4, 5, 6]))
+    assert kwargs == {"reduction": "none", "log_target": True}
     assert out == torch.Tensor([expected])
 
 
@@ -67,4 +79,38 @@ def test_lsr_expected_output_with_sample_data(
     out = loss(retriever_scores, lm_scores)
 
     assert retrieved_chunks.shape == (2, 3, 10)
-    assert_close(out, torch.tensor(5.661825180053711))
+    assert_close(out, torch.tensor(7.659489631652832))
+
+
+def test_lsr_handles_underflowing_lm_scores() -> None:
+    retrieval_scores = torch.tensor([[0.1, 0.2, 0.3]])
+    # likelihoods of long targets, which underflow to 0 as probabilities
+    lm_scores = torch.tensor([[-1200.0, -1201.0, -1300.0]])
+
+    out = LSRLoss(temperature=2.0)(retrieval_scores, lm_scores)
+    expected = F.kl_div(
+        F.log_softmax(retrieval_scores, dim=1),
+        F.softmax(torch.tensor([[0.0, -0.5, -50.0]]), dim=1),
+        reduction="batchmean",
+    )
+
+    assert torch.isfinite(out)
+    assert_close(out, expected)
+
+
+def test_lsr_masks_padded_documents() -> None:
+    retrieval_scores = torch.tensor(
+        [[0.1, 0.2, 0.3], [0.5, 0.4, 0.0]], requires_grad=True
+    )
+    lm_scores = torch.tensor([[-1.0, -2.0, -3.0], [-1.0, -0.5, 0.0]])
+    mask = torch.tensor([[True, True, True], [True, True, False]])
+
+    out = LSRLoss(reduction="sum")(retrieval_scores, lm_scores, mask=mask)
+    out.backward()
+    expected = LSRLoss(reduction="sum")(
+        retrieval_scores[:1], lm_scores[:1]
+    ) + LSRLoss(reduction="sum")(retrieval_scores[1:, :2], lm_scores[1:, :2])
+
+    assert_close(out, expected)
+    assert torch.isfinite(retrieval_scores.grad).all()
+    assert retrieval_scores.grad[1, 2] == 0
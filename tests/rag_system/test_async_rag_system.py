@@ -1,13 +1,22 @@
+import asyncio
+import gc
+import io
+import queue
+import threading
+import time
+from typing import Iterator
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import torch
+from PIL import Image
 
 from fed_rag import AsyncRAGSystem, RAGConfig
 from fed_rag.base.generator import BaseGenerator
+from fed_rag.base.generator_mixins import ImageModalityMixin
 from fed_rag.base.knowledge_store import BaseAsyncKnowledgeStore
 from fed_rag.base.retriever import BaseRetriever
-from fed_rag.data_structures import KnowledgeNode, SourceNode
+from fed_rag.data_structures import Context, KnowledgeNode, SourceNode
 from fed_rag.exceptions import RAGSystemError
 
 from .conftest import (
@@ -428,6 +437,41 @@ async def test_rag_system_format_context(
     assert formatted_context == "node 1\nnode 2\nnode 3"
 
 
+@pytest.mark.asyncio
+async def test_rag_system_format_context_with_images(
+    mock_retriever: MockRetriever,
+) -> None:
+    class MockImageGenerator(ImageModalityMixin, MockGenerator):
+        pass
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), color="red").save(buffer, format="PNG")
+    nodes = [
+        KnowledgeNode(node_type="text", text_content="node 1"),
+        KnowledgeNode(
+            node_type="multimodal",
+            text_content="node 2",
+            image_content=buffer.getvalue(),
+        ),
+    ]
+    rag_system = AsyncRAGSystem(
+        generator=MockImageGenerator(),
+        retriever=mock_retriever,
+        knowledge_store=DummyAsyncKnowledgeStore(),
+        rag_config=RAGConfig(top_k=2),
+    )
+
+    # act
+    formatted_context = rag_system._format_context(
+        source_nodes=[SourceNode(score=1.0, node=n) for n in nodes]
+    )
+
+    # assert
+    assert isinstance(formatted_context, Context)
+    assert formatted_context.text == "node 1\nnode 2"
+    assert [im.size for im in formatted_context.images or []] == [(4, 4)]
+
+
 @pytest.mark.asyncio
 async def test_rag_system_to_sync(
     mock_generator: BaseGenerator,
@@ -451,3 +495,227 @@ async def test_rag_system_to_sync(
     assert sync_rag_system.generator == rag_system.generator
     assert sync_rag_system.rag_config == rag_system.rag_config
     assert sync_rag_system.knowledge_store.name == knowledge_store.name
+
+
+@pytest.mark.asyncio
+@patch.object(MockRetriever, "encode_query")
+async def test_rag_system_retrieve_with_query_embedding_cache(
+    mock_encode_query: MagicMock,
+    mock_generator: BaseGenerator,
+    mock_retriever: MockRetriever,
+    knowledge_nodes: list[KnowledgeNode],
+) -> None:
+    mock_encode_query.return_value = torch.Tensor([1.0, 1.0, 1.0])
+    knowledge_store = DummyAsyncKnowledgeStore()
+    await knowledge_store.load_nodes(nodes=knowledge_nodes)
+    rag_system = AsyncRAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=knowledge_store,
+        rag_config=RAGConfig(top_k=2, query_cache_size=8),
+    )
+
+    first = await rag_system.retrieve("fake query")
+    second = await rag_system.retrieve("fake query")
+
+    mock_encode_query.assert_called_once_with("fake query")
+    assert [s.node for s in first] == [s.node for s in second]
+
+
+@pytest.mark.asyncio
+async def test_rag_system_model_calls_do_not_block_event_loop(
+    mock_generator: BaseGenerator,
+    mock_retriever: MockRetriever,
+    dummy_store: BaseAsyncKnowledgeStore,
+) -> None:
+    generation_started = threading.Event()
+    release_generation = threading.Event()
+    generate_threads = []
+
+    def _generate(query: str, context: str) -> str:
+        generate_threads.append(threading.current_thread().name)
+        generation_started.set()
+        release_generation.wait(timeout=5)
+        return "mock response"
+
+    rag_system = AsyncRAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=dummy_store,
+        rag_config=RAGConfig(top_k=2),
+    )
+    with patch.object(MockGenerator, "generate", side_effect=_generate):
+        task = asyncio.create_task(
+            rag_system.generate(query="query", context="context")
+        )
+        # the event loop keeps running while the generator is busy
+        await asyncio.to_thread(generation_started.wait, 5)
+        assert not task.done()
+        release_generation.set()
+        response = await task
+
+    rag_system.shutdown_executors()
+    assert response == "mock response"
+    assert generate_threads[0].startswith("fed-rag-generator")
+
+
+@pytest.mark.asyncio
+@patch.object(AsyncRAGSystem, "_format_context")
+@patch.object(AsyncRAGSystem, "retrieve")
+async def test_rag_system_stream_query(
+    mock_retrieve: AsyncMock,
+    mock_format_context: MagicMock,
+    mock_generator: BaseGenerator,
+    mock_retriever: BaseRetriever,
+    dummy_store: BaseAsyncKnowledgeStore,
+    knowledge_nodes: list[KnowledgeNode],
+) -> None:
+    source_nodes = [SourceNode(score=0.99, node=knowledge_nodes[0])]
+    mock_retrieve.return_value = source_nodes
+    mock_format_context.return_value = "fake context"
+    stream_threads = []
+    closed = threading.Event()
+
+    def _stream_generate(query: str, context: str) -> Iterator[str]:
+        try:
+            for chunk in ["fake ", "streamed ", "response"]:
+                stream_threads.append(threading.current_thread().name)
+                yield chunk
+        finally:
+            closed.set()
+
+    rag_system = AsyncRAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=dummy_store,
+        rag_config=RAGConfig(top_k=1),
+    )
+    with patch.object(
+        MockGenerator, "stream_generate", side_effect=_stream_generate
+    ):
+        streaming_response = await rag_system.stream_query(query="fake query")
+        rag_response = await streaming_response.get_response()
+
+    rag_system.shutdown_executors()
+    mock_retrieve.assert_called_with("fake query")
+    assert streaming_response.source_nodes == source_nodes
+    assert rag_response.response == "fake streamed response"
+    assert closed.is_set()
+    assert all(t.startswith("fed-rag-generator") for t in stream_threads)
+
+
+@pytest.mark.asyncio
+async def test_rag_system_stream_generate_early_stop_closes_stream(
+    mock_generator: BaseGenerator,
+    mock_retriever: BaseRetriever,
+    dummy_store: BaseAsyncKnowledgeStore,
+) -> None:
+    closed = threading.Event()
+
+    def _stream_generate(query: str, context: str) -> Iterator[str]:
+        try:
+            yield from ["fake ", "response"]
+        finally:
+            closed.set()
+
+    rag_system = AsyncRAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=dummy_store,
+        rag_config=RAGConfig(top_k=1),
+    )
+    with patch.object(
+        MockGenerator, "stream_generate", side_effect=_stream_generate
+    ):
+        response_gen = rag_system.stream_generate(
+            query="fake query", context="fake context"
+        )
+        async for chunk in response_gen:
+            break
+        await response_gen.aclose()  # type: ignore[attr-defined]
+
+    rag_system.shutdown_executors()
+    assert chunk == "fake "
+    assert closed.is_set()
+
+
+@pytest.mark.asyncio
+async def test_rag_system_concurrent_streams_are_serialized(
+    mock_generator: BaseGenerator,
+    mock_retriever: BaseRetriever,
+    dummy_store: BaseAsyncKnowledgeStore,
+) -> None:
+    lock = threading.Lock()
+    num_active = 0
+    max_active = 0
+
+    def _stream_generate(query: str, context: str) -> Iterator[str]:
+        # generation runs on a thread of its own, as in HF `stream_complete`
+        chunks: queue.Queue[str | None] = queue.Queue()
+
+        def _generate() -> None:
+            nonlocal num_active, max_active
+            with lock:
+                num_active += 1
+                max_active = max(max_active, num_active)
+            for chunk in ["fake ", query]:
+                time.sleep(0.01)
+                chunks.put(chunk)
+            with lock:
+                num_active -= 1
+            chunks.put(None)
+
+        thread = threading.Thread(target=_generate)
+        thread.start()
+        while (chunk := chunks.get()) is not None:
+            yield chunk
+        thread.join()
+
+    rag_system = AsyncRAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=dummy_store,
+        rag_config=RAGConfig(top_k=1),
+    )
+
+    async def _collect(query: str) -> str:
+        chunks = [
+            chunk
+            async for chunk in rag_system.stream_generate(
+                query=query, context="fake context"
+            )
+        ]
+        return "".join(chunks)
+
+    with patch.object(
+        MockGenerator, "stream_generate", side_effect=_stream_generate
+    ):
+        responses = await asyncio.gather(
+            *(_collect(f"query {ix}") for ix in range(3))
+        )
+
+    rag_system.shutdown_executors()
+    assert responses == ["fake query 0", "fake query 1", "fake query 2"]
+    assert max_active == 1
+
+
+@pytest.mark.asyncio
+async def test_rag_system_executors_are_shut_down_when_dropped(
+    mock_generator: BaseGenerator,
+    mock_retriever: BaseRetriever,
+    dummy_store: BaseAsyncKnowledgeStore,
+) -> None:
+    rag_system = AsyncRAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=dummy_store,
+        rag_config=RAGConfig(top_k=1),
+    )
+    await rag_system.generate(query="query", context="context")
+    executors = list(rag_system._executors.values())
+
+    del rag_system
+    gc.collect()
+
+    assert executors
+    assert all(executor._shutdown for executor in executors)
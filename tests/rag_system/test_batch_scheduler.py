@@ -0,0 +1,114 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from fed_rag import AsyncRAGSystem, RAGBatchScheduler, RAGConfig, RAGSystem
+from fed_rag.base.generator import BaseGenerator
+from fed_rag.data_structures import KnowledgeNode, RAGResponse
+from fed_rag.exceptions import SchedulerClosedError
+from fed_rag.knowledge_stores.in_memory import InMemoryKnowledgeStore
+
+from .conftest import DummyAsyncKnowledgeStore, MockRetriever
+
+
+def _mock_batch_query(queries: list[str]) -> list[RAGResponse]:
+    return [
+        RAGResponse(response=f"response: {q}", source_nodes=[])
+        for q in queries
+    ]
+
+
+@pytest.fixture()
+def rag_system(
+    mock_generator: BaseGenerator,
+    mock_retriever: MockRetriever,
+    knowledge_nodes: list[KnowledgeNode],
+) -> RAGSystem:
+    return RAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=InMemoryKnowledgeStore.from_nodes(knowledge_nodes),
+        rag_config=RAGConfig(top_k=2),
+    )
+
+
+@pytest.mark.asyncio
+@patch.object(RAGSystem, "batch_query")
+async def test_scheduler_batches_concurrent_queries(
+    mock_batch_query: MagicMock, rag_system: RAGSystem
+) -> None:
+    mock_batch_query.side_effect = _mock_batch_query
+    queries = [f"query {ix}" for ix in range(5)]
+
+    async with RAGBatchScheduler(
+        rag_system=rag_system, max_batch_size=4, max_wait_ms=50
+    ) as scheduler:
+        responses = await asyncio.gather(
+            *(scheduler.query(q) for q in queries)
+        )
+
+    assert [str(r) for r in responses] == [f"response: {q}" for q in queries]
+    assert [c.args[0] for c in mock_batch_query.call_args_list] == [
+        queries[:4],
+        queries[4:],
+    ]
+
+
+@pytest.mark.asyncio
+@patch.object(AsyncRAGSystem, "batch_query", new_callable=AsyncMock)
+async def test_scheduler_with_async_rag_system(
+    mock_batch_query: AsyncMock,
+    mock_generator: BaseGenerator,
+    mock_retriever: MockRetriever,
+) -> None:
+    mock_batch_query.side_effect = _mock_batch_query
+    rag_system = AsyncRAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=DummyAsyncKnowledgeStore(),
+        rag_config=RAGConfig(top_k=2),
+    )
+
+    async with RAGBatchScheduler(
+        rag_system=rag_system, max_batch_size=2
+    ) as scheduler:
+        responses = await asyncio.gather(
+            scheduler.query("query 0"), scheduler.query("query 1")
+        )
+
+    mock_batch_query.assert_awaited_once_with(["query 0", "query 1"])
+    assert [str(r) for r in responses] == [
+        "response: query 0",
+        "response: query 1",
+    ]
+
+
+@pytest.mark.asyncio
+@patch.object(RAGSystem, "batch_query")
+async def test_scheduler_propagates_errors_to_callers(
+    mock_batch_query: MagicMock, rag_system: RAGSystem
+) -> None:
+    mock_batch_query.side_effect = RuntimeError("generation failed")
+
+    async with RAGBatchScheduler(rag_system=rag_system) as scheduler:
+        results = await asyncio.gather(
+            scheduler.query("query 0"),
+            scheduler.query("query 1"),
+            return_exceptions=True,
+        )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_query_after_close_raises_error(
+    rag_system: RAGSystem,
+) -> None:
+    scheduler = RAGBatchScheduler(rag_system=rag_system)
+    await scheduler.close()
+
+    with pytest.raises(
+        SchedulerClosedError, match="Scheduler has been closed."
+    ):
+        await scheduler.query("query")
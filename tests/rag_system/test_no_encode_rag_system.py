@@ -423,3 +423,40 @@ def test_bridging_no_encode_rag_system(
 
     # cleanup
     del BridgedNoEncodeRAGSystem.bridges[_TestBridgeMixin._framework]
+
+
+@patch.object(MockGenerator, "stream_generate")
+@patch.object(NoEncodeRAGSystem, "_format_context")
+@patch.object(NoEncodeRAGSystem, "retrieve")
+def test_rag_system_stream_query(
+    mock_retrieve: MagicMock,
+    mock_format_context: MagicMock,
+    mock_stream_generate: MagicMock,
+    mock_generator: BaseGenerator,
+    knowledge_nodes: list[KnowledgeNode],
+    dummy_store: BaseNoEncodeKnowledgeStore,
+) -> None:
+    # arrange mocks
+    source_nodes = [SourceNode(score=0.99, node=knowledge_nodes[0])]
+    mock_retrieve.return_value = source_nodes
+    mock_format_context.return_value = "fake context"
+    mock_stream_generate.return_value = iter(["fake ", "response"])
+
+    # build rag system
+    rag_system = NoEncodeRAGSystem(
+        generator=mock_generator,
+        knowledge_store=dummy_store,
+        rag_config=RAGConfig(top_k=1),
+    )
+
+    # act
+    streaming_response = rag_system.stream_query(query="fake query")
+    rag_response = streaming_response.get_response()
+
+    # assert
+    mock_retrieve.assert_called_with("fake query")
+    mock_stream_generate.assert_called_once_with(
+        query="fake query", context="fake context"
+    )
+    assert streaming_response.source_nodes == source_nodes
+    assert rag_response.response == "fake response"
@@ -1,12 +1,17 @@
+import io
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 import torch
+from PIL import Image
 
 from fed_rag import RAGConfig, RAGSystem
 from fed_rag.base.generator import BaseGenerator
+from fed_rag.base.generator_mixins import ImageModalityMixin
 from fed_rag.base.retriever import BaseRetriever
-from fed_rag.data_structures import KnowledgeNode, SourceNode
+from fed_rag.blob_stores import LocalBlobStore
+from fed_rag.data_structures import Context, KnowledgeNode, SourceNode
 from fed_rag.exceptions import RAGSystemError
 from fed_rag.knowledge_stores.in_memory import InMemoryKnowledgeStore
 
@@ -381,3 +386,266 @@ def test_rag_system_format_context(
 
     # assert
     assert formatted_context == "node 1\nnode 2\nnode 3"
+
+
+class MockImageGenerator(ImageModalityMixin, MockGenerator):
+    pass
+
+
+def test_rag_system_query_passes_node_images_to_generator(
+    mock_retriever: MockRetriever,
+    tmp_path: Path,
+) -> None:
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), color="red").save(buffer, format="PNG")
+    blob_store = LocalBlobStore(root_dir=str(tmp_path))
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(
+        nodes=[
+            KnowledgeNode(
+                embedding=[1.0, 0.0, 1.0],
+                node_type="multimodal",
+                text_content="node 1",
+                image_content=buffer.getvalue(),
+            ),
+            KnowledgeNode(
+                embedding=[1.0, 0.0, 0.0],
+                node_type="text",
+                text_content="node 2",
+            ),
+        ],
+        blob_store=blob_store,
+    )
+    rag_system = RAGSystem(
+        generator=MockImageGenerator(),
+        retriever=mock_retriever,
+        knowledge_store=knowledge_store,
+        rag_config=RAGConfig(top_k=2),
+    )
+
+    with (
+        patch.object(
+            MockImageGenerator, "generate", return_value="response"
+        ) as mock_generate,
+        patch.object(
+            LocalBlobStore,
+            "get",
+            autospec=True,
+            side_effect=LocalBlobStore.get,
+        ) as mock_get,
+    ):
+        rag_system.query("fake query")
+        rag_system.query("fake query")
+
+    contexts = [c.kwargs["context"] for c in mock_generate.call_args_list]
+    assert all(isinstance(c, Context) for c in contexts)
+    assert str(contexts[0]) == "node 2\nnode 1"
+    assert contexts[0].images[0].size == (4, 4)
+    # the image is decoded once, then served from the LRU cache
+    assert contexts[1].images[0] is contexts[0].images[0]
+    mock_get.assert_called_once()
+
+
+@patch.object(MockRetriever, "encode_query")
+def test_rag_system_query_embedding_cache(
+    mock_encode_query: MagicMock,
+    mock_generator: BaseGenerator,
+    mock_retriever: MockRetriever,
+    knowledge_nodes: list[KnowledgeNode],
+) -> None:
+    mock_encode_query.side_effect = lambda q: torch.ones(len(q), 3)
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(nodes=knowledge_nodes)
+    rag_system = RAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=knowledge_store,
+        rag_config=RAGConfig(top_k=2, query_cache_size=8),
+    )
+
+    rag_system.batch_retrieve(["fake query 1", "fake query 2"])
+    result = rag_system.batch_retrieve(["fake query 2", "fake query 3"])
+
+    mock_encode_query.assert_called_with(["fake query 3"])
+    assert len(result) == 2
+    assert rag_system.query_embedding_cache is not None
+    assert rag_system.query_embedding_cache.cache_info().hits == 1
+
+
+def test_rag_system_query_embedding_cache_disabled_by_default(
+    mock_generator: BaseGenerator,
+    mock_retriever: MockRetriever,
+    knowledge_nodes: list[KnowledgeNode],
+) -> None:
+    rag_system = RAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=InMemoryKnowledgeStore.from_nodes(knowledge_nodes),
+        rag_config=RAGConfig(top_k=2),
+    )
+
+    assert rag_system.query_embedding_cache is None
+
+
+@patch.object(MockRetriever, "encode_query")
+def test_rag_system_retrieval_cache(
+    mock_encode_query: MagicMock,
+    mock_generator: BaseGenerator,
+    mock_retriever: MockRetriever,
+    knowledge_nodes: list[KnowledgeNode],
+) -> None:
+    mock_encode_query.return_value = torch.Tensor([[1.0, 1.0, 1.0]])
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(nodes=knowledge_nodes)
+    rag_system = RAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=knowledge_store,
+        rag_config=RAGConfig(top_k=2, retrieval_cache_size=8),
+    )
+
+    first = rag_system.retrieve("fake query")
+    second = rag_system.batch_retrieve(["fake query"])[0]
+
+    assert mock_encode_query.call_count == 1
+    assert [s.node for s in second] == [s.node for s in first]
+
+    # modifying the knowledge store invalidates cached results
+    knowledge_store.delete_node(first[0].node.node_id)
+    third = rag_system.retrieve("fake query")
+
+    assert mock_encode_query.call_count == 2
+    assert first[0].node not in [s.node for s in third]
+
+
+@patch.object(RAGSystem, "batch_generate")
+@patch.object(RAGSystem, "batch_retrieve")
+def test_rag_system_query_stream(
+    mock_batch_retrieve: MagicMock,
+    mock_batch_generate: MagicMock,
+    mock_generator: BaseGenerator,
+    mock_retriever: MockRetriever,
+    knowledge_nodes: list[KnowledgeNode],
+) -> None:
+    source_node = SourceNode(score=0.5, node=knowledge_nodes[0])
+    mock_batch_retrieve.side_effect = lambda qs: [[source_node] for _ in qs]
+    mock_batch_generate.side_effect = lambda qs, cs: [
+        f"response: {q}" for q in qs
+    ]
+    rag_system = RAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=InMemoryKnowledgeStore.from_nodes(knowledge_nodes),
+        rag_config=RAGConfig(top_k=1),
+    )
+    queries = (f"query {ix}" for ix in range(5))
+
+    responses = list(rag_system.query_stream(queries, batch_size=2))
+
+    assert [str(r) for r in responses] == [
+        f"response: query {ix}" for ix in range(5)
+    ]
+    assert all(r.source_nodes == [source_node] for r in responses)
+    assert [c.args[0] for c in mock_batch_retrieve.call_args_list] == [
+        ["query 0", "query 1"],
+        ["query 2", "query 3"],
+        ["query 4"],
+    ]
+
+
+@patch.object(RAGSystem, "batch_retrieve")
+def test_rag_system_query_stream_propagates_retrieval_errors(
+    mock_batch_retrieve: MagicMock,
+    mock_generator: BaseGenerator,
+    mock_retriever: MockRetriever,
+    knowledge_nodes: list[KnowledgeNode],
+) -> None:
+    mock_batch_retrieve.side_effect = RuntimeError("retrieval failed")
+    rag_system = RAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=InMemoryKnowledgeStore.from_nodes(knowledge_nodes),
+        rag_config=RAGConfig(top_k=1),
+    )
+
+    with pytest.raises(RuntimeError, match="retrieval failed"):
+        list(rag_system.query_stream(["query"]))
+
+
+def test_rag_system_query_stream_invalid_batch_size_raises_error(
+    mock_generator: BaseGenerator,
+    mock_retriever: MockRetriever,
+    knowledge_nodes: list[KnowledgeNode],
+) -> None:
+    rag_system = RAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=InMemoryKnowledgeStore.from_nodes(knowledge_nodes),
+        rag_config=RAGConfig(top_k=1),
+    )
+
+    with pytest.raises(
+        RAGSystemError, match="`batch_size` must be a positive integer."
+    ):
+        list(rag_system.query_stream(["query"], batch_size=0))
+
+
+@patch.object(MockGenerator, "stream_generate")
+@patch.object(RAGSystem, "_format_context")
+@patch.object(RAGSystem, "retrieve")
+def test_rag_system_stream_query(
+    mock_retrieve: MagicMock,
+    mock_format_context: MagicMock,
+    mock_stream_generate: MagicMock,
+    mock_generator: BaseGenerator,
+    mock_retriever: BaseRetriever,
+    knowledge_nodes: list[KnowledgeNode],
+) -> None:
+    # arrange mocks
+    source_nodes = [SourceNode(score=0.99, node=knowledge_nodes[0])]
+    mock_retrieve.return_value = source_nodes
+    mock_format_context.return_value = "fake context"
+    mock_stream_generate.return_value = iter(["fake ", "response"])
+
+    # build rag system
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(nodes=knowledge_nodes)
+    rag_system = RAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=knowledge_store,
+        rag_config=RAGConfig(top_k=1),
+    )
+
+    # act
+    streaming_response = rag_system.stream_query(query="fake query")
+    first_chunk = next(streaming_response.response_gen)
+    rag_response = streaming_response.get_response()
+
+    # assert
+    mock_retrieve.assert_called_with("fake query")
+    mock_stream_generate.assert_called_once_with(
+        query="fake query", context="fake context"
+    )
+    assert streaming_response.source_nodes == source_nodes
+    assert first_chunk == "fake "
+    assert rag_response.response == "response"
+    assert rag_response.source_nodes == source_nodes
+
+
+def test_rag_system_stream_query_default_generator_stream(
+    mock_generator: BaseGenerator,
+    mock_retriever: BaseRetriever,
+    knowledge_nodes: list[KnowledgeNode],
+) -> None:
+    knowledge_store = InMemoryKnowledgeStore.from_nodes(nodes=knowledge_nodes)
+    rag_system = RAGSystem(
+        generator=mock_generator,
+        retriever=mock_retriever,
+        knowledge_store=knowledge_store,
+        rag_config=RAGConfig(top_k=1),
+    )
+
+    streaming_response = rag_system.stream_query(query="fake query")
+    chunks = list(streaming_response.response_gen)
+
+    context = rag_system._format_context(streaming_response.source_nodes)
+    assert chunks == [
+        mock_generator.generate(query="fake query", context=context)
+    ]
@@ -0,0 +1,211 @@
+import threading
+from typing import Any, Callable
+
+import pytest
+import torch
+from pydantic import PrivateAttr
+
+from fed_rag import KnowledgeStoreReindexer
+from fed_rag.base.retriever import BaseRetriever
+from fed_rag.data_structures import KnowledgeNode
+from fed_rag.exceptions import ReindexError
+from fed_rag.knowledge_stores.in_memory import InMemoryKnowledgeStore
+
+
+class _LengthRetriever(BaseRetriever):
+    """Encodes a text as `[len(text), scale]`, unless given `encode_fn`."""
+
+    _encoder: torch.nn.Module = PrivateAttr(
+        default_factory=lambda: torch.nn.Linear(1, 1)
+    )
+    scale: float = 1.0
+    num_calls: int = 0
+    encode_fn: Callable[[list[str]], Any] | None = None
+
+    def encode_context(self, context: Any, **kwargs: Any) -> torch.Tensor:
+        self.num_calls += 1
+        if self.encode_fn is not None:
+            return self.encode_fn(context)  # type: ignore[no-any-return]
+        return torch.tensor([[float(len(t)), self.scale] for t in context])
+
+    def encode_query(self, query: Any, **kwargs: Any) -> torch.Tensor:
+        return self.encode_context(query)
+
+    @property
+    def encoder(self) -> torch.nn.Module:
+        return self._encoder
+
+    @property
+    def query_encoder(self) -> torch.nn.Module | None:
+        return None
+
+    @property
+    def context_encoder(self) -> torch.nn.Module | None:
+        return None
+
+
+@pytest.fixture()
+def knowledge_store() -> InMemoryKnowledgeStore:
+    nodes = [
+        KnowledgeNode(
+            node_id=str(ix),
+            embedding=[0.0, 0.0],
+            node_type="text",
+            text_content="x" * (ix + 1),
+        )
+        for ix in range(5)
+    ]
+    return InMemoryKnowledgeStore.from_nodes(nodes)
+
+
+def test_reindex(knowledge_store: InMemoryKnowledgeStore) -> None:
+    retriever = _LengthRetriever()
+    reindexer = KnowledgeStoreReindexer(
+        retriever=retriever, knowledge_store=knowledge_store, batch_size=2
+    )
+    version = knowledge_store.version
+
+    num_nodes = reindexer.reindex()
+
+    assert num_nodes == 5
+    assert reindexer.num_reindexes == 1
+    assert retriever.num_calls == 3
+    assert knowledge_store.version > version
+    for ix in range(5):
+        node = knowledge_store._data[str(ix)]
+        assert list(node.embedding) == [float(ix + 1), 1.0]
+    # retrieval uses the new embeddings
+    results = knowledge_store.retrieve(query_emb=[1.0, 0.0], top_k=1)
+    assert results[0][1].node_id == "4"
+
+
+def test_reindex_raises_error_on_non_tensor_embeddings(
+    knowledge_store: InMemoryKnowledgeStore,
+) -> None:
+    retriever = _LengthRetriever(encode_fn=lambda texts: [[1.0, 1.0]])
+    reindexer = KnowledgeStoreReindexer(
+        retriever=retriever, knowledge_store=knowledge_store
+    )
+
+    with pytest.raises(
+        ReindexError, match="requires `encode_context` to return a torch"
+    ):
+        reindexer.reindex()
+
+
+def test_reindex_raises_error_on_embedding_count_mismatch(
+    knowledge_store: InMemoryKnowledgeStore,
+) -> None:
+    retriever = _LengthRetriever(encode_fn=lambda texts: torch.ones(1, 2))
+    reindexer = KnowledgeStoreReindexer(
+        retriever=retriever, knowledge_store=knowledge_store, batch_size=2
+    )
+
+    with pytest.raises(
+        ReindexError,
+        match="Retriever returned 1 embeddings for a batch of 2 texts.",
+    ):
+        reindexer.reindex()
+
+
+def test_start_reindexes_in_background(
+    knowledge_store: InMemoryKnowledgeStore,
+) -> None:
+    retriever = _LengthRetriever(scale=2.0)
+    with KnowledgeStoreReindexer(
+        retriever=retriever, knowledge_store=knowledge_store
+    ) as reindexer:
+        assert reindexer.wait() is None
+        assert reindexer.start()
+        assert reindexer.wait() == 5
+        assert not reindexer.running
+
+    assert reindexer.num_reindexes == 1
+    assert list(knowledge_store._data["0"].embedding) == [1.0, 2.0]
+    # the retriever was snapshot, so the original was never called
+    assert retriever.num_calls == 0
+
+
+def test_start_skips_while_running(
+    knowledge_store: InMemoryKnowledgeStore,
+) -> None:
+    release = threading.Event()
+
+    def _blocking_encode(texts: list[str]) -> torch.Tensor:
+        release.wait(timeout=5)
+        return torch.ones(len(texts), 2)
+
+    retriever = _LengthRetriever(encode_fn=_blocking_encode)
+    reindexer = KnowledgeStoreReindexer(
+        retriever=retriever,
+        knowledge_store=knowledge_store,
+        snapshot_retriever=False,
+    )
+
+    assert reindexer.start()
+    assert reindexer.running
+    assert not reindexer.start()
+    release.set()
+    reindexer.close()
+
+    assert reindexer.num_reindexes == 1
+    assert list(knowledge_store._data["4"].embedding) == [1.0, 1.0]
+
+
+def test_start_surfaces_previous_error(
+    knowledge_store: InMemoryKnowledgeStore,
+) -> None:
+    retriever = _LengthRetriever(encode_fn=lambda texts: torch.ones(1, 2))
+    reindexer = KnowledgeStoreReindexer(
+        retriever=retriever,
+        knowledge_store=knowledge_store,
+        batch_size=2,
+        snapshot_retriever=False,
+    )
+
+    assert reindexer.start()
+    with pytest.raises(ReindexError):
+        reindexer.wait()
+    with pytest.raises(ReindexError):
+        reindexer.start()
+    # the failed re-index is cleared, so a new one can start
+    retriever.encode_fn = lambda texts: torch.ones(len(texts), 2)
+    assert reindexer.start()
+    reindexer.close()
+    assert reindexer.num_reindexes == 1
+
+
+class _WeightRetriever(_LengthRetriever):
+    """Encodes a text as `[len(text), weight]` of its encoder."""
+
+    def encode_context(self, context: Any, **kwargs: Any) -> torch.Tensor:
+        weight = self.encoder.weight.item()
+        return torch.tensor([[float(len(t)), weight] for t in context])
+
+
+def test_start_reuses_shadow_retriever(
+    knowledge_store: InMemoryKnowledgeStore,
+) -> None:
+    retriever = _WeightRetriever()
+    with torch.no_grad():
+        retriever.encoder.weight.fill_(1.0)
+    reindexer = KnowledgeStoreReindexer(
+        retriever=retriever, knowledge_store=knowledge_store
+    )
+
+    assert reindexer.start()
+    reindexer.wait()
+    shadow = reindexer._shadow_retriever
+    shadow_weight = shadow.encoder.weight
+    # training updates the live retriever
+    with torch.no_grad():
+        retriever.encoder.weight.fill_(3.0)
+    assert reindexer.start()
+    reindexer.close()
+
+    # the shadow is reused, with its parameters updated in place
+    assert reindexer._shadow_retriever is shadow
+    assert shadow is not retriever
+    assert shadow.encoder.weight is shadow_weight
+    assert shadow_weight.data_ptr() != retriever.encoder.weight.data_ptr()
+    assert list(knowledge_store._data["0"].embedding) == [1.0, 3.0]
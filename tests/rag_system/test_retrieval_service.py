@@ -0,0 +1,123 @@
+import pickle
+from typing import Any
+
+import pytest
+import torch
+from torch.utils.data import DataLoader
+
+from fed_rag import RAGSystem, RetrievalClient, RetrievalService
+from fed_rag.exceptions import RetrievalServiceError
+
+from .conftest import MockRetriever
+
+
+class _BatchMockRetriever(MockRetriever):
+    def encode_query(self, query: Any, **kwargs: Any) -> torch.Tensor:
+        if isinstance(query, list):
+            return torch.stack(
+                [MockRetriever.encode_query(self, q) for q in query]
+            )
+        return super().encode_query(query)
+
+
+@pytest.fixture()
+def mock_rag_system(mock_rag_system: RAGSystem) -> RAGSystem:
+    mock_rag_system.retriever = _BatchMockRetriever()
+    return mock_rag_system
+
+
+def test_retrieve(mock_rag_system: RAGSystem) -> None:
+    with RetrievalService(rag_system=mock_rag_system) as service:
+        client = service.client()
+
+        results = client.retrieve(["first query", "second query"])
+
+    expected = service.retrieve(["first query"])[0]
+    assert len(results) == 2
+    assert results[0] == expected
+    contexts, scores = results[0]
+    assert len(contexts) == len(scores) == mock_rag_system.rag_config.top_k
+    assert all(isinstance(c, str) for c in contexts)
+
+
+def test_batch_compute_target_sequence_log_proba(
+    mock_rag_system: RAGSystem,
+) -> None:
+    with RetrievalService(rag_system=mock_rag_system) as service:
+        client = service.start()
+
+        log_probas = client.batch_compute_target_sequence_log_proba(
+            prompts=["prompt 1", "prompt 2"], targets=["target", "target"]
+        )
+
+    torch.testing.assert_close(log_probas, torch.full((2,), 0.42).log())
+
+
+def test_client_is_picklable(mock_rag_system: RAGSystem) -> None:
+    with RetrievalService(rag_system=mock_rag_system) as service:
+        client = service.client()
+        client.retrieve(["query"])  # opens a connection
+
+        unpickled = pickle.loads(pickle.dumps(client))
+        results = unpickled.retrieve(["query"])
+
+    assert isinstance(unpickled, RetrievalClient)
+    assert unpickled.address == client.address
+    assert len(results) == 1
+
+
+def _collate(client: RetrievalClient) -> Any:
+    def collate_fn(queries: list[str]) -> list[int]:
+        return [len(contexts) for contexts, _ in client.retrieve(queries)]
+
+    return collate_fn
+
+
+def test_retrieve_from_dataloader_workers(mock_rag_system: RAGSystem) -> None:
+    with RetrievalService(rag_system=mock_rag_system) as service:
+        loader = DataLoader(
+            [f"query {ix}" for ix in range(8)],
+            batch_size=2,
+            num_workers=2,
+            collate_fn=_collate(service.client()),
+        )
+
+        batches = list(loader)
+
+    assert batches == [[2, 2]] * 4
+
+
+def test_request_errors_are_raised(mock_rag_system: RAGSystem) -> None:
+    with RetrievalService(rag_system=mock_rag_system) as service:
+        client = service.client()
+
+        with pytest.raises(
+            RetrievalServiceError,
+            match="There should be one target for every prompt.",
+        ):
+            client.batch_compute_target_sequence_log_proba(
+                prompts=["prompt 1", "prompt 2"], targets=["target"]
+            )
+        # the connection can still be used
+        assert len(client.retrieve(["query"])) == 1
+
+
+def test_closed_service(mock_rag_system: RAGSystem) -> None:
+    service = RetrievalService(rag_system=mock_rag_system)
+    with pytest.raises(
+        RetrievalServiceError, match="Retrieval service is not running."
+    ):
+        service.client()
+
+    client = service.start()
+    assert service.running
+    service.close()
+    service.close()  # no-op
+
+    assert not service.running
+    with pytest.raises(
+        RetrievalServiceError, match="Retrieval service has been closed."
+    ):
+        service.start()
+    with pytest.raises(RetrievalServiceError):
+        client.retrieve(["query"])
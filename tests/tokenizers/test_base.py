@@ -8,3 +8,9 @@ def test_base(mock_tokenizer: BaseTokenizer) -> None:
     assert input_ids == [0, 1, 2]
     assert decoded_str == "mock decoded sentence"
     assert mock_tokenizer.unwrapped is None
+
+
+def test_base_batch_encode(mock_tokenizer: BaseTokenizer) -> None:
+    results = mock_tokenizer.batch_encode(["hello", "world"])
+
+    assert results == [[0, 1, 2], [0, 1, 2]]
@@ -219,3 +219,63 @@ def test_encode_raises_error_if_input_ids_has_unexpected_shape() -> None:
     ):
         # act
         tokenizer.encode("fake input")
+
+
+def test_batch_encode() -> None:
+    # arrange
+    tokenizer = HFPretrainedTokenizer(
+        model_name="fake_name", load_model_at_init=False
+    )
+    mock_tokenizer = MagicMock()
+    mock_tokenizer.return_value = {
+        "input_ids": [[1, 2], [3]],
+        "attention_mask": [[1, 1], [1]],
+    }
+    tokenizer.unwrapped = mock_tokenizer
+
+    # act
+    results = tokenizer.batch_encode(
+        ["fake input", "other"], truncation=True, max_length=2
+    )
+
+    assert results == [
+        {"input_ids": [1, 2], "attention_mask": [1, 1]},
+        {"input_ids": [3], "attention_mask": [1]},
+    ]
+    mock_tokenizer.assert_called_once_with(
+        text=["fake input", "other"], truncation=True, max_length=2
+    )
+    assert tokenizer.batch_encode([]) == []
+
+
+def test_batch_encode_with_hf_tokenizer(
+    hf_tokenizer: PreTrainedTokenizer,
+) -> None:
+    tokenizer = HFPretrainedTokenizer(
+        model_name="fake_name", load_model_at_init=False
+    )
+    tokenizer.unwrapped = hf_tokenizer
+    texts = ["hello hello", "hello", "hello hello hello"]
+
+    results = tokenizer.batch_encode(texts)
+
+    assert results == [tokenizer.encode(text) for text in texts]
+
+
+def test_batch_encode_raises_error_if_input_ids_is_empty() -> None:
+    # arrange
+    tokenizer = HFPretrainedTokenizer(
+        model_name="fake_name", load_model_at_init=False
+    )
+    mock_tokenizer = MagicMock()
+    mock_tokenizer.return_value = {
+        "input_ids": [[1, 2], []],
+        "attention_mask": [[1, 1], []],
+    }
+    tokenizer.unwrapped = mock_tokenizer
+
+    with pytest.raises(
+        TokenizerError, match="Tokenizer returned empty input_ids"
+    ):
+        # act
+        tokenizer.batch_encode(["fake input", ""])
@@ -0,0 +1,62 @@
+import re
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+from transformers import TrainerControl, TrainerState, TrainingArguments
+
+from fed_rag.exceptions import MissingExtraError
+from fed_rag.trainers.huggingface.callbacks import ReindexCallback
+
+
+def test_reindex_callback_starts_every_n_steps() -> None:
+    reindexer = MagicMock()
+    callback = ReindexCallback(reindexer, every_n_steps=2)
+    args = MagicMock(spec=TrainingArguments)
+    state = TrainerState()
+    control = TrainerControl()
+
+    for step in range(1, 6):
+        state.global_step = step
+        callback.on_step_end(args, state, control)
+
+    assert reindexer.start.call_count == 2
+    reindexer.close.assert_not_called()
+
+    callback.on_train_end(args, state, control)
+
+    reindexer.close.assert_called_once()
+
+
+def test_reindex_callback_invalid_every_n_steps() -> None:
+    with pytest.raises(
+        ValueError, match="`every_n_steps` must be a positive integer."
+    ):
+        ReindexCallback(MagicMock(), every_n_steps=0)
+
+
+def test_huggingface_extra_missing() -> None:
+    modules = {
+        "transformers": None,
+    }
+    module_to_import = "fed_rag.trainers.huggingface.callbacks"
+    original_module = sys.modules.pop(module_to_import, None)
+
+    with patch.dict("sys.modules", modules):
+        msg = (
+            "`ReindexCallback` requires `huggingface` extra to be installed. "
+            "To fix please run `pip install fed-rag[huggingface]`."
+        )
+        with pytest.raises(
+            MissingExtraError,
+            match=re.escape(msg),
+        ):
+            from fed_rag.trainers.huggingface.callbacks import (
+                ReindexCallback,
+            )
+
+            ReindexCallback(MagicMock(), every_n_steps=1)
+
+    # restore module so to not affect other tests
+    if original_module:
+        sys.modules[module_to_import] = original_module
@@ -1,11 +1,17 @@
 import re
 import sys
+from pathlib import Path
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
 import torch
 from datasets import Dataset
 from pytest import MonkeyPatch
+from sentence_transformers import (
+    SentenceTransformer,
+    SentenceTransformerTrainingArguments,
+)
 from torch.testing import assert_close
 from transformers.trainer_utils import TrainOutput
 
@@ -18,6 +24,8 @@ from fed_rag.exceptions import (
     MissingInputTensor,
     TrainerError,
 )
+from fed_rag.loss.pytorch.lsr import LSRLoss
+from fed_rag.trainers.huggingface.callbacks import ReindexCallback
 from fed_rag.trainers.huggingface.lsr import (
     HuggingFaceTrainerForLSR,
     LSRSentenceTransformerTrainer,
@@ -42,6 +50,33 @@ def test_init(
     assert isinstance(trainer.hf_trainer_obj, LSRSentenceTransformerTrainer)
 
 
+def test_init_with_reindexing(
+    hf_rag_system: RAGSystem, train_dataset: Dataset, monkeypatch: MonkeyPatch
+) -> None:
+    # skip validation of rag system
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+
+    trainer = HuggingFaceTrainerForLSR(
+        model=hf_rag_system.retriever.encoder,
+        rag_system=hf_rag_system,
+        train_dataset=train_dataset,
+        reindex_every_n_steps=10,
+        reindex_batch_size=8,
+    )
+
+    callbacks = [
+        cb
+        for cb in trainer.hf_trainer_obj.callback_handler.callbacks
+        if isinstance(cb, ReindexCallback)
+    ]
+    assert len(callbacks) == 1
+    assert callbacks[0].every_n_steps == 10
+    assert callbacks[0].reindexer.batch_size == 8
+    assert (
+        callbacks[0].reindexer.knowledge_store is hf_rag_system.knowledge_store
+    )
+
+
 def test_invalid_retriever_raises_error(
     mock_rag_system: RAGSystem,
     train_dataset: Dataset,
@@ -285,3 +320,181 @@ def test_lsr_sentence_transformer_collect_scores_raises_missing_input_tensor_err
         match="Collated `inputs` are missing key `lm_scores`",
     ):
         hf_trainer.collect_scores(inputs={"retrieval_scores": torch.ones(5)})
+
+
+class _CharCountEncoder(torch.nn.Module):
+    """Toy sentence transformer module encoding texts by character counts."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.linear = torch.nn.Linear(26, 4)
+
+    def tokenize(self, texts: list[str], **kwargs: Any) -> dict:
+        counts = torch.zeros((len(texts), 26))
+        for row, text in enumerate(texts):
+            for char in text:
+                if "a" <= char <= "z":
+                    counts[row, ord(char) - ord("a")] += 1
+        return {"counts": counts}
+
+    def forward(self, features: dict) -> dict:
+        features["sentence_embedding"] = self.linear(features["counts"])
+        return features
+
+
+@pytest.mark.parametrize("dual_encoder", [False, True])
+def test_lsr_sentence_transformer_compute_loss_differentiable(
+    hf_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+    dual_encoder: bool,
+) -> None:
+    # skip validation of rag system
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+    torch.manual_seed(42)
+    model = SentenceTransformer(modules=[_CharCountEncoder()])
+    context_encoder = SentenceTransformer(modules=[_CharCountEncoder()])
+    mock_retriever = MagicMock()
+    mock_retriever.encoder = None if dual_encoder else model
+    mock_retriever.context_encoder = context_encoder
+    collator = DataCollatorForLSR(rag_system=hf_rag_system)
+    hf_trainer = LSRSentenceTransformerTrainer(
+        model=model, data_collator=collator
+    )
+    inputs = {
+        "retrieval_scores": torch.zeros((2, 2), requires_grad=True),
+        "lm_scores": torch.tensor([[-1.0, -2.0], [-3.0, -1.0]]),
+        "query_texts": ["first query", "second query"],
+        "context_texts": [["apple", "banana"], ["cherry", "date"]],
+    }
+
+    # act
+    with patch.object(hf_rag_system, "retriever", mock_retriever):
+        loss = hf_trainer.compute_loss(model=model, inputs=inputs)
+        loss.backward()
+
+    # assert
+    with torch.no_grad():
+        query_embs = model.encode(["first query", "second query"])
+        context_encoder = context_encoder if dual_encoder else model
+        context_embs = context_encoder.encode(
+            ["apple", "banana", "cherry", "date"]
+        )
+    expected_scores = torch.nn.functional.cosine_similarity(
+        torch.tensor(query_embs).repeat_interleave(2, dim=0),
+        torch.tensor(context_embs),
+    ).view(2, 2)
+    assert_close(
+        loss,
+        LSRLoss()(expected_scores, inputs["lm_scores"]),
+    )
+    assert model[0].linear.weight.grad is not None
+    assert inputs["retrieval_scores"].grad is None
+    for param in context_encoder.parameters():
+        assert (param.grad is None) == dual_encoder
+
+
+def test_lsr_sentence_transformer_compute_loss_with_ragged_retrievals(
+    hf_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    # skip validation of rag system
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+    torch.manual_seed(42)
+    model = SentenceTransformer(modules=[_CharCountEncoder()])
+    mock_retriever = MagicMock()
+    mock_retriever.encoder = model
+    collator = DataCollatorForLSR(rag_system=hf_rag_system)
+    hf_trainer = LSRSentenceTransformerTrainer(
+        model=model, data_collator=collator
+    )
+    inputs = {
+        "retrieval_scores": torch.zeros((2, 3)),
+        "lm_scores": torch.tensor([[-1.0, -2.0, -0.5], [-3.0, 0.0, 0.0]]),
+        "query_texts": ["first query", "second query"],
+        "context_texts": [["apple", "banana", "cherry"], ["date"]],
+        "num_contexts": [3, 1],
+    }
+
+    # act
+    with patch.object(hf_rag_system, "retriever", mock_retriever):
+        scores = hf_trainer.compute_retrieval_scores(
+            model,
+            query_texts=inputs["query_texts"],
+            context_texts=inputs["context_texts"],
+            num_contexts=inputs["num_contexts"],
+        )
+        loss = hf_trainer.compute_loss(model=model, inputs=inputs)
+        loss.backward()
+
+    # assert
+    assert scores.shape == (2, 3)
+    assert_close(scores[1, 1:], torch.zeros(2))
+    loss_fn = LSRLoss(reduction="sum")
+    expected_loss = (
+        loss_fn(scores[:1].detach(), inputs["lm_scores"][:1])
+        + loss_fn(scores[1:, :1].detach(), inputs["lm_scores"][1:, :1])
+    ) / 2
+    assert_close(loss, expected_loss)
+    assert torch.isfinite(model[0].linear.weight.grad).all()
+
+
+def test_lsr_sentence_transformer_compute_retrieval_scores_raises_error_on_count_mismatch(
+    hf_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    # skip validation of rag system
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+    model = SentenceTransformer(modules=[_CharCountEncoder()])
+    hf_trainer = LSRSentenceTransformerTrainer(
+        model=model, data_collator=DataCollatorForLSR(rag_system=hf_rag_system)
+    )
+
+    with pytest.raises(
+        TrainerError,
+        match="Query 1 has 1 contexts, but its context count is 2.",
+    ):
+        hf_trainer.compute_retrieval_scores(
+            model,
+            query_texts=["first query", "second query"],
+            context_texts=[["apple", "banana"], ["cherry"]],
+            num_contexts=[2, 2],
+        )
+
+
+def test_lsr_sentence_transformer_train_updates_encoder(
+    hf_rag_system: RAGSystem,
+    monkeypatch: MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    # skip validation of rag system
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+    torch.manual_seed(42)
+    model = SentenceTransformer(modules=[_CharCountEncoder()])
+    hf_rag_system.retriever.encoder = model
+    train_dataset = Dataset.from_dict(
+        {
+            "query": ["first query", "second query"],
+            "response": ["first response", "second response"],
+            "retrieved_contexts": [["abc", "bcd"], ["cde", "xyz"]],
+            "retrieved_scores": [[0.1, 0.2], [0.3, 0.4]],
+        }
+    )
+    hf_trainer = LSRSentenceTransformerTrainer(
+        model=model,
+        args=SentenceTransformerTrainingArguments(
+            output_dir=str(tmp_path),
+            per_device_train_batch_size=2,
+            save_strategy="no",
+            report_to=[],
+            use_cpu=True,
+        ),
+        data_collator=DataCollatorForLSR(rag_system=hf_rag_system),
+        train_dataset=train_dataset,
+    )
+    weight = model[0].linear.weight.detach().clone()
+
+    # act
+    hf_trainer.train()
+
+    # assert
+    assert not torch.equal(weight, model[0].linear.weight)
@@ -1,5 +1,6 @@
 import re
 import sys
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -8,7 +9,7 @@ from pytest import MonkeyPatch
 from transformers import Trainer
 from transformers.trainer_utils import TrainOutput
 
-from fed_rag import RAGSystem
+from fed_rag import RAGSystem, RetrievalClient
 from fed_rag.exceptions import FedRAGError, MissingExtraError
 from fed_rag.trainers.huggingface.ralt import HuggingFaceTrainerForRALT
 
@@ -103,6 +104,35 @@ def test_train(
     assert out.loss == 0.42
 
 
+def test_train_serves_retrievals_to_dataloader_workers(
+    hf_rag_system: RAGSystem,
+    train_dataset: Dataset,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    # skip validation of rag system
+    monkeypatch.setenv("FEDRAG_SKIP_VALIDATION", "1")
+
+    trainer = HuggingFaceTrainerForRALT(
+        rag_system=hf_rag_system,
+        train_dataset=train_dataset,
+    )
+    hf_trainer = trainer.hf_trainer_obj
+    hf_trainer.args.dataloader_num_workers = 2
+    collator = hf_trainer.data_collator
+    clients = []
+
+    def _train(**kwargs: Any) -> TrainOutput:
+        clients.append(collator.retrieval_client)
+        return TrainOutput(global_step=42, training_loss=0.42, metrics={})
+
+    with patch.object(hf_trainer, "train", side_effect=_train):
+        out = trainer.train()
+
+    assert out.loss == 0.42
+    assert isinstance(clients[0], RetrievalClient)
+    assert collator.retrieval_client is None
+
+
 def test_evaluate(
     hf_rag_system: RAGSystem,
     train_dataset: Dataset,
@@ -1,7 +1,9 @@
 import re
 import sys
+from pathlib import Path
 from unittest.mock import patch
 
+import pyarrow as pa
 import pytest
 import torch
 from datasets import Dataset
@@ -29,6 +31,25 @@ def test_hf_rag_ft_dataset_init(
     assert rag_ft_dataset["attention_mask"] == [None, None, None]
 
 
+def test_hf_rag_ft_dataset_from_arrow_files(tmp_path: Path) -> None:
+    paths = []
+    for ix in range(2):
+        table = pa.table({"input_ids": [[ix, ix]], "target_ids": [[ix, 42]]})
+        path = tmp_path / f"shard-{ix}.arrow"
+        with pa.ipc.new_stream(str(path), table.schema) as writer:
+            writer.write_table(table)
+        paths.append(path)
+
+    rag_ft_dataset = HuggingFaceRAGFinetuningDataset.from_arrow_files(paths)
+    empty_dataset = HuggingFaceRAGFinetuningDataset.from_arrow_files([])
+
+    assert isinstance(rag_ft_dataset, HuggingFaceRAGFinetuningDataset)
+    assert rag_ft_dataset["input_ids"] == [[0, 0], [1, 1]]
+    assert rag_ft_dataset["target_ids"] == [[0, 42], [1, 42]]
+    assert len(rag_ft_dataset.cache_files) == 2
+    assert len(empty_dataset) == 0
+
+
 def test_hf_rag_ft_dataset_missing_extra_raises_error(
     input_and_target_ids: tuple[torch.Tensor, torch.Tensor],
 ) -> None:
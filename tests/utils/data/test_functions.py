@@ -1,12 +1,18 @@
-from typing import Sequence
+from pathlib import Path
+from typing import Any, Sequence
 from unittest.mock import MagicMock
 
 import pytest
 import torch
+from datasets import Dataset
 
-from fed_rag.base.tokenizer import EncodeResult
+from fed_rag.base.tokenizer import BaseTokenizer, EncodeResult
 from fed_rag.data_structures import KnowledgeNode, SourceNode
-from fed_rag.utils.data import build_finetune_dataset
+from fed_rag.utils.data import (
+    build_finetune_dataset,
+    get_retrieved_contexts,
+    precompute_retrievals,
+)
 from fed_rag.utils.data.finetuning_datasets import PyTorchRAGFinetuningDataset
 from fed_rag.utils.data.finetuning_datasets.huggingface import (
     HuggingFaceRAGFinetuningDataset,
@@ -58,15 +64,15 @@ def test_build_finetune_dataset_txt_return(
 ) -> None:
     # arrange
     mock_rag_system = MagicMock()
-    mock_retrieve = MagicMock()
-    mock_retrieve.side_effect = mock_source_nodes
     mock_tokenizer = MagicMock()
     mock_encode_return: EncodeResult = {
         "attention_mask": None,
         "input_ids": [1, 1, 1],
     }
-    mock_tokenizer.encode.return_value = mock_encode_return
-    mock_rag_system.retrieve = mock_retrieve
+    mock_tokenizer.batch_encode.side_effect = lambda texts, **kwargs: [
+        mock_encode_return for _ in texts
+    ]
+    mock_rag_system.batch_retrieve.return_value = mock_source_nodes
     mock_rag_system.generator.tokenizer = mock_tokenizer
 
     # act
@@ -84,6 +90,7 @@ def test_build_finetune_dataset_txt_return(
         "fake query 1 fake text context 2 fake answer 1",
         "fake query 1 fake text context 3 fake answer 1",
     ]
+    mock_tokenizer.batch_encode.assert_not_called()
 
 
 def test_build_finetune_dataset_pt_return(
@@ -91,15 +98,15 @@ def test_build_finetune_dataset_pt_return(
 ) -> None:
     # arrange
     mock_rag_system = MagicMock()
-    mock_retrieve = MagicMock()
-    mock_retrieve.side_effect = mock_source_nodes
     mock_tokenizer = MagicMock()
     mock_encode_return: EncodeResult = {
         "attention_mask": None,
         "input_ids": [1, 1, 1],
     }
-    mock_tokenizer.encode.return_value = mock_encode_return
-    mock_rag_system.retrieve = mock_retrieve
+    mock_tokenizer.batch_encode.side_effect = lambda texts, **kwargs: [
+        mock_encode_return for _ in texts
+    ]
+    mock_rag_system.batch_retrieve.return_value = mock_source_nodes
     mock_rag_system.generator.tokenizer = mock_tokenizer
 
     # act
@@ -113,6 +120,8 @@ def test_build_finetune_dataset_pt_return(
     # assert
     assert isinstance(result, PyTorchRAGFinetuningDataset)
     assert len(result) == 4
+    mock_tokenizer.batch_encode.assert_called_once()
+    mock_tokenizer.encode.assert_not_called()
     assert isinstance(result.input_ids[0], torch.Tensor)
     assert isinstance(result.target_ids[0], torch.Tensor)
 
@@ -122,15 +131,15 @@ def test_build_finetune_dataset_hf_return(
 ) -> None:
     # arrange
     mock_rag_system = MagicMock()
-    mock_retrieve = MagicMock()
-    mock_retrieve.side_effect = mock_source_nodes
     mock_tokenizer = MagicMock()
     mock_encode_return: EncodeResult = {
         "attention_mask": None,
         "input_ids": [1, 1, 1],
     }
-    mock_tokenizer.encode.return_value = mock_encode_return
-    mock_rag_system.retrieve = mock_retrieve
+    mock_tokenizer.batch_encode.side_effect = lambda texts, **kwargs: [
+        mock_encode_return for _ in texts
+    ]
+    mock_rag_system.batch_retrieve.return_value = mock_source_nodes
     mock_rag_system.generator.tokenizer = mock_tokenizer
 
     # act
@@ -159,20 +168,142 @@ def test_build_finetune_dataset_hf_return(
     }
 
 
+def test_build_finetune_dataset_with_max_length(
+    mock_examples: Sequence[dict], mock_source_nodes: list[list[SourceNode]]
+) -> None:
+    # arrange
+    mock_rag_system = MagicMock()
+    mock_rag_system.batch_retrieve.return_value = mock_source_nodes
+    mock_tokenizer = MagicMock()
+    mock_tokenizer.batch_encode.side_effect = lambda texts, **kwargs: [
+        {"attention_mask": [1, 1], "input_ids": [1, 2]} for _ in texts
+    ]
+    mock_rag_system.generator.tokenizer = mock_tokenizer
+
+    # act
+    result: PyTorchRAGFinetuningDataset = build_finetune_dataset(
+        rag_system=mock_rag_system,
+        examples=mock_examples,
+        eos_token_id=42,
+        return_dataset="pt",
+        max_length=2,
+    )
+
+    # assert
+    args, kwargs = mock_tokenizer.batch_encode.call_args
+    assert len(args[0]) == 4
+    assert kwargs == {"truncation": True, "max_length": 2}
+    assert result.target_ids[0].tolist() == [2, 42]
+
+
+class _CharTokenizer(BaseTokenizer):
+    """Picklable tokenizer encoding every character as its code point."""
+
+    def encode(self, input: str, **kwargs: Any) -> EncodeResult:
+        input_ids = [ord(c) for c in input][: kwargs.get("max_length")]
+        return {"input_ids": input_ids, "attention_mask": [1] * len(input_ids)}
+
+    def decode(self, input_ids: list[int], **kwargs: Any) -> str:
+        return "".join(chr(ix) for ix in input_ids)
+
+    @property
+    def unwrapped(self) -> None:
+        return None
+
+
+def _batch_retrieve(queries: list[str]) -> list[list[SourceNode]]:
+    return [
+        [
+            SourceNode(
+                score=0.5,
+                node=KnowledgeNode(
+                    node_type="text", text_content=f"c{ix}", embedding=[0.0]
+                ),
+            )
+            for ix in range(2)
+        ]
+        for _ in queries
+    ]
+
+
+@pytest.mark.parametrize("num_proc", [None, 2])
+def test_build_finetune_dataset_sharded(
+    num_proc: int | None, tmp_path: Path
+) -> None:
+    # arrange
+    mock_rag_system = MagicMock()
+    mock_rag_system.batch_retrieve.side_effect = _batch_retrieve
+    mock_rag_system.generator.tokenizer = _CharTokenizer()
+    examples = [{"query": f"q{ix}", "answer": "a"} for ix in range(7)]
+
+    # act
+    result: HuggingFaceRAGFinetuningDataset = build_finetune_dataset(
+        rag_system=mock_rag_system,
+        examples=examples,
+        eos_token_id=42,
+        return_dataset="hf",
+        batch_size=2,
+        shard_size=3,
+        num_proc=num_proc,
+        output_dir=tmp_path / "shards",
+    )
+    in_memory: HuggingFaceRAGFinetuningDataset = build_finetune_dataset(
+        rag_system=mock_rag_system,
+        examples=examples,
+        eos_token_id=42,
+        return_dataset="hf",
+    )
+
+    # assert
+    assert sorted(p.name for p in (tmp_path / "shards").iterdir()) == [
+        "shard-00000.arrow",
+        "shard-00001.arrow",
+        "shard-00002.arrow",
+    ]
+    assert isinstance(result, HuggingFaceRAGFinetuningDataset)
+    assert len(result) == 14
+    assert result.to_dict() == in_memory.to_dict()
+    assert result[0]["input_ids"] == [ord(c) for c in "q0 c0 a"]
+    assert result[0]["target_ids"] == [ord(c) for c in "0 c0 a"] + [42]
+    # the dataset is memory-mapped from the shards
+    assert len(result.cache_files) == 3
+    # retrieval is batched within shards of 3 examples
+    assert [
+        len(call.args[0])
+        for call in mock_rag_system.batch_retrieve.call_args_list
+    ][:4] == [2, 1, 2, 1]
+
+
+def test_build_finetune_dataset_output_dir_requires_hf_return(
+    tmp_path: Path,
+) -> None:
+    with pytest.raises(
+        ValueError,
+        match="`output_dir` is only supported with `return_dataset='hf'`.",
+    ):
+        build_finetune_dataset(
+            rag_system=MagicMock(),
+            examples=[],
+            eos_token_id=42,
+            return_dataset="pt",
+            output_dir=tmp_path,
+        )
+
+
 def test_build_finetune_dataset_invalid_return_raises_error(
     mock_examples: Sequence[dict], mock_source_nodes: list[list[SourceNode]]
 ) -> None:
     # arrange
     mock_rag_system = MagicMock()
-    mock_retrieve = MagicMock()
-    mock_retrieve.side_effect = mock_source_nodes
     mock_tokenizer = MagicMock()
     mock_encode_return: EncodeResult = {
         "attention_mask": None,
         "input_ids": [1, 1, 1],
     }
-    mock_tokenizer.encode.return_value = mock_encode_return
-    mock_rag_system.retrieve = mock_retrieve
+    mock_tokenizer.batch_encode.side_effect = lambda texts, **kwargs: [
+        mock_encode_return for _ in texts
+    ]
+    mock_rag_system.batch_retrieve.return_value = mock_source_nodes
     mock_rag_system.generator.tokenizer = mock_tokenizer
 
     with pytest.raises(ValueError, match="Invalid `return_type` specified."):
@@ -182,3 +313,34 @@ def test_build_finetune_dataset_invalid_return_raises_error(
             eos_token_id=42,
             return_dataset="invalid_return",
         )
+
+
+def test_precompute_retrievals(
+    mock_examples: Sequence[dict], mock_source_nodes: list[list[SourceNode]]
+) -> None:
+    mock_rag_system = MagicMock()
+    mock_rag_system.batch_retrieve.return_value = mock_source_nodes
+    dataset = Dataset.from_list(list(mock_examples))
+
+    result = precompute_retrievals(
+        rag_system=mock_rag_system, dataset=dataset, batch_size=2
+    )
+
+    mock_rag_system.batch_retrieve.assert_called_once_with(
+        ["fake query 0", "fake query 1"]
+    )
+    assert result[1]["retrieved_node_ids"] == [
+        s.node.node_id for s in mock_source_nodes[1]
+    ]
+    assert result[1]["retrieved_scores"] == pytest.approx([0.2, 0.3])
+    assert result[1]["retrieved_contexts"] == [
+        "fake text context 2",
+        "fake text context 3",
+    ]
+
+    # precomputed retrievals are used instead of retrieving
+    contexts, scores = get_retrieved_contexts(mock_rag_system, result[0])
+
+    mock_rag_system.retrieve.assert_not_called()
+    assert contexts == ["fake text context 0", "fake text context 1"]
+    assert scores == pytest.approx([0.0, 0.1])
@@ -0,0 +1,52 @@
+import pytest
+
+from fed_rag.utils.batching import PaddingStats, length_buckets
+
+
+def test_padding_stats_from_lengths() -> None:
+    stats = PaddingStats.from_lengths([2, 4, 4])
+
+    assert stats.num_sequences == 3
+    assert stats.num_tokens == 10
+    assert stats.num_padding_tokens == 2
+    assert stats.padding_ratio == pytest.approx(2 / 12)
+
+
+def test_padding_stats_add() -> None:
+    stats = PaddingStats.from_lengths([1, 3]) + PaddingStats.from_lengths([5])
+
+    assert stats == PaddingStats(
+        num_sequences=3, num_tokens=9, num_padding_tokens=2
+    )
+
+
+def test_padding_stats_empty() -> None:
+    assert PaddingStats().padding_ratio == 0.0
+    assert PaddingStats.from_lengths([]).padding_ratio == 0.0
+
+
+def test_length_buckets_sorts_by_length() -> None:
+    assert length_buckets([5, 1, 3]) == [[1, 2, 0]]
+
+
+def test_length_buckets_max_batch_size() -> None:
+    assert length_buckets([5, 1, 3, 2, 4], max_batch_size=2) == [
+        [1, 3],
+        [2, 4],
+        [0],
+    ]
+
+
+def test_length_buckets_max_padding_ratio() -> None:
+    lengths = [10, 1, 2, 9]
+
+    buckets = length_buckets(lengths, max_padding_ratio=0.25)
+
+    assert buckets == [[1, 2], [3, 0]]
+    for bucket in buckets:
+        stats = PaddingStats.from_lengths([lengths[ix] for ix in bucket])
+        assert stats.padding_ratio <= 0.25
+
+
+def test_length_buckets_empty() -> None:
+    assert length_buckets([]) == []
@@ -0,0 +1,205 @@
+import threading
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+import torch
+
+from fed_rag.data_structures import KnowledgeNode, SourceNode
+from fed_rag.utils.cache import (
+    CacheInfo,
+    LRUCache,
+    QueryEmbeddingCache,
+    RetrievalCache,
+    parameters_fingerprint,
+)
+
+
+def test_lru_cache_get_and_put() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache.put("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.cache_info() == CacheInfo(
+        hits=1, misses=1, maxsize=2, currsize=1
+    )
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert len(cache) == 2
+
+
+@patch("fed_rag.utils.cache.time")
+def test_lru_cache_ttl(mock_time: MagicMock) -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2, ttl=10.0)
+    mock_time.monotonic.return_value = 0.0
+    cache.put("a", 1)
+
+    mock_time.monotonic.return_value = 5.0
+    assert cache.get("a") == 1
+
+    mock_time.monotonic.return_value = 11.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "msg"),
+    [
+        ({"maxsize": 0}, "`maxsize` must be a positive integer."),
+        ({"maxsize": 1, "ttl": 0}, "`ttl` must be positive."),
+    ],
+)
+def test_lru_cache_invalid_args_raises_error(
+    kwargs: dict[str, Any], msg: str
+) -> None:
+    with pytest.raises(ValueError, match=msg):
+        LRUCache(**kwargs)
+
+
+def test_parameters_fingerprint_changes_on_weight_update() -> None:
+    module = torch.nn.Linear(2, 2)
+    fingerprint = parameters_fingerprint(module, None)
+
+    assert parameters_fingerprint(module) == fingerprint
+    with torch.no_grad():
+        module.weight.add_(1.0)
+    assert parameters_fingerprint(module) != fingerprint
+
+
+def _mock_retriever(encoder: torch.nn.Module) -> MagicMock:
+    retriever = MagicMock()
+    retriever.encoder = encoder
+    retriever.query_encoder = None
+    retriever.encode_query.side_effect = lambda q: (
+        torch.ones(len(q), 3) if isinstance(q, list) else torch.ones(1, 3)
+    )
+    return retriever
+
+
+def _source_node() -> SourceNode:
+    return SourceNode(
+        score=0.5,
+        node=KnowledgeNode(node_type="text", text_content="node"),
+    )
+
+
+def test_query_embedding_cache_encode_query() -> None:
+    retriever = _mock_retriever(torch.nn.Linear(3, 3))
+    cache = QueryEmbeddingCache(maxsize=4)
+
+    first = cache.encode_query(retriever, "query")
+    second = cache.encode_query(retriever, "query")
+
+    retriever.encode_query.assert_called_once_with("query")
+    assert first.shape == (3,)
+    assert second is first
+    assert cache.cache_info().hits == 1
+
+
+def test_query_embedding_cache_batch_encodes_only_misses() -> None:
+    retriever = _mock_retriever(torch.nn.Linear(3, 3))
+    cache = QueryEmbeddingCache(maxsize=4)
+    cache.encode_query(retriever, "a")
+
+    query_embs = cache.batch_encode_query(retriever, ["a", "b", "b"])
+
+    retriever.encode_query.assert_called_with(["b"])
+    assert query_embs.shape == (3, 3)
+
+
+def test_query_embedding_cache_invalidated_on_weight_update() -> None:
+    encoder = torch.nn.Linear(3, 3)
+    retriever = _mock_retriever(encoder)
+    cache = QueryEmbeddingCache(maxsize=4)
+    cache.encode_query(retriever, "query")
+
+    with torch.no_grad():
+        encoder.weight.add_(1.0)
+    cache.encode_query(retriever, "query")
+
+    assert retriever.encode_query.call_count == 2
+
+
+def test_retrieval_cache_invalidated_on_knowledge_store_version() -> None:
+    retriever = _mock_retriever(torch.nn.Linear(3, 3))
+    knowledge_store = MagicMock(version=0)
+    cache = RetrievalCache(maxsize=4)
+    source_nodes = [_source_node()]
+
+    state = cache.check_state(retriever, knowledge_store)
+    cache.put("query", 2, source_nodes, state=state)
+
+    assert cache.get("query", 2) == source_nodes
+    assert cache.get("query", 3) is None
+
+    knowledge_store.version = 2
+    cache.check_state(retriever, knowledge_store)
+
+    assert cache.get("query", 2) is None
+
+
+def test_retrieval_cache_drops_results_from_stale_state() -> None:
+    retriever = _mock_retriever(torch.nn.Linear(3, 3))
+    knowledge_store = MagicMock(version=0)
+    cache = RetrievalCache(maxsize=4)
+
+    stale_state = cache.check_state(retriever, knowledge_store)
+    knowledge_store.version = 2
+    cache.check_state(retriever, knowledge_store)
+    cache.put("query", 2, [_source_node()], state=stale_state)
+
+    assert cache.get("query", 2) is None
+
+
+def test_retrieval_cache_put_is_atomic_with_state_check() -> None:
+    retriever = _mock_retriever(torch.nn.Linear(3, 3))
+    knowledge_store = MagicMock(version=0)
+    cache = RetrievalCache(maxsize=4)
+    state = cache.check_state(retriever, knowledge_store)
+    knowledge_store.version = 2
+    put = cache.cache.put
+    threads = []
+
+    def _put_after_concurrent_check_state(key: Any, value: Any) -> None:
+        # the store changes between the state check and the write
+        thread = threading.Thread(
+            target=cache.check_state, args=(retriever, knowledge_store)
+        )
+        thread.start()
+        thread.join(timeout=0.1)
+        threads.append(thread)
+        put(key, value)
+
+    with patch.object(
+        cache.cache, "put", side_effect=_put_after_concurrent_check_state
+    ):
+        cache.put("query", 2, [_source_node()], state=state)
+    threads[0].join()
+
+    assert cache.get("query", 2) is None
+
+
+def test_retrieval_cache_returns_copies() -> None:
+    retriever = _mock_retriever(torch.nn.Linear(3, 3))
+    knowledge_store = MagicMock(version=0)
+    cache = RetrievalCache(maxsize=4)
+    source_nodes = [_source_node()]
+    state = cache.check_state(retriever, knowledge_store)
+    cache.put("query", 2, source_nodes, state=state)
+
+    source_nodes[0].score = 0.0
+    cached = cache.get("query", 2)
+    cached[0].score = 1.0  # type: ignore[index]
+
+    assert cache.get("query", 2)[0].score == 0.5  # type: ignore[index]
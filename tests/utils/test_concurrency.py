@@ -0,0 +1,75 @@
+import threading
+import time
+from typing import Iterator
+
+import pytest
+
+from fed_rag.utils.concurrency import threaded_map
+
+
+def test_threaded_map_preserves_order() -> None:
+    results = list(threaded_map(lambda x: x * 2, range(10)))
+
+    assert results == [x * 2 for x in range(10)]
+
+
+def test_threaded_map_runs_in_background_thread() -> None:
+    thread_ids = list(threaded_map(lambda _: threading.get_ident(), range(3)))
+
+    assert all(tid != threading.get_ident() for tid in thread_ids)
+
+
+def test_threaded_map_chained_stages() -> None:
+    stage_1 = threaded_map(lambda x: x + 1, range(5), max_queue_size=2)
+    stage_2 = threaded_map(lambda x: x * 10, stage_1, max_queue_size=2)
+
+    assert list(stage_2) == [10, 20, 30, 40, 50]
+
+
+def test_threaded_map_bounded_prefetch() -> None:
+    produced = []
+
+    def fn(x: int) -> int:
+        produced.append(x)
+        return x
+
+    stream = threaded_map(fn, range(100), max_queue_size=2)
+    assert next(stream) == 0
+    time.sleep(0.05)
+
+    # consumed item + queue of 2 + one item blocked on put
+    assert len(produced) <= 4
+    stream.close()
+
+
+def test_threaded_map_propagates_errors() -> None:
+    def fn(x: int) -> int:
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    stream = threaded_map(fn, range(5))
+    assert [next(stream) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(ValueError, match="bad item"):
+        next(stream)
+
+
+def test_threaded_map_close_closes_upstream() -> None:
+    closed = threading.Event()
+
+    def source() -> Iterator[int]:
+        try:
+            yield from range(100)
+        finally:
+            closed.set()
+
+    stream = threaded_map(lambda x: x, source())
+    next(stream)
+    stream.close()
+
+    assert closed.is_set()
+
+
+def test_threaded_map_invalid_queue_size() -> None:
+    with pytest.raises(ValueError, match="must be a positive integer"):
+        list(threaded_map(lambda x: x, range(3), max_queue_size=0))